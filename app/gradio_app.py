@@ -2,90 +2,114 @@
 import os
 import json
 import uuid
-import tempfile
 from typing import Tuple, Optional
 
 import gradio as gr
 import logging  # NEW
 
-# NEW: basic logger setup
-logging.basicConfig(
-    level=logging.DEBUG,
-    format="%(asctime)s [%(levelname)s] %(name)s - %(message)s",
-)
+from src.structured_log import configure_logging, RequestLogHooks
+
+# LOG_MODE=debug (default) logs every stage as text; LOG_MODE=structured writes one JSON
+# event per request through a background queue and skips per-stage formatting.
+LOG_MODE = os.getenv("LOG_MODE", "debug")
+configure_logging(LOG_MODE, level=logging.DEBUG if LOG_MODE == "debug" else logging.INFO)
 logger = logging.getLogger(__name__)
 
 # Import your chain, models and memory
 from src.chain import DeterministicChain
-from src.models import MockClient, LLMClient
-from src.memory import ShortTermMemory
-
-# Try to import openai if user wants real model (optional)
-try:
-    from openai import OpenAI
-    
-    client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
-    OPENAI_AVAILABLE = True
-except Exception:
-    OPENAI_AVAILABLE = False
-
-# Helper: OpenAI client wrapper (optional)
-class OpenAIClient(LLMClient):
-    def __init__(self, api_key: Optional[str] = None, model: str = "gpt-4o-mini"):
-        logger.debug("Initializing OpenAIClient with model=%s", model)
-        if api_key is None:
-            api_key = os.getenv("OPENAI_API_KEY")
-        if not api_key:
-            logger.error("OpenAI API key not found in env")
-            raise RuntimeError("OpenAI API key not found.")
-        self.model = model
-
-    def generate(self, system: str, user: str, temperature: float = 0.1) -> str:
-        logger.info("OpenAIClient.generate called (temp=%s)", temperature)
-        # Use Chat Completions; adjust per provider if needed
-        resp = client.chat.completions.create(model=self.model,
-        messages=[
-            {"role": "system", "content": system},
-            {"role": "user", "content": user},
-        ],
-        temperature=temperature)
-        # Extract text
-        text = resp.choices[0].message.content
-        logger.debug("OpenAIClient.generate got %d chars", len(text or ""))
-        return text
+from src.models import MockClient
+from src.providers import OpenAIClient, OPENAI_DEFAULT_MODEL, openai_available
+from src.registry import ChainRegistry
+from src.memory import ShortTermMemory, SqliteMemoryBackend
+from src.utils import dump_json
+from src.metrics import DEFAULT_METRICS, CompositeHooks, MetricsHooks, start_metrics_server
+from src.scheduler import RateLimitedClient, RequestScheduler, scheduling_context
+from src.dedup import NearDuplicateIndex
+from src.results import ResultsStore
+
+# OpenAI is optional; the SDK is only imported when the openai model is first used.
+OPENAI_AVAILABLE = openai_available()
+OPENAI_MODEL = os.getenv("OPENAI_MODEL", OPENAI_DEFAULT_MODEL)
 
 # App-level memory and default client
-GLOBAL_MEMORY = ShortTermMemory(max_len=4)
+# Set MEMORY_DB_PATH to share session memory across worker processes.
+_MEMORY_DB_PATH = os.getenv("MEMORY_DB_PATH")
+GLOBAL_MEMORY = ShortTermMemory(
+    max_len=4,
+    backend=SqliteMemoryBackend(_MEMORY_DB_PATH) if _MEMORY_DB_PATH else None,
+)
+
+# Max estimated input tokens per request (system prompt + memory + input).
+PROMPT_TOKEN_BUDGET = int(os.getenv("PROMPT_TOKEN_BUDGET", "6000"))
+
+# Chain metrics are always collected; set METRICS_PORT to expose them at /metrics for Prometheus.
+_METRICS_PORT = os.getenv("METRICS_PORT")
+if _METRICS_PORT:
+    start_metrics_server(int(_METRICS_PORT), DEFAULT_METRICS)
+
+DEMO_RESPONSE = json.dumps({
+    "name": "Demo Startup",
+    "summary": "Demo summary; limited data.",
+    "market": {"size_estimate": "unknown", "top_markets": [], "competitors": []},
+    "product": {"category": "demo", "differentiation": "unknown"},
+    "business_model": {"revenue_streams": [], "monetization_risks": []},
+    "team": {"founders_count": "unknown", "strengths": [], "gaps": []},
+    "risks": [],
+    "recommendation": {"invest": "hold", "rationale": "insufficient data"},
+    "assumptions": ["demo"]
+})
+
+# Every validated assessment is kept in the results store; UI downloads are exported from it
+# into RESULTS_EXPORT_DIR. Each session owns two files there (its latest result and its
+# latest JSONL export), rewritten in place, so the directory grows with sessions, not runs.
+RESULTS = ResultsStore(os.getenv("RESULTS_DB_PATH", "results.sqlite"))
+RESULTS_EXPORT_DIR = os.getenv("RESULTS_EXPORT_DIR", "exports")
+os.makedirs(RESULTS_EXPORT_DIR, exist_ok=True)
+
+# Set DEDUP_DB_PATH to reuse stored assessments for near-duplicate inputs (DEDUP_MODE=seed
+# instead passes the stored assessment to the model as a reference).
+_DEDUP_DB_PATH = os.getenv("DEDUP_DB_PATH")
+DEDUP_INDEX = NearDuplicateIndex(
+    _DEDUP_DB_PATH, threshold=float(os.getenv("DEDUP_THRESHOLD", "0.85"))) if _DEDUP_DB_PATH else None
+
+# Provider quota shared by UI and batch traffic; set PROVIDER_RPM / PROVIDER_TPM to enforce it.
+_PROVIDER_RPM = float(os.getenv("PROVIDER_RPM", "0")) or None
+_PROVIDER_TPM = float(os.getenv("PROVIDER_TPM", "0")) or None
+SCHEDULER = RequestScheduler(rpm=_PROVIDER_RPM, tpm=_PROVIDER_TPM) if (_PROVIDER_RPM or _PROVIDER_TPM) else None
+
+def _build_openai_client(model: str):
+    if not OPENAI_AVAILABLE:
+        logger.error("OpenAI SDK not available in environment")
+        raise RuntimeError("OpenAI SDK not available in environment.")
+    client = OpenAIClient(model=model)
+    return RateLimitedClient(client, SCHEDULER) if SCHEDULER is not None else client
+
+# Clients and chains are built once and reused by every request / Gradio worker.
+REGISTRY = ChainRegistry(
+    memory=GLOBAL_MEMORY,
+    factories={
+        "openai": _build_openai_client,
+        # MockClient returns a simple default response that mirrors the schema (for demo)
+        "mock": lambda model: MockClient(DEMO_RESPONSE),
+    },
+    stream=True,
+    token_budget=PROMPT_TOKEN_BUDGET,
+    # Identical concurrent submissions share one LLM call.
+    coalesce=True,
+    dedup=DEDUP_INDEX,
+    dedup_mode=os.getenv("DEDUP_MODE", "return"),
+    results=RESULTS,
+    # Demo output must never be reused for (or exported as) a real model's assessment.
+    provider_kwargs={"mock": {"dedup": None, "results": None}},
+    hooks=CompositeHooks(MetricsHooks(DEFAULT_METRICS), RequestLogHooks(
+        sample_rate=float(os.getenv("LOG_DEBUG_SAMPLE_RATE", "0.01")))) if LOG_MODE == "structured"
+    else MetricsHooks(DEFAULT_METRICS),
+)
 
 def build_chain(client_name: str, temperature: float) -> DeterministicChain:
     logger.info("build_chain called with client_name=%s, temperature=%s", client_name, temperature)
-    # Choose client
-    if client_name == "openai":
-        if not OPENAI_AVAILABLE:
-            logger.error("OpenAI SDK not available in environment")
-            raise RuntimeError("OpenAI SDK not available in environment.")
-        client = OpenAIClient(model="gpt-4o-mini")  # change model as desired
-        client.generate = lambda system, user, temperature=temperature: OpenAIClient().generate(system, user, temperature)
-        logger.debug("Using OpenAIClient")
-    else:
-        logger.debug("Using MockClient")
-        # MockClient returns an instructive placeholder if used; change per-run via response_inject
-        # We'll use MockClient with a simple default response that mirrors schema (for demo)
-        demo_response = json.dumps({
-            "name": "Demo Startup",
-            "summary": "Demo summary; limited data.",
-            "market": {"size_estimate": "unknown", "top_markets": [], "competitors": []},
-            "product": {"category": "demo", "differentiation": "unknown"},
-            "business_model": {"revenue_streams": [], "monetization_risks": []},
-            "team": {"founders_count": "unknown", "strengths": [], "gaps": []},
-            "risks": [],
-            "recommendation": {"invest": "hold", "rationale": "insufficient data"},
-            "assumptions": ["demo"]
-        })
-        client = MockClient(demo_response)
-    chain = DeterministicChain(llm_client=client, memory=GLOBAL_MEMORY)
-    logger.debug("DeterministicChain instance created")
-    return chain
+    model = OPENAI_MODEL if client_name == "openai" else "demo"
+    return REGISTRY.get_chain(client_name, model, temperature)
 
 # UI helpers
 def run_chain_and_format(user_input: str, model_choice: str, temperature: float, session_id: str):
@@ -100,38 +124,66 @@ def run_chain_and_format(user_input: str, model_choice: str, temperature: float,
         logger.exception("Failed to build LLM client")
         return {"error": True, "message": f"Failed to build LLM client: {e}"}, "", "", session_id
 
-    ok, result = chain.run(user_input, session_id=session_id)
+    # UI requests are interactive: they go ahead of batch jobs and share quota fairly per session.
+    request_id = uuid.uuid4().hex
+    with scheduling_context("interactive", flow=session_id):
+        ok, result = chain.run(user_input, session_id=session_id, request_id=request_id)
     logger.info("chain.run finished ok=%s", ok)
     if not ok:
         logger.warning("Chain failed with result=%s", result)
         error_box = json.dumps(result, indent=2)
         return {"error": True, "message": "Chain failed", "detail": error_box}, "", "", session_id
 
-    # result is pydantic model; convert to dict
+    # result is a pydantic model; serialize it directly without a dict round-trip
     try:
-        out_dict = result.dict()
-        logger.debug("Converted result to dict with keys=%s", list(out_dict.keys()))
+        pretty_json = dump_json(result, indent=2)
     except Exception:
         logger.debug("Result not a Pydantic model; using raw dict if possible")
-        out_dict = result if isinstance(result, dict) else {}
-
-    pretty_json = json.dumps(out_dict, indent=2)
+        pretty_json = json.dumps(result if isinstance(result, dict) else {}, indent=2)
     logger.debug("pretty_json length=%d", len(pretty_json))
 
-    # create a temp file for download
-    tmp = tempfile.NamedTemporaryFile(delete=False, suffix=".json", mode="w")
-    tmp.write(pretty_json)
-    tmp.flush()
-    tmp.close()
-    download_path = tmp.name
-    logger.info("Result JSON written to %s", download_path)
-
-    return {"error": False}, pretty_json, download_path, session_id
+    return {"error": False}, pretty_json, export_result(request_id, session_id, pretty_json), session_id
+
+def _export_path(name: str, suffix: str) -> str:
+    safe = "".join(c for c in name if c.isalnum() or c == "-") or "default"
+    return os.path.join(RESULTS_EXPORT_DIR, f"{safe}{suffix}")
+
+def _write_export(path: str, write):
+    # Write next to the target and swap it in, so a download never sees a half-written file.
+    tmp = f"{path}.{uuid.uuid4().hex[:8]}.tmp"
+    with open(tmp, "w") as f:
+        result = write(f)
+    os.replace(tmp, path)
+    return result
+
+def export_result(request_id: str, session_id: str, fallback_json: str) -> str:
+    """
+    Write the result stored by this request (and only it) to the session's download
+    file, replacing the previous run's. A coalesced run stores nothing under its own
+    id; it exports the result it received.
+    """
+    stored = RESULTS.get(request_id)
+    path = _export_path(session_id or request_id, ".json")
+    text = json.dumps(json.loads(stored), indent=2) if stored is not None else fallback_json
+    _write_export(path, lambda f: f.write(text))
+    logger.info("Result %s exported to %s", request_id, path)
+    return path
+
+def export_results(invest: str, category: str, session_id: str) -> Optional[str]:
+    """Stream this session's stored results matching the filters to a JSONL download."""
+    if not session_id:
+        return None
+    path = _export_path(session_id, "-results.jsonl")
+    count = _write_export(path, lambda f: RESULTS.export_jsonl(
+        f, session_id=session_id, invest=None if invest == "any" else invest,
+        category=(category or "").strip() or None))
+    logger.info("Exported %d stored results to %s", count, path)
+    return path
 
 # Gradio UI layout
 with gr.Blocks(title="Startup Analyst AI", css=".output-json {white-space: pre-wrap;}") as demo:
-    # Session id (hidden, auto-generated)
-    session_id_input = gr.Textbox(value=str(uuid.uuid4()), label="Session ID (auto)", visible=False)
+    # Session id (hidden); generated per browser session on load, so clients never share one
+    session_id_input = gr.Textbox(value="", label="Session ID (auto)", visible=False)
 
     with gr.Row():
         with gr.Column(scale=3):
@@ -148,16 +200,18 @@ with gr.Blocks(title="Startup Analyst AI", css=".output-json {white-space: pre-w
         with gr.Column(scale=1):
             system_preview = gr.Textbox(label="System Prompt (Role + Behavior + Style + Output Format)", lines=20, value="")
             memory_view = gr.Textbox(label="Short-term Memory (last entries)", lines=20, value="")
+            with gr.Accordion("Stored results (this session)", open=False):
+                invest_filter = gr.Dropdown(choices=["any", "yes", "no", "hold"], value="any", label="Invest")
+                category_filter = gr.Textbox(label="Product category", placeholder="any")
+                export_btn = gr.Button("Export JSONL")
+                export_file = gr.File(label="Results export")
 
     error_box = gr.HTML("", visible=False)
 
     # Update system preview on load
     def get_system_preview():
-        from src.prompts.role import ROLE_PROMPT
-        from src.prompts.behavior import BEHAVIOR_PROMPT
-        from src.prompts.style import STYLE_PROMPT
-        from src.prompts.output_format import OUTPUT_FORMAT_PROMPT
-        return "\n\n".join([ROLE_PROMPT.strip(), BEHAVIOR_PROMPT.strip(), STYLE_PROMPT.strip(), OUTPUT_FORMAT_PROMPT.strip()])
+        from src.prompts.system import SYSTEM_PROMPT, SYSTEM_FINGERPRINT
+        return f"{SYSTEM_PROMPT}\n\n[fingerprint {SYSTEM_FINGERPRINT}]"
 
     system_preview.value = get_system_preview()
 
@@ -167,6 +221,7 @@ with gr.Blocks(title="Startup Analyst AI", css=".output-json {white-space: pre-w
             "on_run params: model=%s, temp=%s, user_text_len=%d",
             model_choice_val, temperature_val, len(user_text or "")
         )
+        session_id_val = session_id_val or str(uuid.uuid4())
         if not user_text or user_text.strip() == "":
             logger.warning("on_run received empty user_text")
             return gr.update(visible=True, value="<div style='color:red'>Please enter startup description.</div>"), "", None, session_id_val
@@ -180,7 +235,11 @@ with gr.Blocks(title="Startup Analyst AI", css=".output-json {white-space: pre-w
         logger.info("on_run success; returning JSON and download path")
         return "", pretty_json, download_path, sid
 
+    demo.load(lambda: str(uuid.uuid4()), inputs=None, outputs=[session_id_input])
     run_btn.click(on_run, inputs=[user_input, model_choice, temp_slider, session_id_input],
                   outputs=[error_box, json_output, download_btn, session_id_input])
+    export_btn.click(export_results, inputs=[invest_filter, category_filter, session_id_input],
+                     outputs=[export_file])
 
-demo.launch(server_name="0.0.0.0", share=False)
\ No newline at end of file
+if __name__ == "__main__":
+    demo.launch(server_name="0.0.0.0", share=False)
@@ -0,0 +1,193 @@
+# benchmarks/bench_chain.py
+"""
+End-to-end benchmark of DeterministicChain against simulated providers.
+
+For each scenario (provider latency + failure mix) and each execution mode
+(sync sequential, thread pool, asyncio) it reports throughput, p50/p95/p99
+end-to-end latency, attempts per request, outcome counts and per-stage time
+(prompt build, generate, validate_json / parse / repair / validate)
+as reported by the chain hooks. Results are printed and written as
+JSON so runs can be compared over time. --speculative N (or "auto") runs the
+chain with N candidates per attempt to compare tail latency against retries.
+
+Run: PYTHONPATH=. python benchmarks/bench_chain.py [--requests 200] [--out bench_chain.json]
+"""
+import argparse
+import asyncio
+import contextvars
+import json
+import logging
+import platform
+import time
+from collections import Counter, defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List
+
+import src.chain as chain_module
+from src.chain import DeterministicChain
+from src.metrics import ChainHooks
+from src.memory import ShortTermMemory
+from src.simulated import SimulatedClient
+from src.speculative import SpeculationPolicy
+
+SCENARIOS = {
+    "clean": dict(error_rate=0.0, invalid_json_rate=0.0, schema_violation_rate=0.0),
+    "degraded": dict(error_rate=0.05, invalid_json_rate=0.10, schema_violation_rate=0.10),
+}
+
+_current: contextvars.ContextVar = contextvars.ContextVar("bench_request")
+
+
+class BenchHooks(ChainHooks):
+    """Accumulates per-stage time and the run state for the current request."""
+
+    def on_request_start(self, ctx):
+        rec = _current.get(None)
+        if rec is not None:
+            rec["state"] = ctx
+
+    def on_stage(self, ctx, stage, seconds):
+        rec = _current.get(None)
+        if rec is not None:
+            rec["stages"][stage] += seconds
+
+
+def _new_record() -> Dict[str, Any]:
+    return {"stages": defaultdict(float), "state": None}
+
+
+def _finish(rec: Dict[str, Any], start: float, ok: bool, result: Any) -> Dict[str, Any]:
+    state = rec["state"]
+    return {
+        "latency": time.perf_counter() - start,
+        "ok": ok,
+        "outcome": "ok" if ok else result.get("error", "unknown"),
+        "attempts": state.attempt if state is not None else 0,
+        "stages": dict(rec["stages"]),
+    }
+
+
+def _one_sync(chain: DeterministicChain, i: int) -> Dict[str, Any]:
+    rec = _new_record()
+    token = _current.set(rec)
+    try:
+        start = time.perf_counter()
+        ok, result = chain.run(f"Startup {i}: marketplace connecting suppliers to SMBs.", session_id=f"s{i % 50}")
+        return _finish(rec, start, ok, result)
+    finally:
+        _current.reset(token)
+
+
+async def _one_async(chain: DeterministicChain, i: int, sem: asyncio.Semaphore) -> Dict[str, Any]:
+    async with sem:
+        rec = _new_record()
+        _current.set(rec)
+        start = time.perf_counter()
+        ok, result = await chain.arun(f"Startup {i}: marketplace connecting suppliers to SMBs.", session_id=f"s{i % 50}")
+        return _finish(rec, start, ok, result)
+
+
+def _percentile(values: List[float], pct: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    k = min(len(ordered) - 1, max(0, int(round(pct / 100.0 * (len(ordered) - 1)))))
+    return ordered[k]
+
+
+def summarize(samples: List[Dict[str, Any]], wall: float) -> Dict[str, Any]:
+    latencies = [s["latency"] for s in samples]
+    attempts = [s["attempts"] for s in samples]
+    stages: Dict[str, float] = defaultdict(float)
+    for s in samples:
+        for k, v in s["stages"].items():
+            stages[k] += v
+    n = len(samples) or 1
+    return {
+        "requests": len(samples),
+        "wall_seconds": wall,
+        "throughput_rps": len(samples) / wall if wall else 0.0,
+        "latency_ms": {
+            "p50": _percentile(latencies, 50) * 1000,
+            "p95": _percentile(latencies, 95) * 1000,
+            "p99": _percentile(latencies, 99) * 1000,
+            "mean": sum(latencies) / n * 1000,
+        },
+        "attempts": {"mean": sum(attempts) / n, "max": max(attempts or [0]),
+                     "retries_total": sum(a - 1 for a in attempts if a > 0)},
+        "outcomes": dict(Counter(s["outcome"] for s in samples)),
+        "stage_ms_mean": {k: v / n * 1000 for k, v in sorted(stages.items())},
+    }
+
+
+def run_mode(mode: str, chain: DeterministicChain, requests: int, concurrency: int) -> Dict[str, Any]:
+    start = time.perf_counter()
+    if mode == "sync":
+        samples = [_one_sync(chain, i) for i in range(requests)]
+    elif mode == "threads":
+        with ThreadPoolExecutor(max_workers=concurrency) as pool:
+            samples = list(pool.map(lambda i: _one_sync(chain, i), range(requests)))
+    elif mode == "async":
+        async def main():
+            sem = asyncio.Semaphore(concurrency)
+            return await asyncio.gather(*(_one_async(chain, i, sem) for i in range(requests)))
+        samples = list(asyncio.run(main()))
+    else:
+        raise ValueError(mode)
+    return summarize(samples, time.perf_counter() - start)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="DeterministicChain end-to-end benchmark")
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--sync-requests", type=int, default=20, help="requests for the sequential sync mode")
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--latency-ms", type=float, default=50.0, help="median simulated provider latency")
+    parser.add_argument("--backoff-scale", type=float, default=0.1, help="multiplier on chain retry backoff")
+    parser.add_argument("--scenarios", default=",".join(SCENARIOS))
+    parser.add_argument("--modes", default="sync,threads,async")
+    parser.add_argument("--stream", action="store_true", help="use streaming generation")
+    parser.add_argument("--speculative", default=None,
+                        help='candidates per attempt: a number, or "auto" to tune from the validity rate')
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--out", default="bench_chain.json")
+    parser.add_argument("--log-level", default="CRITICAL")
+    args = parser.parse_args()
+    logging.basicConfig(level=args.log_level)
+
+    chain_module.LLM_ERROR_BACKOFF *= args.backoff_scale
+    chain_module.RETRY_BACKOFF *= args.backoff_scale
+
+    report = {
+        "benchmark": "chain_e2e",
+        "timestamp": time.time(),
+        "python": platform.python_version(),
+        "config": vars(args),
+        "results": [],
+    }
+    for scenario in args.scenarios.split(","):
+        for mode in args.modes.split(","):
+            client = SimulatedClient(latency_ms=args.latency_ms, seed=args.seed, **SCENARIOS[scenario])
+            policy = None
+            if args.speculative:
+                policy = SpeculationPolicy() if args.speculative == "auto" else SpeculationPolicy(fixed_n=int(args.speculative))
+            chain = DeterministicChain(client, ShortTermMemory(), stream=args.stream, hooks=BenchHooks(),
+                                       speculative=policy)
+            n = args.sync_requests if mode == "sync" else args.requests
+            result = run_mode(mode, chain, n, args.concurrency)
+            result.update({"scenario": scenario, "mode": mode, "provider_outcomes": client.stats()})
+            if policy is not None:
+                result["speculation"] = policy.stats()
+            report["results"].append(result)
+            lat = result["latency_ms"]
+            print(f"{scenario:9} {mode:8} n={result['requests']:<5} {result['throughput_rps']:8.1f} req/s  "
+                  f"p50={lat['p50']:7.1f}ms p95={lat['p95']:7.1f}ms p99={lat['p99']:7.1f}ms  "
+                  f"attempts={result['attempts']['mean']:.2f}  outcomes={result['outcomes']}")
+
+    with open(args.out, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    print(f"wrote {args.out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,112 @@
+# benchmarks/bench_dedup.py
+"""
+Near-duplicate index at scale.
+
+Builds a NearDuplicateIndex of --entries synthetic startup descriptions
+(random sentences over a fixed vocabulary), then times lookups for reworded
+copies of stored inputs (reordered sentences, changed whitespace/punctuation)
+and for unseen inputs. Reports build rate, lookup p50/p99, hit rate on
+rewordings and false hits on unseen inputs, and reopen (load) time when
+--path is given. Writes a JSON report to --out.
+
+Run: PYTHONPATH=. python benchmarks/bench_dedup.py [--entries 200000] [--path /tmp/dedup.db]
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import time
+from typing import List
+
+from src.dedup import NearDuplicateIndex
+
+VOCAB_SIZE = 5000
+
+
+def _sentence(rng: random.Random, vocab: List[str]) -> str:
+    return " ".join(rng.choice(vocab) for _ in range(rng.randint(6, 12))) + "."
+
+
+def _description(rng: random.Random, vocab: List[str]) -> List[str]:
+    return [_sentence(rng, vocab) for _ in range(rng.randint(3, 6))]
+
+
+def _reword(rng: random.Random, sentences: List[str]) -> str:
+    s = list(sentences)
+    i, j = rng.sample(range(len(s)), 2)
+    s[i], s[j] = s[j], s[i]
+    return "  ".join(x.upper() if rng.random() < 0.2 else x for x in s).replace(".", "!")
+
+
+def _percentile(values: List[float], pct: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(pct / 100.0 * len(ordered)))]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Near-duplicate index benchmark")
+    parser.add_argument("--entries", type=int, default=200000)
+    parser.add_argument("--lookups", type=int, default=2000)
+    parser.add_argument("--path", default=None, help="sqlite file (default: in-memory index)")
+    parser.add_argument("--seed", type=int, default=3)
+    parser.add_argument("--out", default="bench_dedup.json")
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    vocab = [f"w{i}" for i in range(VOCAB_SIZE)]
+    if args.path and os.path.exists(args.path):
+        os.unlink(args.path)
+    index = NearDuplicateIndex(args.path)
+    payload = json.dumps({"name": "stored"})
+
+    kept = []
+    start = time.perf_counter()
+    for chunk_start in range(0, args.entries, 10000):
+        docs = [_description(rng, vocab) for _ in range(min(10000, args.entries - chunk_start))]
+        index.add_many((" ".join(d), payload) for d in docs)
+        kept.extend(docs[:: max(1, len(docs) // 50)])
+    build = time.perf_counter() - start
+    print(f"built {len(index)} entries in {build:.1f}s ({len(index) / build:.0f}/s)")
+
+    hit_lat, miss_lat, hits, false_hits = [], [], 0, 0
+    for _ in range(args.lookups):
+        text = _reword(rng, rng.choice(kept))
+        t0 = time.perf_counter()
+        hits += index.lookup(text) is not None
+        hit_lat.append(time.perf_counter() - t0)
+        text = " ".join(_description(rng, vocab))
+        t0 = time.perf_counter()
+        false_hits += index.lookup(text) is not None
+        miss_lat.append(time.perf_counter() - t0)
+
+    result = {
+        "entries": len(index),
+        "build_seconds": build,
+        "reworded": {"hit_rate": hits / args.lookups, "p50_us": _percentile(hit_lat, 50) * 1e6,
+                     "p99_us": _percentile(hit_lat, 99) * 1e6},
+        "unseen": {"false_hit_rate": false_hits / args.lookups, "p50_us": _percentile(miss_lat, 50) * 1e6,
+                   "p99_us": _percentile(miss_lat, 99) * 1e6},
+    }
+    print(f"reworded: hit rate {result['reworded']['hit_rate']:.3f}  p50={result['reworded']['p50_us']:.0f}us "
+          f"p99={result['reworded']['p99_us']:.0f}us")
+    print(f"unseen:   false hits {result['unseen']['false_hit_rate']:.3f}  p50={result['unseen']['p50_us']:.0f}us "
+          f"p99={result['unseen']['p99_us']:.0f}us")
+
+    if args.path:
+        index.close()
+        t0 = time.perf_counter()
+        reopened = NearDuplicateIndex(args.path)
+        result["reopen_seconds"] = time.perf_counter() - t0
+        print(f"reopened {len(reopened)} entries in {result['reopen_seconds']:.2f}s")
+        reopened.close()
+
+    report = {"benchmark": "dedup", "timestamp": time.time(), "python": platform.python_version(),
+              "config": vars(args), "result": result}
+    with open(args.out, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    print(f"wrote {args.out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+# benchmarks/bench_import.py
+"""
+Cold-start import time of the CLI entry point, and a guard on its budget.
+
+Each target is imported in a fresh interpreter under `python -X importtime`,
+--repeat times. The report gives:
+- the median cumulative import time of each target;
+- the slowest modules by self time;
+- whether any module that must stay lazy (provider SDKs, Gradio, asyncio,
+  the HTTP and sqlite stacks) was loaded.
+
+The script exits with status 1 when the median for src.cli exceeds
+--budget-ms, or when a lazy module was imported.
+
+Run: PYTHONPATH=. python benchmarks/bench_import.py [--budget-ms 400] [--out bench_import.json]
+"""
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+from typing import Dict, List, Tuple
+
+TARGETS = ("src.cli", "src.chain", "src.schemas")
+LAZY_MODULES = ("openai", "gradio", "numpy", "asyncio", "http.server", "sqlite3", "src.service", "src.batch")
+
+
+def import_times(target: str) -> Tuple[float, List[Tuple[str, int]]]:
+    """(cumulative ms for target, [(module, self us)]) from one cold interpreter."""
+    proc = subprocess.run([sys.executable, "-X", "importtime", "-c", f"import {target}"],
+                          capture_output=True, text=True, env=dict(os.environ), check=True)
+    modules, total = [], 0.0
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = (part.strip() for part in line[len("import time:"):].split("|"))
+        modules.append((name, int(self_us)))
+        if name == target:
+            total = int(cumulative_us) / 1000.0
+    return total, modules
+
+
+def loaded_lazy_modules(target: str) -> List[str]:
+    code = f"import sys, json, {target}; print(json.dumps(sorted(sys.modules)))"
+    loaded = set(json.loads(subprocess.check_output([sys.executable, "-c", code], text=True)))
+    return [m for m in LAZY_MODULES if m in loaded]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Import-time benchmark and startup budget check")
+    parser.add_argument("--repeat", type=int, default=7)
+    parser.add_argument("--top", type=int, default=15)
+    parser.add_argument("--budget-ms", type=float, default=400.0, help="max median import time of src.cli")
+    parser.add_argument("--out", default="bench_import.json")
+    args = parser.parse_args()
+
+    results: Dict[str, Dict] = {}
+    for target in TARGETS:
+        runs = [import_times(target) for _ in range(args.repeat)]
+        totals = [t for t, _ in runs]
+        self_times: Dict[str, List[int]] = {}
+        for _, modules in runs:
+            for name, us in modules:
+                self_times.setdefault(name, []).append(us)
+        slowest = sorted(((name, statistics.median(v) / 1000.0) for name, v in self_times.items()),
+                         key=lambda x: -x[1])[: args.top]
+        results[target] = {"median_ms": statistics.median(totals), "min_ms": min(totals), "max_ms": max(totals),
+                           "slowest_self_ms": slowest, "lazy_modules_loaded": loaded_lazy_modules(target)}
+        r = results[target]
+        print(f"{target:12} median={r['median_ms']:7.1f}ms  min={r['min_ms']:7.1f}ms  "
+              f"lazy loaded={r['lazy_modules_loaded'] or 'none'}")
+
+    cli = results["src.cli"]
+    over_budget = cli["median_ms"] > args.budget_ms
+    leaked = cli["lazy_modules_loaded"]
+    print("slowest modules under src.cli (self ms): "
+          + ", ".join(f"{name}={ms:.1f}" for name, ms in cli["slowest_self_ms"][:8]))
+    report = {"benchmark": "import", "timestamp": time.time(), "python": platform.python_version(),
+              "config": vars(args), "results": results,
+              "budget": {"budget_ms": args.budget_ms, "over_budget": over_budget, "lazy_modules_loaded": leaked}}
+    with open(args.out, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    print(f"wrote {args.out}")
+    if over_budget or leaked:
+        print(f"FAIL: src.cli import {cli['median_ms']:.1f}ms (budget {args.budget_ms:.0f}ms), "
+              f"lazy modules loaded: {leaked or 'none'}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
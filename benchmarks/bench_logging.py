@@ -0,0 +1,106 @@
+# benchmarks/bench_logging.py
+"""
+Logging overhead on the request hot path.
+
+Runs DeterministicChain against a zero-latency MockClient at a high request rate
+with logging configured as:
+
+- off:        root level CRITICAL, no handlers (lower bound)
+- debug:      the app's previous setup, synchronous text handler at DEBUG
+- structured: JSON request events through a background queue, per-stage logs off
+              (RequestLogHooks with --sample-rate of requests carrying stage detail)
+
+Log output goes to --sink (a temp file by default, so real I/O is included).
+Reports requests/s and per-request overhead vs "off" for sequential and
+threaded callers, and writes a JSON report to --out.
+
+Run: PYTHONPATH=. python benchmarks/bench_logging.py [--requests 5000] [--out bench_logging.json]
+"""
+import argparse
+import json
+import logging
+import os
+import platform
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict
+
+from src.chain import DeterministicChain
+from src.memory import ShortTermMemory
+from src.models import MockClient
+from src.structured_log import RequestLogHooks, configure_logging, stop_logging
+from src.tests.test_chain import VALID_JSON_STR
+
+MODES = ("off", "debug", "structured")
+
+
+def _setup(mode: str, sink, sample_rate: float):
+    if mode == "off":
+        stop_logging()
+        root = logging.getLogger()
+        for h in list(root.handlers):
+            root.removeHandler(h)
+        root.setLevel(logging.CRITICAL)
+        return None
+    if mode == "debug":
+        configure_logging("debug", level=logging.DEBUG, stream=sink)
+        return None
+    configure_logging("structured", level=logging.INFO, stream=sink)
+    return RequestLogHooks(sample_rate=sample_rate)
+
+
+def run_mode(mode: str, requests: int, threads: int, sink, sample_rate: float) -> Dict[str, Any]:
+    hooks = _setup(mode, sink, sample_rate)
+    chain = DeterministicChain(MockClient(VALID_JSON_STR), ShortTermMemory(), hooks=hooks)
+
+    def one(i: int) -> None:
+        chain.run(f"Startup {i}: marketplace connecting suppliers to SMBs.", session_id=f"s{i % 100}")
+
+    start = time.perf_counter()
+    if threads <= 1:
+        for i in range(requests):
+            one(i)
+    else:
+        with ThreadPoolExecutor(max_workers=threads) as pool:
+            list(pool.map(one, range(requests)))
+    # Caller-visible time only; the background listener drains afterwards.
+    wall = time.perf_counter() - start
+    stop_logging()
+    return {"mode": mode, "threads": threads, "requests": requests, "wall_seconds": wall,
+            "throughput_rps": requests / wall, "us_per_request": wall / requests * 1e6}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Logging overhead benchmark")
+    parser.add_argument("--requests", type=int, default=5000)
+    parser.add_argument("--threads", default="1,8", help="comma-separated thread counts")
+    parser.add_argument("--sample-rate", type=float, default=0.01)
+    parser.add_argument("--sink", default=None, help="log file (default: temp file)")
+    parser.add_argument("--out", default="bench_logging.json")
+    args = parser.parse_args()
+
+    sink_path = args.sink or tempfile.mkstemp(suffix=".log")[1]
+    results = []
+    with open(sink_path, "w", encoding="utf-8") as sink:
+        for threads in (int(t) for t in args.threads.split(",")):
+            base = None
+            for mode in MODES:
+                r = run_mode(mode, args.requests, threads, sink, args.sample_rate)
+                base = base or r["us_per_request"]
+                r["overhead_us_per_request"] = r["us_per_request"] - base
+                results.append(r)
+                print(f"threads={threads:<3} {mode:11} {r['throughput_rps']:9.0f} req/s  "
+                      f"{r['us_per_request']:8.1f} us/req  overhead={r['overhead_us_per_request']:+8.1f} us")
+    if not args.sink:
+        os.unlink(sink_path)
+
+    report = {"benchmark": "logging", "timestamp": time.time(), "python": platform.python_version(),
+              "config": vars(args), "results": results}
+    with open(args.out, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    print(f"wrote {args.out}")
+
+
+if __name__ == "__main__":
+    main()
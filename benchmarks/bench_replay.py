@@ -0,0 +1,115 @@
+# benchmarks/bench_replay.py
+"""
+Record/replay throughput.
+
+Records --inputs chain runs against a SimulatedClient with a production-like
+fault mix (provider errors, invalid JSON, schema violations) into a cassette,
+then pads the cassette to --entries responses with synthetic prompts. Reports
+cassette load rate, per-lookup cost of ReplayClient at that size, and
+end-to-end chain throughput when replaying the recorded inputs with no
+waiting (time_scale 0), next to the same chain on a MockClient. Writes a JSON
+report to --out.
+
+Run: PYTHONPATH=. python benchmarks/bench_replay.py [--entries 1000000] [--inputs 2000]
+"""
+import argparse
+import json
+import logging
+import os
+import platform
+import tempfile
+import time
+
+from src.cassette import RecordingClient, ReplayClient, prompt_key
+from src.chain import DeterministicChain
+from src.memory import ShortTermMemory
+from src.models import MockClient
+from src.simulated import SimulatedClient
+
+
+class _NoBackoff:
+    def delay(self, attempt, error_kind):
+        return 0.0
+
+
+def _chain(client) -> DeterministicChain:
+    return DeterministicChain(client, ShortTermMemory(), backoff=_NoBackoff())
+
+
+def _throughput(chain: DeterministicChain, inputs) -> dict:
+    t0 = time.perf_counter()
+    ok = sum(chain.run(text)[0] for text in inputs)
+    seconds = time.perf_counter() - t0
+    return {"requests": len(inputs), "ok": ok, "seconds": round(seconds, 3),
+            "requests_per_second": round(len(inputs) / seconds, 1)}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Record/replay benchmark")
+    parser.add_argument("--entries", type=int, default=1000000, help="cassette size after padding")
+    parser.add_argument("--inputs", type=int, default=2000, help="recorded chain runs")
+    parser.add_argument("--lookups", type=int, default=200000)
+    parser.add_argument("--path", default=None, help="cassette file (default: a temp file)")
+    parser.add_argument("--out", default="bench_replay.json")
+    parser.add_argument("--log-level", default="CRITICAL")
+    args = parser.parse_args()
+    logging.basicConfig(level=args.log_level)
+
+    path = args.path or os.path.join(tempfile.mkdtemp(), "bench.cassette")
+    if os.path.exists(path):
+        os.unlink(path)
+    inputs = [f"Startup {i} sells workflow software to regional logistics firms." for i in range(args.inputs)]
+
+    recorder = RecordingClient(SimulatedClient(latency_ms=0, error_rate=0.02, invalid_json_rate=0.05,
+                                               schema_violation_rate=0.05, seed=11), path)
+    t0 = time.perf_counter()
+    recorded = _throughput(_chain(recorder), inputs)
+    record_seconds = time.perf_counter() - t0
+    output = SimulatedClient().response_text
+    with open(path, "a", encoding="utf-8") as f:
+        for i in range(max(0, args.entries - recorder.recorded)):
+            f.write(json.dumps({"k": prompt_key("s", f"pad {i}", 0.1), "t": 0.8, "o": output},
+                               separators=(",", ":")) + "\n")
+    recorder.close()
+
+    t0 = time.perf_counter()
+    replay = ReplayClient(path, time_scale=0)
+    load_seconds = time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    for i in range(args.lookups):
+        replay.generate("s", f"pad {i % max(1, args.entries - recorder.recorded)}")
+    lookup_us = (time.perf_counter() - t0) / args.lookups * 1e6
+
+    replayed = _throughput(_chain(replay), inputs)
+    baseline = _throughput(_chain(MockClient(output)), inputs)
+
+    report = {
+        "benchmark": "replay",
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": platform.python_version(),
+        "config": vars(args),
+        "results": {
+            "cassette_responses": len(replay),
+            "cassette_bytes": os.path.getsize(path),
+            "recorded_completions": recorder.recorded,
+            "record_seconds": round(record_seconds, 3),
+            "load_seconds": round(load_seconds, 3),
+            "load_responses_per_second": round(len(replay) / load_seconds, 1),
+            "lookup_us": round(lookup_us, 3),
+            "recorded": recorded,
+            "replayed": replayed,
+            "mock_baseline": baseline,
+            "misses": replay.stats()["misses"],
+        },
+    }
+    replay.close()
+    if not args.path:
+        os.unlink(path)
+    print(json.dumps(report["results"], indent=2))
+    with open(args.out, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
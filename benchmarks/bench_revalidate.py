@@ -0,0 +1,90 @@
+# benchmarks/bench_revalidate.py
+"""
+Offline re-validation throughput and scaling with cores.
+
+Writes a synthetic archive of --records wrapped model outputs. About 10% of them fail
+validation and 5% are not valid JSON. It then measures:
+
+- baseline: one process, json.loads + validate_output per record
+- revalidate: src.revalidate with 1, 2, 4, ... workers up to the core count
+
+Reports records/s and speedup over one worker, and writes a JSON report to --out.
+
+Run: PYTHONPATH=. python benchmarks/bench_revalidate.py [--records 200000] [--out bench_revalidate.json]
+"""
+import argparse
+import json
+import os
+import platform
+import tempfile
+import time
+
+from src.revalidate import revalidate
+from src.tests.test_chain import VALID_JSON_STR
+from src.utils import validate_output
+
+
+def write_archive(path: str, records: int) -> None:
+    good = json.loads(VALID_JSON_STR)
+    bad = json.loads(VALID_JSON_STR)
+    bad["recommendation"].pop("invest")
+    with open(path, "w", encoding="utf-8") as f:
+        for i in range(records):
+            if i % 20 == 0:
+                raw = VALID_JSON_STR[:-5]
+            elif i % 10 == 1:
+                raw = json.dumps(bad)
+            else:
+                good["name"] = f"Startup {i}"
+                raw = json.dumps(good)
+            f.write(json.dumps({"id": i, "raw": raw}) + "\n")
+
+
+def baseline(path: str) -> float:
+    start = time.perf_counter()
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            try:
+                validate_output(json.loads(json.loads(line)["raw"]))
+            except ValueError:
+                pass
+    return time.perf_counter() - start
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Re-validation benchmark")
+    parser.add_argument("--records", type=int, default=200000)
+    parser.add_argument("--out", default="bench_revalidate.json")
+    args = parser.parse_args()
+
+    cores = os.cpu_count() or 1
+    workers_list = sorted({1, cores} | {w for w in (2, 4, 8, 16, 32) if w < cores})
+    tmp = tempfile.mkdtemp()
+    archive, out = os.path.join(tmp, "archive.jsonl"), os.path.join(tmp, "out.jsonl")
+    write_archive(archive, args.records)
+
+    base = baseline(archive)
+    results = [{"mode": "baseline", "workers": 1, "seconds": base, "records_per_second": args.records / base}]
+    print(f"baseline          {args.records / base:10.0f} rec/s")
+    single = None
+    for workers in workers_list:
+        start = time.perf_counter()
+        report = revalidate(archive, out, field="raw", workers=workers)
+        seconds = time.perf_counter() - start
+        single = single or seconds
+        results.append({"mode": "revalidate", "workers": workers, "seconds": seconds,
+                        "records_per_second": args.records / seconds, "speedup": single / seconds,
+                        "failed": report["failed"]})
+        print(f"revalidate w={workers:<3} {args.records / seconds:10.0f} rec/s  speedup x{single / seconds:.2f}")
+    for name in (archive, out):
+        os.unlink(name)
+
+    report = {"benchmark": "revalidate", "timestamp": time.time(), "python": platform.python_version(),
+              "cores": cores, "config": vars(args), "results": results}
+    with open(args.out, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    print(f"wrote {args.out}")
+
+
+if __name__ == "__main__":
+    main()
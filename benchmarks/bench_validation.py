@@ -0,0 +1,58 @@
+# benchmarks/bench_validation.py
+"""
+Micro-benchmark: dict-based validation vs direct JSON validation.
+
+Old path:  json.loads -> StartupAssessment.model_validate -> .model_dump() -> json.dumps(indent=2)
+New path:  StartupAssessment.model_validate_json -> model_dump_json(indent=2)
+
+Run: PYTHONPATH=. python benchmarks/bench_validation.py [--number N]
+"""
+import argparse
+import json
+import timeit
+
+from src.utils import validate_output, validate_json, dump_json
+from src.tests.test_chain import VALID_JSON_STR
+from src.tests.test_json_output import VALID_EXAMPLE, PARTIAL_EXAMPLE
+
+FIXTURES = {
+    "test_chain.VALID_JSON_STR": VALID_JSON_STR,
+    "test_json_output.VALID_EXAMPLE": json.dumps(VALID_EXAMPLE),
+    "test_json_output.PARTIAL_EXAMPLE": json.dumps(PARTIAL_EXAMPLE),
+}
+
+
+def dict_path(raw: str) -> str:
+    ok, model = validate_output(json.loads(raw))
+    return json.dumps(model.model_dump(), indent=2)
+
+
+def direct_path(raw: str) -> str:
+    ok, model = validate_json(raw)
+    return dump_json(model, indent=2)
+
+
+def direct_path_bytes(raw: bytes) -> str:
+    ok, model = validate_json(raw)
+    return dump_json(model, indent=2)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--number", type=int, default=20000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    print(f"{'fixture':34} {'dict us':>9} {'direct us':>10} {'bytes us':>9} {'speedup':>8}")
+    for name, raw in FIXTURES.items():
+        assert json.loads(dict_path(raw)) == json.loads(direct_path(raw))
+        raw_bytes = raw.encode("utf-8")
+        timings = []
+        for fn, arg in ((dict_path, raw), (direct_path, raw), (direct_path_bytes, raw_bytes)):
+            best = min(timeit.repeat(lambda: fn(arg), number=args.number, repeat=args.repeat))
+            timings.append(best / args.number * 1e6)
+        print(f"{name:34} {timings[0]:9.2f} {timings[1]:10.2f} {timings[2]:9.2f} {timings[0] / timings[1]:7.2f}x")
+
+
+if __name__ == "__main__":
+    main()
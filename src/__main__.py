@@ -0,0 +1,7 @@
+# src/__main__.py
+"""`python -m src` runs the command-line entry point (see src/cli.py)."""
+import sys
+
+from .cli import main
+
+sys.exit(main())
@@ -0,0 +1,167 @@
+# src/batch.py
+import asyncio
+import json
+import os
+from typing import Dict, Optional, Set
+import logging
+
+from .chain import DeterministicChain
+from .utils import dump_json
+from .scheduler import scheduling_context
+
+logger = logging.getLogger(__name__)
+
+# Config
+DEFAULT_CONCURRENCY = 8
+WINDOW_FACTOR = 4  # how far (in lines) the reader may run ahead of the checkpoint, per worker
+
+
+class BatchCheckpoint:
+    """
+    Resume point for a batch run.
+
+    Stores a low watermark (every input line below it is finished) plus the few
+    finished lines above it. The reader never gets more than a fixed window
+    ahead of the watermark, so the checkpoint stays small for any input size.
+    """
+    def __init__(self, path: Optional[str] = None):
+        self.path = path
+        self.next_index = 0
+        self.done_above: Set[int] = set()
+        if path and os.path.exists(path):
+            with open(path, "r", encoding="utf-8") as f:
+                state = json.load(f)
+            self.next_index = int(state.get("next_index", 0))
+            self.done_above = set(state.get("done_above", []))
+            logger.info("Loaded checkpoint %s next_index=%d", path, self.next_index)
+
+    def is_done(self, index: int) -> bool:
+        return index < self.next_index or index in self.done_above
+
+    def mark_done(self, index: int) -> None:
+        if self.is_done(index):
+            return
+        self.done_above.add(index)
+        while self.next_index in self.done_above:
+            self.done_above.discard(self.next_index)
+            self.next_index += 1
+
+    def save(self) -> None:
+        if not self.path:
+            return
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"next_index": self.next_index, "done_above": sorted(self.done_above)}, f)
+        os.replace(tmp_path, self.path)
+
+
+async def arun_batch(
+    chain: DeterministicChain,
+    input_path: str,
+    output_path: str,
+    concurrency: int = DEFAULT_CONCURRENCY,
+    checkpoint_path: Optional[str] = None,
+    id_field: str = "id",
+    text_field: str = "input",
+) -> Dict[str, int]:
+    """
+    Analyze every record of a JSONL file with bounded concurrency.
+
+    Each input line is a JSON object holding `text_field` (the startup description),
+    an optional `id_field` and an optional `session_id`. One output line is appended
+    per record as soon as it finishes:
+      {"id": ..., "line": n, "ok": true, "result": {...}}
+      {"id": ..., "line": n, "ok": false, "error": {...}}   # chain failure dict
+
+    With `checkpoint_path`, a rerun after a crash skips records that already finished.
+    Delivery is at-least-once: a record finished right before a crash may be written twice.
+    """
+    checkpoint = BatchCheckpoint(checkpoint_path)
+    window = max(1, concurrency) * WINDOW_FACTOR
+    queue: asyncio.Queue = asyncio.Queue(maxsize=max(1, concurrency))
+    progress = asyncio.Condition()
+    stats = {"processed": 0, "succeeded": 0, "failed": 0, "skipped": 0}
+
+    out = open(output_path, "a", encoding="utf-8")
+
+    async def finish(index: int, line: Optional[str]) -> None:
+        if line is not None:
+            out.write(line + "\n")
+            out.flush()
+        async with progress:
+            checkpoint.mark_done(index)
+            checkpoint.save()
+            progress.notify_all()
+
+    async def worker() -> None:
+        while True:
+            item = await queue.get()
+            if item is None:
+                return
+            index, record = item
+            record_id = record.get(id_field, index)
+            text = record.get(text_field)
+            if not isinstance(text, str) or not text.strip():
+                ok, result = False, {"error": "invalid_record", "detail": f"missing '{text_field}'"}
+            else:
+                try:
+                    ok, result = await chain.arun(text, session_id=record.get("session_id"))
+                except Exception as e:
+                    logger.exception("Batch record %s raised", record_id)
+                    ok, result = False, {"error": "chain_exception", "detail": str(e)}
+
+            if ok:
+                # Splice the model's own JSON into the envelope instead of dumping a dict.
+                line = (json.dumps({"id": record_id, "line": index, "ok": True})[:-1]
+                        + ', "result": ' + dump_json(result) + "}")
+                stats["succeeded"] += 1
+            else:
+                line = json.dumps({"id": record_id, "line": index, "ok": False, "error": result})
+                stats["failed"] += 1
+            stats["processed"] += 1
+            await finish(index, line)
+
+    async def produce() -> None:
+        with open(input_path, "r", encoding="utf-8") as f:
+            for index, raw_line in enumerate(f):
+                if checkpoint.is_done(index):
+                    stats["skipped"] += 1
+                    continue
+                async with progress:
+                    await progress.wait_for(lambda: index - checkpoint.next_index < window)
+                raw_line = raw_line.strip()
+                if not raw_line:
+                    await finish(index, None)
+                    continue
+                try:
+                    record = json.loads(raw_line)
+                    if not isinstance(record, dict):
+                        raise ValueError("record is not a JSON object")
+                except Exception as e:
+                    stats["processed"] += 1
+                    stats["failed"] += 1
+                    await finish(index, json.dumps({"id": index, "line": index, "ok": False,
+                                                    "error": {"error": "invalid_record", "detail": str(e)}}))
+                    continue
+                await queue.put((index, record))
+        for _ in range(max(1, concurrency)):
+            await queue.put(None)
+
+    # Provider calls made by the workers queue behind interactive traffic (see src/scheduler.py).
+    with scheduling_context("batch", flow=f"batch:{input_path}"):
+        workers = [asyncio.create_task(worker()) for _ in range(max(1, concurrency))]
+    try:
+        await produce()
+        await asyncio.gather(*workers)
+    finally:
+        for w in workers:
+            w.cancel()
+        out.close()
+
+    logger.info("Batch finished %s", stats)
+    return stats
+
+
+def run_batch(chain: DeterministicChain, input_path: str, output_path: str, **kwargs) -> Dict[str, int]:
+    """Blocking wrapper around arun_batch for scripts and workers without an event loop."""
+    return asyncio.run(arun_batch(chain, input_path, output_path, **kwargs))
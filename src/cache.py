@@ -0,0 +1,216 @@
+# src/cache.py
+import asyncio
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Optional, Tuple
+import logging
+
+from .models import LLMClient
+from .utils import validate_output
+
+logger = logging.getLogger(__name__)
+
+# Config
+DEFAULT_MAX_ENTRIES = 1024
+DEFAULT_TTL_SECONDS = 24 * 3600.0
+
+# (raw_output, original_latency_seconds, created_at)
+CacheEntry = Tuple[str, float, float]
+
+
+def cache_key(system: str, user: str, temperature: float, model: str) -> str:
+    """Content address for one generation request."""
+    h = hashlib.sha256()
+    for part in (model, repr(float(temperature)), system, user):
+        h.update(part.encode("utf-8"))
+        h.update(b"\x00")
+    return h.hexdigest()
+
+
+def is_valid_output(raw: str) -> bool:
+    """True if raw parses as JSON and passes validate_output."""
+    try:
+        parsed = json.loads(raw)
+    except Exception:
+        return False
+    ok, _ = validate_output(parsed)
+    return ok
+
+
+class LRUCache:
+    """
+    Thread-safe in-process LRU with a max entry count and a TTL.
+    """
+    def __init__(self, max_entries: int = DEFAULT_MAX_ENTRIES, ttl: Optional[float] = DEFAULT_TTL_SECONDS):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._data: "OrderedDict[str, CacheEntry]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[CacheEntry]:
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return None
+            if self.ttl is not None and time.time() - entry[2] > self.ttl:
+                del self._data[key]
+                return None
+            self._data.move_to_end(key)
+            return entry
+
+    def put(self, key: str, entry: CacheEntry) -> None:
+        with self._lock:
+            self._data[key] = entry
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+
+class SqliteCache:
+    """
+    On-disk cache tier that survives restarts. Expired rows are ignored on read
+    and purged opportunistically on write.
+    """
+    def __init__(self, path: str, ttl: Optional[float] = DEFAULT_TTL_SECONDS):
+        self.path = path
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS llm_cache ("
+            "key TEXT PRIMARY KEY, value TEXT NOT NULL, latency REAL NOT NULL, created REAL NOT NULL)"
+        )
+        self._conn.commit()
+
+    def get(self, key: str) -> Optional[CacheEntry]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value, latency, created FROM llm_cache WHERE key = ?", (key,)
+            ).fetchone()
+        if row is None:
+            return None
+        if self.ttl is not None and time.time() - row[2] > self.ttl:
+            return None
+        return row[0], row[1], row[2]
+
+    def put(self, key: str, entry: CacheEntry) -> None:
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO llm_cache (key, value, latency, created) VALUES (?, ?, ?, ?)",
+                (key, entry[0], entry[1], entry[2]),
+            )
+            if self.ttl is not None:
+                self._conn.execute("DELETE FROM llm_cache WHERE created < ?", (time.time() - self.ttl,))
+            self._conn.commit()
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+class CachingClient(LLMClient):
+    """
+    LLMClient wrapper that serves repeated requests from cache.
+
+    Keys hash (system prompt, user prompt, temperature, model name). Only outputs
+    accepted by `validator` (JSON + validate_output by default) are stored, so
+    retries on bad outputs still reach the provider.
+    """
+    def __init__(
+        self,
+        inner: Any,
+        max_entries: int = DEFAULT_MAX_ENTRIES,
+        ttl: Optional[float] = DEFAULT_TTL_SECONDS,
+        disk_path: Optional[str] = None,
+        model_name: Optional[str] = None,
+        validator: Callable[[str], bool] = is_valid_output,
+    ):
+        self.inner = inner
+        self.model = model_name or getattr(inner, "model", type(inner).__name__)
+        self.memory_tier = LRUCache(max_entries=max_entries, ttl=ttl)
+        self.disk_tier = SqliteCache(disk_path, ttl=ttl) if disk_path else None
+        self.validator = validator
+        self._lock = threading.Lock()
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.stores = 0
+        self.saved_seconds = 0.0
+        logger.debug("CachingClient initialized model=%s disk=%s", self.model, disk_path)
+
+    def _lookup(self, key: str) -> Optional[str]:
+        entry = self.memory_tier.get(key)
+        tier = "memory"
+        if entry is None and self.disk_tier is not None:
+            entry = self.disk_tier.get(key)
+            tier = "disk"
+            if entry is not None:
+                self.memory_tier.put(key, entry)
+        with self._lock:
+            if entry is None:
+                self.misses += 1
+                return None
+            if tier == "memory":
+                self.memory_hits += 1
+            else:
+                self.disk_hits += 1
+            self.saved_seconds += entry[1]
+        logger.debug("Cache hit tier=%s key=%s", tier, key[:12])
+        return entry[0]
+
+    def _store(self, key: str, raw: str, latency: float) -> None:
+        if not isinstance(raw, str) or not self.validator(raw):
+            return
+        entry = (raw, latency, time.time())
+        self.memory_tier.put(key, entry)
+        if self.disk_tier is not None:
+            self.disk_tier.put(key, entry)
+        with self._lock:
+            self.stores += 1
+
+    def generate(self, system: str, user: str, temperature: float = 0.1) -> str:
+        key = cache_key(system, user, temperature, self.model)
+        cached = self._lookup(key)
+        if cached is not None:
+            return cached
+        start = time.perf_counter()
+        raw = self.inner.generate(system=system, user=user, temperature=temperature)
+        self._store(key, raw, time.perf_counter() - start)
+        return raw
+
+    async def agenerate(self, system: str, user: str, temperature: float = 0.1) -> str:
+        key = cache_key(system, user, temperature, self.model)
+        cached = self._lookup(key)
+        if cached is not None:
+            return cached
+        start = time.perf_counter()
+        agenerate = getattr(self.inner, "agenerate", None)
+        if agenerate is not None:
+            raw = await agenerate(system=system, user=user, temperature=temperature)
+        else:
+            raw = await asyncio.to_thread(self.inner.generate, system=system, user=user, temperature=temperature)
+        self._store(key, raw, time.perf_counter() - start)
+        return raw
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            hits = self.memory_hits + self.disk_hits
+            total = hits + self.misses
+            return {
+                "hits": hits,
+                "memory_hits": self.memory_hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "stores": self.stores,
+                "hit_rate": hits / total if total else 0.0,
+                "saved_seconds": self.saved_seconds,
+                "memory_entries": len(self.memory_tier),
+            }
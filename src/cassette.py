@@ -0,0 +1,252 @@
+# src/cassette.py
+"""
+Record and replay LLM traffic for deterministic offline load tests.
+
+RecordingClient wraps any LLMClient and appends one compact JSONL line per
+completion to a cassette: the prompt key (hash of system, user and
+temperature), the observed latency and either the raw output or the
+provider error. ReplayClient memory-maps a cassette, indexes it
+(key -> line offsets) in one pass that reads only the keys, and serves it
+with the original latency scaled by `time_scale` (0 = no waiting). Serving
+a response is one hash, one dict access and decoding one line.
+
+Retries, field-level fixes and section requests have their own prompts and
+so their own keys. Replaying the same inputs through the same chain
+configuration therefore takes the same path as the recording, including
+invalid JSON and retries. When a key was recorded several times, its
+responses are served in recorded order and then repeat.
+"""
+import atexit
+import hashlib
+import itertools
+import json
+import mmap
+import threading
+import time
+from typing import Any, AsyncIterator, Dict, Iterator, List, Optional, Tuple
+import logging
+
+from .models import LLMClient, AsyncLLMClient
+
+logger = logging.getLogger(__name__)
+
+# Config
+MISS_MODES = ("error", "cycle")
+STREAM_CHUNK_CHARS = 16
+KEY_PREFIX = b'{"k":"'
+KEY_END = len(KEY_PREFIX) + 32  # prompt_key is 32 hex characters
+
+
+def prompt_key(system: str, user: str, temperature: float) -> str:
+    h = hashlib.blake2b(digest_size=16)
+    h.update(system.encode("utf-8"))
+    h.update(b"\0")
+    h.update(user.encode("utf-8"))
+    h.update(b"\0")
+    h.update(repr(float(temperature)).encode("ascii"))
+    return h.hexdigest()
+
+
+class CassetteMiss(LookupError):
+    """No recorded response for a prompt (ReplayClient with on_miss="error")."""
+
+
+class ReplayedProviderError(RuntimeError):
+    """A provider error that was captured while recording."""
+
+
+class RecordingClient(LLMClient, AsyncLLMClient):
+    """
+    Pass-through wrapper that appends every completion of `inner` to the
+    cassette at `path`. Lines are flushed as they are written, so a cassette
+    is usable while (or after) a recording process is killed. Streams are
+    recorded when they finish; streams closed early are not recorded.
+    """
+    def __init__(self, inner: Any, path: str):
+        self.inner = inner
+        self.path = path
+        self.recorded = 0
+        self._lock = threading.Lock()
+        self._file = open(path, "a", encoding="utf-8")
+        atexit.register(self.close)
+
+    def _write(self, key: str, latency: float, output: Optional[str] = None,
+               error: Optional[BaseException] = None) -> None:
+        record: Dict[str, Any] = {"k": key, "t": round(latency, 6)}
+        if error is not None:
+            record["e"] = f"{type(error).__name__}: {error}"
+        else:
+            record["o"] = output
+        line = json.dumps(record, ensure_ascii=False, separators=(",", ":")) + "\n"
+        with self._lock:
+            self._file.write(line)
+            self._file.flush()
+            self.recorded += 1
+
+    def generate(self, system: str, user: str, temperature: float = 0.1) -> str:
+        key, t0 = prompt_key(system, user, temperature), time.perf_counter()
+        try:
+            output = self.inner.generate(system=system, user=user, temperature=temperature)
+        except Exception as e:
+            self._write(key, time.perf_counter() - t0, error=e)
+            raise
+        self._write(key, time.perf_counter() - t0, output)
+        return output
+
+    async def agenerate(self, system: str, user: str, temperature: float = 0.1) -> str:
+        key, t0 = prompt_key(system, user, temperature), time.perf_counter()
+        try:
+            if hasattr(self.inner, "agenerate"):
+                output = await self.inner.agenerate(system=system, user=user, temperature=temperature)
+            else:
+                import asyncio  # loaded by the running loop
+                output = await asyncio.to_thread(self.inner.generate, system=system, user=user,
+                                                 temperature=temperature)
+        except Exception as e:
+            self._write(key, time.perf_counter() - t0, error=e)
+            raise
+        self._write(key, time.perf_counter() - t0, output)
+        return output
+
+    def generate_stream(self, system: str, user: str, temperature: float = 0.1) -> Iterator[str]:
+        key, t0 = prompt_key(system, user, temperature), time.perf_counter()
+        chunks: List[str] = []
+        try:
+            for chunk in self.inner.generate_stream(system=system, user=user, temperature=temperature):
+                chunks.append(chunk)
+                yield chunk
+        except Exception as e:
+            self._write(key, time.perf_counter() - t0, error=e)
+            raise
+        self._write(key, time.perf_counter() - t0, "".join(chunks))
+
+    def close(self) -> None:
+        with self._lock:
+            if not self._file.closed:
+                self._file.close()
+        atexit.unregister(self.close)
+
+
+class ReplayClient(LLMClient, AsyncLLMClient):
+    """
+    Serves a recorded cassette. `time_scale` multiplies recorded latencies
+    (1.0 = original timing, 0 = as fast as possible). On a prompt that was
+    never recorded, on_miss="error" raises CassetteMiss; "cycle" serves the
+    cassette's responses in recorded order instead, which replays the
+    production mix of outputs and latencies for new inputs.
+    """
+    def __init__(self, path: str, time_scale: float = 1.0, on_miss: str = "error",
+                 chunk_size: int = STREAM_CHUNK_CHARS):
+        if on_miss not in MISS_MODES:
+            raise ValueError(f"on_miss must be one of {MISS_MODES}")
+        self.path = path
+        self.time_scale = time_scale
+        self.on_miss = on_miss
+        self.chunk_size = chunk_size
+        # key -> (line offsets, counter). Responses stay in the mmapped file and are
+        # decoded when served, so memory and load time grow with the number of lines only.
+        self._index: Dict[str, Tuple[List[int], Iterator[int]]] = {}
+        self._all: List[int] = []
+        self._mm: Optional[mmap.mmap] = None
+        self._load(path)
+        self._all_counter = itertools.count()
+        self.misses = 0
+
+    def _load(self, path: str) -> None:
+        t0 = time.perf_counter()
+        grouped: Dict[str, List[int]] = {}
+        with open(path, "rb") as f:
+            offset = 0
+            for n, line in enumerate(f):
+                # RecordingClient writes '{"k":"<32 hex>",...'; read the key without parsing the line.
+                if line.startswith(KEY_PREFIX) and line[KEY_END:KEY_END + 1] == b'"':
+                    key = line[len(KEY_PREFIX):KEY_END].decode("ascii")
+                elif line.strip():
+                    try:
+                        key = json.loads(line)["k"]
+                    except (ValueError, KeyError, TypeError):
+                        logger.warning("Skipping malformed cassette line %d", n)
+                        key = None
+                else:
+                    key = None
+                if key is not None:
+                    grouped.setdefault(key, []).append(offset)
+                    self._all.append(offset)
+                offset += len(line)
+            if offset:
+                self._mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        # itertools.count is advanced atomically under the GIL, so concurrent callers need no lock.
+        self._index = {key: (offsets, itertools.count()) for key, offsets in grouped.items()}
+        logger.info("Loaded cassette %s: %d responses, %d prompts in %.3fs",
+                    path, len(self._all), len(self._index), time.perf_counter() - t0)
+
+    def __len__(self) -> int:
+        return len(self._all)
+
+    def _response(self, offset: int) -> Tuple[float, Optional[str], Optional[str]]:
+        end = self._mm.find(b"\n", offset)
+        record = json.loads(self._mm[offset:end if end >= 0 else len(self._mm)])
+        return float(record["t"]), record.get("o"), record.get("e")
+
+    def _next(self, system: str, user: str, temperature: float) -> Tuple[float, Optional[str], Optional[str]]:
+        entry = self._index.get(prompt_key(system, user, temperature))
+        if entry is not None:
+            offsets, counter = entry
+            return self._response(offsets[next(counter) % len(offsets)])
+        self.misses += 1
+        if self.on_miss == "error" or not self._all:
+            raise CassetteMiss("no recorded response for this prompt")
+        return self._response(self._all[next(self._all_counter) % len(self._all)])
+
+    def close(self) -> None:
+        if self._mm is not None:
+            self._mm.close()
+            self._mm = None
+
+    def generate(self, system: str, user: str, temperature: float = 0.1) -> str:
+        latency, output, error = self._next(system, user, temperature)
+        if self.time_scale:
+            time.sleep(latency * self.time_scale)
+        if error is not None:
+            raise ReplayedProviderError(error)
+        return output
+
+    async def agenerate(self, system: str, user: str, temperature: float = 0.1) -> str:
+        import asyncio  # loaded by the running loop; kept off the import path of sync users
+        latency, output, error = self._next(system, user, temperature)
+        if self.time_scale:
+            await asyncio.sleep(latency * self.time_scale)
+        if error is not None:
+            raise ReplayedProviderError(error)
+        return output
+
+    def _chunks(self, text: str) -> List[str]:
+        return [text[i:i + self.chunk_size] for i in range(0, len(text), self.chunk_size)] or [""]
+
+    def generate_stream(self, system: str, user: str, temperature: float = 0.1) -> Iterator[str]:
+        latency, output, error = self._next(system, user, temperature)
+        if error is not None:
+            if self.time_scale:
+                time.sleep(latency * self.time_scale)
+            raise ReplayedProviderError(error)
+        chunks = self._chunks(output)
+        for chunk in chunks:
+            if self.time_scale:
+                time.sleep(latency * self.time_scale / len(chunks))
+            yield chunk
+
+    async def agenerate_stream(self, system: str, user: str, temperature: float = 0.1) -> AsyncIterator[str]:
+        import asyncio
+        latency, output, error = self._next(system, user, temperature)
+        if error is not None:
+            if self.time_scale:
+                await asyncio.sleep(latency * self.time_scale)
+            raise ReplayedProviderError(error)
+        chunks = self._chunks(output)
+        for chunk in chunks:
+            if self.time_scale:
+                await asyncio.sleep(latency * self.time_scale / len(chunks))
+            yield chunk
+
+    def stats(self) -> Dict[str, int]:
+        return {"responses": len(self._all), "prompts": len(self._index), "misses": self.misses}
@@ -1,129 +1,871 @@
 # src/chain.py
+# asyncio is imported inside the async methods: it is always loaded by the time they run,
+# and sync-only users (CLI, batch workers) skip its import cost.
+import contextvars
 import json
+import threading
+import hashlib
 import time
-from typing import Tuple, Any, Optional
+import uuid
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Tuple, Any, Callable, Dict, List, Optional
 import logging
 
 logger = logging.getLogger(__name__)
 
-from .prompts.role import ROLE_PROMPT
-from .prompts.behavior import BEHAVIOR_PROMPT
-from .prompts.style import STYLE_PROMPT
-from .prompts.output_format import OUTPUT_FORMAT_PROMPT
+from .prompts.system import SYSTEM_PROMPT, SYSTEM_PROMPT_PARTS, SYSTEM_FINGERPRINT, SECTION_SYSTEM_PROMPT
 
-from .utils import validate_output
+from .utils import validate_output, validate_json, dump_json
 from .models import LLMClient
 from .memory import ShortTermMemory
+from .streaming import StreamingJSONValidator, StreamAbort
+from .repair import load_repaired, coerce_to_schema
+from .field_retry import build_fix_prompts, failing_fields, merge_fix
+from .tokens import TokenEstimator, default_estimator, compact_text
+from .metrics import ChainHooks
+from .coalesce import SingleFlight
+from .sections import SECTIONS, FINAL_SECTION, build_section_prompt, parse_section, error_lines
+from pydantic import ValidationError
 
 # Config
 MAX_RETRIES = 2
 TEMPERATURE = 0.1
+LLM_ERROR_BACKOFF = 0.5  # seconds * attempt after a failed provider call
+RETRY_BACKOFF = 0.2  # seconds * attempt after invalid JSON / failed validation
+MEMORY_ENTRY_MAX_TOKENS = 128  # stored memory entries are compacted to this size
+COMPACT_ENTRY_TOKENS = 48  # older memory entries are compacted to this when over budget
+MIN_INPUT_TOKENS = 64  # the user input is never compacted below this to fit token_budget
+FANOUT_WORKERS = 64  # threads for concurrent section / candidate requests in sync runs
+
+USER_INSTRUCTIONS = "INSTRUCTIONS:\nReturn only the JSON following the schema in the system instructions."
 
 class ChainError(Exception):
     pass
 
 class DeterministicChain:
-    def __init__(self, llm_client: LLMClient, memory: ShortTermMemory, max_retries: int = MAX_RETRIES):
+    def __init__(self, llm_client: LLMClient, memory: ShortTermMemory, max_retries: int = MAX_RETRIES,
+                 stream: bool = False, repair: bool = True, field_retry: bool = True,
+                 token_budget: Optional[int] = None, estimator: Optional[TokenEstimator] = None,
+                 temperature: float = TEMPERATURE, hooks: Optional[ChainHooks] = None,
+                 coalesce: bool = False, backoff: Optional[Any] = None,
+                 dedup: Optional[Any] = None, dedup_mode: str = "return",
+                 results: Optional[Any] = None, sectioned: bool = False,
+                 speculative: Optional[Any] = None):
         self.llm = llm_client
         self.memory = memory
         self.max_retries = max_retries
+        self.temperature = temperature
+        # When set and the client has generate_stream, completions are checked while they
+        # stream and aborted as soon as they cannot become a valid StartupAssessment.
+        self.stream = stream
+        # Local JSON repair (code fences, trailing commas, truncation, field coercion)
+        # before falling back to a re-prompt.
+        self.repair = repair
+        self.repair_counts: Counter = Counter()
+        self._repair_lock = threading.Lock()
+        # On validation failure, re-ask only for the failing fields instead of the whole assessment.
+        self.field_retry = field_retry
+        # Max estimated input tokens (system + memory + user input) per request; None = unbounded.
+        self.token_budget = token_budget
+        self.estimator = estimator or default_estimator()
+        self._system_tokens: Optional[int] = None
+        if token_budget is not None:
+            needed = self._system_token_count() + self._scaffold_tokens() + MIN_INPUT_TOKENS
+            if token_budget < needed:
+                raise ValueError(f"token_budget={token_budget} cannot fit the system prompt and a "
+                                 f"{MIN_INPUT_TOKENS}-token input; need at least {needed}")
+        # Identifies the exact system prompt sent (src/prompts/system.py); it is built once
+        # at import, so every request shares the same cacheable prefix.
+        self.system_fingerprint = SYSTEM_FINGERPRINT
+        # Stage timings, attempt/outcome counters and spans (see src/metrics.py); None = off.
+        self.hooks = hooks
+        # Concurrent runs with byte-identical prompts share one generation + validation.
+        self.coalesce = coalesce
+        self._flight = SingleFlight()
+        # Object with delay(attempt, error_kind) -> seconds (e.g. routing.AdaptiveBackoff);
+        # None = linear LLM_ERROR_BACKOFF / RETRY_BACKOFF.
+        self.backoff = backoff
+        # Near-duplicate index (src/dedup.py) of earlier validated inputs. On a hit,
+        # "return" reuses the stored assessment; "seed" adds it to the prompt as a reference.
+        if dedup_mode not in ("return", "seed"):
+            raise ValueError("dedup_mode must be 'return' or 'seed'")
+        self.dedup = dedup
+        self.dedup_mode = dedup_mode
+        # Results store (src/results.py); every validated assessment is appended to it.
+        self.results = results
+        # Generate the assessment as concurrent per-section requests (src/sections.py) merged
+        # into one StartupAssessment; a failing section is retried on its own.
+        self.sectioned = sectioned
+        # SpeculationPolicy (src/speculative.py): each full attempt requests policy.n()
+        # candidates and keeps the first valid one. None = one completion per attempt.
+        self.speculative = speculative
+        self._fanout_pool: Optional[ThreadPoolExecutor] = None
+        self._fanout_lock = threading.Lock()
         logger.debug("DeterministicChain initialized max_retries=%d", max_retries)
 
     def _build_system_prompt(self) -> str:
-        parts = [
-            "SYSTEM: Begin system instructions.",
-            ROLE_PROMPT.strip(),
-            BEHAVIOR_PROMPT.strip(),
-            STYLE_PROMPT.strip(),
-            OUTPUT_FORMAT_PROMPT.strip(),
-            "SYSTEM: End system instructions."
-        ]
-        system_prompt = "\n\n".join(parts)
-        logger.debug("System prompt length=%d", len(system_prompt))
-        return system_prompt
+        return SYSTEM_PROMPT
+
+    def _user_prompt_parts(self, user_input: str, session_id: Optional[str] = None) -> Tuple[str, str]:
+        """(memory block, input block) of the user prompt, after the token budget is applied."""
+        mem_entries = self.memory.get_recent(session_id) if session_id else []
+        if self.token_budget is not None:
+            user_input, mem_entries = self._fit_budget(user_input, mem_entries)
 
-    def _build_user_prompt(self, user_input: str, session_id: Optional[str] = None) -> str:
         mem_text = ""
-        if session_id:
-            mem_entries = self.memory.get_recent(session_id)
-            if mem_entries:
-                mem_text = "RECENT_CONVERSATION:\n" + "\n".join(f"- {m}" for m in mem_entries) + "\n\n"
-
-        user_block = (
-            f"USER_INPUT:\n{user_input}\n\n"
-            "INSTRUCTIONS:\nReturn only the JSON following the schema in the system instructions."
-        )
-        prompt = mem_text + user_block
+        if mem_entries:
+            mem_text = "RECENT_CONVERSATION:\n" + "\n".join(f"- {m}" for m in mem_entries) + "\n\n"
+        return mem_text, f"USER_INPUT:\n{user_input}\n\n"
+
+    def _build_user_prompt(self, user_input: str, session_id: Optional[str] = None) -> str:
+        mem_text, input_block = self._user_prompt_parts(user_input, session_id)
+        prompt = mem_text + input_block + USER_INSTRUCTIONS
         logger.debug("User prompt length=%d", len(prompt))
         return prompt
 
-    def run(self, user_input: str, session_id: Optional[str] = None) -> Tuple[bool, Any]:
-        logger.info("DeterministicChain.run called session_id=%s", session_id)
+    def _scaffold_tokens(self) -> int:
+        # Fixed scaffolding of the user block (headers + instructions).
+        return self.estimator.count("USER_INPUT:\n\n\n" + USER_INSTRUCTIONS)
+
+    def _system_token_count(self) -> int:
+        if self._system_tokens is None:
+            self._system_tokens = self.estimator.count(SYSTEM_PROMPT)
+        return self._system_tokens
+
+    def prompt_report(self, user_input: str = "", session_id: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Estimated input tokens per prompt section for one request (memory and
+        input after the token budget is applied). The system sections are the
+        same for every request; memory and input are what varies.
+        """
+        est = self.estimator
+        mem_text, input_block = self._user_prompt_parts(user_input, session_id)
+        system = {name: est.count(text.strip()) for name, text in SYSTEM_PROMPT_PARTS}
+        user = {"memory": est.count(mem_text) if mem_text else 0, "user_input": est.count(input_block),
+                "instructions": est.count(USER_INSTRUCTIONS)}
+        system_total = self._system_token_count()
+        return {"system_fingerprint": self.system_fingerprint, "system": system, "system_total": system_total,
+                "user": user, "user_total": sum(user.values()), "total": system_total + sum(user.values())}
+
+    def _fit_budget(self, user_input: str, mem_entries: List[str]) -> Tuple[str, List[str]]:
+        """
+        Keep system + memory + input within token_budget. The input is only cut when it
+        alone exceeds what the system prompt leaves; memory gets the remainder, with
+        older entries compacted first and dropped if still over.
+        """
+        est = self.estimator
+        available = max(self.token_budget - self._system_token_count() - self._scaffold_tokens(), MIN_INPUT_TOKENS)
+        if est.count(user_input) > available:
+            logger.warning("User input exceeds token budget; compacting to %d tokens", available)
+            user_input = compact_text(user_input, available, est)
+        remaining = available - est.count(user_input) - est.count("RECENT_CONVERSATION:\n\n")
+
+        costs = [est.count(f"- {m}\n") for m in mem_entries]
+        if sum(costs) <= remaining:
+            return user_input, mem_entries
+
+        # Compact all but the latest exchange (last two entries), then drop oldest first.
+        entries = list(mem_entries)
+        for i in range(max(len(entries) - 2, 0)):
+            entries[i] = compact_text(entries[i], COMPACT_ENTRY_TOKENS, est)
+        costs = [est.count(f"- {m}\n") for m in entries]
+        while entries and sum(costs) > remaining:
+            if len(entries) == 1:
+                entries[0] = compact_text(entries[0], max(remaining - est.count("- \n"), 0), est)
+                if not entries[0]:
+                    entries.pop()
+                break
+            entries.pop(0)
+            costs.pop(0)
+        logger.debug("Memory compacted from %d to %d entries to fit budget", len(mem_entries), len(entries))
+        return user_input, entries
+
+    def _stage(self, state: Optional["_RunState"], stage: str, t0: float) -> None:
+        if self.hooks is not None and state is not None:
+            self.hooks.on_stage(state, stage, time.perf_counter() - t0)
+
+    def _parse_and_validate(self, raw: str, attempt: int, base: Optional[dict] = None,
+                            fix_keys: Optional[List[str]] = None,
+                            state: Optional["_RunState"] = None) -> Tuple[Optional[str], Any, Any]:
+        """
+        Parse and validate one raw completion.
+
+        Returns (None, StartupAssessment, parsed) on success, otherwise
+        (error_kind, detail, parsed) where error_kind is "invalid_json" or
+        "validation_failed". With `base`, the completion is a field-level fix whose
+        `fix_keys` are merged into `base` before validation.
+        """
+        if base is None and isinstance(raw, (str, bytes)):
+            # Fast path: validate straight from the JSON text, no intermediate dict.
+            # With repair on, only canonical output qualifies; anything coerce_to_schema
+            # would fix falls through so it is repaired (and counted) as before.
+            t0 = time.perf_counter()
+            ok, model_or_err = validate_json(raw, canonical=self.repair)
+            self._stage(state, "validate_json", t0)
+            if ok:
+                logger.info("Validation succeeded")
+                return None, model_or_err, None
+
+        repairs = []
+        t0 = time.perf_counter()
+        try:
+            parsed = json.loads(raw)
+            logger.debug("JSON parsing succeeded")
+        except Exception as e:
+            logger.warning("JSON parsing failed on attempt %d: %s", attempt, e)
+            if not self.repair:
+                self._stage(state, "parse", t0)
+                return "invalid_json", e, None
+            parsed, repairs = load_repaired(raw)
+            self._stage(state, "parse", t0)
+            if parsed is None:
+                logger.warning("JSON repair failed on attempt %d: tried %s", attempt, repairs)
+                return "invalid_json", e, None
+        else:
+            self._stage(state, "parse", t0)
+
+        if base is not None:
+            if not isinstance(parsed, dict):
+                return "invalid_json", ValueError("field fix is not a JSON object"), None
+            parsed = merge_fix(base, parsed, fix_keys or [])
+
+        if self.repair:
+            t0 = time.perf_counter()
+            parsed, coerced = coerce_to_schema(parsed)
+            repairs.extend(coerced)
+            self._stage(state, "repair", t0)
+
+        t0 = time.perf_counter()
+        ok, model_or_err = validate_output(parsed)
+        self._stage(state, "validate", t0)
+        if ok:
+            logger.info("Validation succeeded")
+            if repairs:
+                self._record_repairs(repairs, state)
+            return None, model_or_err, parsed
+        logger.warning("Validation failed: %s", model_or_err)
+        return "validation_failed", model_or_err, parsed
+
+    def _record_repairs(self, repairs, state: Optional["_RunState"] = None) -> None:
+        logger.info("Output repaired locally: %s", repairs)
+        with self._repair_lock:
+            self.repair_counts.update(r.split(":", 1)[0] for r in repairs)
+        if self.hooks is not None and state is not None:
+            self.hooks.on_repair(state, repairs)
+
+    @staticmethod
+    def _retry_prompt(error_kind: str, user_prompt: str) -> str:
+        if error_kind == "invalid_json":
+            prefix = (
+                "Return STRICT JSON matching the schema from system instructions. "
+                "Do not include any explanation or commentary—only the JSON object.\n\n"
+            )
+        else:
+            prefix = (
+                "Validation failed. Return STRICT JSON matching the schema exactly. "
+                "Do not include any text outside the JSON object.\n\n"
+            )
+        return prefix + user_prompt
+
+    @staticmethod
+    def _failure(error_kind: str, raw: str, detail: Any) -> dict:
+        if error_kind == "invalid_json":
+            return {"error": "invalid_json", "raw": raw, "detail": str(detail)}
+        return {"error": "validation_failed", "validation": str(detail), "raw": raw}
+
+    def _remember(self, session_id: Optional[str], user_input: str, model: Any) -> None:
+        if not session_id:
+            return
+        summary = model.summary if isinstance(getattr(model, "summary", ""), str) else ""
+        # Store compacted entries so long pasted inputs don't inflate later prompts.
+        self.memory.add(session_id, f"USER: {compact_text(user_input, MEMORY_ENTRY_MAX_TOKENS, self.estimator)}")
+        self.memory.add(session_id, f"ASSISTANT_SUMMARY: {compact_text(summary, MEMORY_ENTRY_MAX_TOKENS, self.estimator)}")
+
+    # --- attempt loop shared by run and arun ---------------------------
+
+    def _start(self, user_input: str, session_id: Optional[str], request_id: Optional[str] = None) -> "_RunState":
         logger.debug("User input len=%d", len(user_input or ""))
-        system_prompt = self._build_system_prompt()
-        user_prompt = self._build_user_prompt(user_input, session_id)
+        t0 = time.perf_counter()
+        state = _RunState(
+            user_input=user_input,
+            session_id=session_id,
+            system_prompt=self._build_system_prompt(),
+            user_prompt=self._build_user_prompt(user_input, session_id),
+            request_id=request_id,
+        )
+        if self.hooks is not None:
+            state.started = t0
+            state.prompt_tokens = self._system_token_count() + self.estimator.count(state.user_prompt)
+            self.hooks.on_request_start(state)
+            self._stage(state, "prompt_build", t0)
+        return state
+
+    def _finish(self, state: "_RunState", result: Tuple[bool, Any]) -> Tuple[bool, Any]:
+        if self.hooks is not None:
+            ok, payload = result
+            outcome = "success" if ok else payload.get("error", "unknown")
+            self.hooks.on_request_end(state, outcome, time.perf_counter() - state.started)
+        return result
+
+    def _next_prompts(self, state: "_RunState") -> Tuple[str, str]:
+        state.attempt += 1
+        logger.info("LLM attempt %d/%d", state.attempt, self.max_retries + 1)
+        if state.fix is not None:
+            system, user, keys = build_fix_prompts(*state.fix)
+            if keys:
+                logger.info("Field-level retry for %s", keys)
+                state.fix_keys = keys
+                return system, user
+            state.fix = None
+            state.user_prompt = self._retry_prompt("validation_failed", state.user_prompt)
+        state.fix_keys = None
+        return state.system_prompt, state.user_prompt
+
+    def _on_llm_error(self, state: "_RunState", e: Exception) -> Optional[Tuple[bool, Any]]:
+        state.last_raw_output = f"LLM generation error: {str(e)}"
+        logger.exception("LLM generation error on attempt %d", state.attempt)
+        if self.hooks is not None:
+            self.hooks.on_attempt_end(state, "llm_call_failed")
+        if state.attempt <= self.max_retries:
+            state.delay = self._backoff(state.attempt, "llm_call_failed")
+            return None
+        return False, {"error": "llm_call_failed", "detail": str(e), "attempt": state.attempt}
+
+    def _on_output(self, state: "_RunState", raw: str, aborted: Optional[StreamAbort],
+                   checked: Optional[Tuple[Optional[str], Any, Any]] = None) -> Optional[Tuple[bool, Any]]:
+        """
+        Returns the final (ok, result) or None when another attempt should follow after state.delay.
+        `checked` is a _parse_and_validate result already computed for `raw` (speculative mode).
+        """
+        state.last_raw_output = raw
+        logger.debug("Raw LLM output len=%d", len(raw or ""))
+
+        parsed = None
+        if aborted is not None:
+            error_kind, model_or_err = aborted.kind, aborted
+        elif checked is not None:
+            error_kind, model_or_err, parsed = checked
+        else:
+            base = state.fix[0] if state.fix_keys else None
+            error_kind, model_or_err, parsed = self._parse_and_validate(raw, state.attempt, base, state.fix_keys, state)
+        if self.hooks is not None:
+            self.hooks.on_attempt_end(state, error_kind)
+        if error_kind is None:
+            return True, model_or_err
+        if state.attempt > self.max_retries:
+            return False, self._failure(error_kind, raw, model_or_err)
+
+        state.delay = self._backoff(state.attempt, error_kind)
+        if error_kind == "validation_failed" and self.field_retry and isinstance(parsed, dict) \
+                and isinstance(model_or_err, ValidationError) and failing_fields(model_or_err):
+            # Re-ask only for the failing fields of the latest merged output.
+            state.fix = (parsed, model_or_err)
+        elif state.fix is None:
+            state.user_prompt = self._retry_prompt(error_kind, state.user_prompt)
+        # else: the fix reply itself was unusable; ask for the same fields again.
+        return None
+
+    def _backoff(self, attempt: int, error_kind: str) -> float:
+        if self.backoff is not None:
+            return self.backoff.delay(attempt, error_kind)
+        return (LLM_ERROR_BACKOFF if error_kind == "llm_call_failed" else RETRY_BACKOFF) * attempt
+
+    def _exhausted(self, state: "_RunState") -> Tuple[bool, Any]:
+        logger.error("Exceeded max retries; last_raw_output present=%s", state.last_raw_output is not None)
+        return False, {"error": "exceeded_retries", "last_output": state.last_raw_output}
+
+    def _flight_key(self, state: "_RunState") -> str:
+        h = hashlib.sha256()
+        for part in (state.system_prompt, state.user_prompt, repr(self.temperature)):
+            h.update(part.encode("utf-8"))
+            h.update(b"\0")
+        return h.hexdigest()
+
+    def _reuse(self, state: "_RunState") -> Optional[Tuple[bool, Any]]:
+        """Check the near-duplicate index; returns a final result in "return" mode on a hit."""
+        if self.dedup is None or not self.dedup.indexable(state.user_input):
+            return None
+        t0 = time.perf_counter()
+        hit = self.dedup.lookup(state.user_input)
+        self._stage(state, "dedup_lookup", t0)
+        if hit is None:
+            return None
+        similarity, stored, entry_id = hit
+        ok, model = validate_json(stored)
+        if not ok:
+            logger.warning("Stored assessment %s no longer validates; ignoring", entry_id)
+            return None
+        state.reused_from = entry_id
+        if self.dedup_mode == "return":
+            logger.info("Reusing assessment %s (similarity %.2f)", entry_id, similarity)
+            return True, model
+        logger.info("Seeding prompt with assessment %s (similarity %.2f)", entry_id, similarity)
+        state.user_prompt = (
+            f"REFERENCE_ASSESSMENT (for a {similarity:.0%} similar earlier input; "
+            f"correct anything that differs for this input):\n{stored}\n\n" + state.user_prompt
+        )
+        return None
+
+    def _complete(self, state: "_RunState", result: Tuple[bool, Any]) -> Tuple[bool, Any]:
+        # Memory is written per caller, so coalesced runs still update every session; the
+        # dedup index and results store get one entry per generation, written by the leader.
+        if result[0]:
+            self._remember(state.session_id, state.user_input, result[1])
+            if state.coalesced:
+                return self._finish(state, result)
+            if (self.dedup is not None and (state.reused_from is None or self.dedup_mode == "seed")
+                    and self.dedup.indexable(state.user_input)):
+                self.dedup.add(state.user_input, dump_json(result[1]))
+            if self.results is not None:
+                self.results.add(result[1], session_id=state.session_id,
+                                 model_name=getattr(self.llm, "model", None), result_id=state.request_id)
+        return self._finish(state, result)
+
+    def _stream_validator(self, on_field: Optional[Callable[[str, Any], None]]) -> StreamingJSONValidator:
+        # With repair on, defects src/repair.py can fix are let through instead of aborting.
+        return StreamingJSONValidator(on_field=on_field, repairable=self.repair)
+
+    def _generate_streaming(self, system: str, user: str,
+                            on_field: Optional[Callable[[str, Any], None]]) -> Tuple[str, Optional[StreamAbort]]:
+        validator = self._stream_validator(on_field)
+        stream = self.llm.generate_stream(system=system, user=user, temperature=self.temperature)
+        try:
+            for chunk in stream:
+                validator.feed(chunk)
+                if validator.done:
+                    break
+            validator.close()
+        except StreamAbort as e:
+            logger.warning("Stream aborted after %d chars: %s", len(validator.text), e)
+            return validator.text, e
+        finally:
+            close = getattr(stream, "close", None)
+            if close is not None:
+                close()
+        return validator.text, None
+
+    def _generate(self, system: str, user: str,
+                  on_field: Optional[Callable[[str, Any], None]]) -> Tuple[str, Optional[StreamAbort]]:
+        if self.stream and hasattr(self.llm, "generate_stream"):
+            return self._generate_streaming(system, user, on_field)
+        return self.llm.generate(system=system, user=user, temperature=self.temperature), None
+
+    def run(self, user_input: str, session_id: Optional[str] = None,
+            on_field: Optional[Callable[[str, Any], None]] = None,
+            request_id: Optional[str] = None) -> Tuple[bool, Any]:
+        """
+        Generate, parse and validate an assessment, retrying up to max_retries times.
+        With streaming enabled, `on_field(name, value)` receives each top-level field
+        as soon as it is complete (before validation of the whole object).
+        With `coalesce`, concurrent calls without `on_field` whose prompts are
+        identical share one attempt loop; each caller still updates its own session.
+        `request_id` (default: random) tags hooks and is the id of the stored result.
+        """
+        logger.info("DeterministicChain.run called session_id=%s", session_id)
+        state = self._start(user_input, session_id, request_id)
+        reused = self._reuse(state)
+        if reused is not None:
+            return self._complete(state, reused)
+        if self.coalesce and on_field is None:
+            result, shared = self._flight.do(self._flight_key(state), lambda: self._attempts(state, None))
+            if shared:
+                result = _copy_result(result)
+                state.coalesced = True
+        else:
+            result = self._attempts(state, on_field)
+        return self._complete(state, result)
 
-        attempt = 0
-        last_raw_output = None
+    def _attempts(self, state: "_RunState", on_field: Optional[Callable[[str, Any], None]]) -> Tuple[bool, Any]:
+        if self.sectioned:
+            return self._sectioned(state)
+        return self._whole_attempts(state, on_field)
 
-        while attempt <= self.max_retries:
-            attempt += 1
-            logger.info("LLM attempt %d/%d", attempt, self.max_retries + 1)
+    def _whole_attempts(self, state: "_RunState",
+                        on_field: Optional[Callable[[str, Any], None]]) -> Tuple[bool, Any]:
+        while state.attempt <= self.max_retries:
+            system, user = self._next_prompts(state)
+            t0 = time.perf_counter()
+            checked = None
             try:
-                raw = self.llm.generate(
-                    system=system_prompt,
-                    user=user_prompt,
-                    temperature=TEMPERATURE
-                )
+                if self.speculative is not None and state.fix_keys is None:
+                    (raw, checked), aborted = self._speculate(state, system, user), None
+                else:
+                    raw, aborted = self._generate(system, user, on_field if state.fix_keys is None else None)
             except Exception as e:
-                last_raw_output = f"LLM generation error: {str(e)}"
-                logger.exception("LLM generation error on attempt %d", attempt)
-                if attempt <= self.max_retries:
-                    time.sleep(0.5 * attempt)
-                    continue
-                return False, {"error": "llm_call_failed", "detail": str(e), "attempt": attempt}
+                self._stage(state, "generate", t0)
+                result = self._on_llm_error(state, e)
+            else:
+                self._stage(state, "generate", t0)
+                result = self._on_output(state, raw, aborted, checked)
+            if result is not None:
+                return result
+            time.sleep(state.delay)
+        return self._exhausted(state)
+
+    async def _agenerate_streaming(self, system: str, user: str,
+                                   on_field: Optional[Callable[[str, Any], None]]) -> Tuple[str, Optional[StreamAbort]]:
+        validator = self._stream_validator(on_field)
+        stream = self.llm.agenerate_stream(system=system, user=user, temperature=self.temperature)
+        try:
+            async for chunk in stream:
+                validator.feed(chunk)
+                if validator.done:
+                    break
+            validator.close()
+        except StreamAbort as e:
+            logger.warning("Stream aborted after %d chars: %s", len(validator.text), e)
+            return validator.text, e
+        finally:
+            await stream.aclose()
+        return validator.text, None
+
+    async def _agenerate(self, system: str, user: str,
+                         on_field: Optional[Callable[[str, Any], None]]) -> Tuple[str, Optional[StreamAbort]]:
+        if self.stream and hasattr(self.llm, "agenerate_stream"):
+            return await self._agenerate_streaming(system, user, on_field)
+        return await self._acomplete(system, user), None
 
-            last_raw_output = raw
-            logger.debug("Raw LLM output len=%d", len(raw or ""))
+    async def _acomplete(self, system: str, user: str, temperature: Optional[float] = None) -> str:
+        import asyncio
+        temperature = self.temperature if temperature is None else temperature
+        agenerate = getattr(self.llm, "agenerate", None)
+        if agenerate is not None:
+            return await agenerate(system=system, user=user, temperature=temperature)
+        # Blocking client: keep the event loop free by running it on a worker thread.
+        return await asyncio.to_thread(self.llm.generate, system=system, user=user, temperature=temperature)
 
-            # Try parse JSON
+    async def arun(self, user_input: str, session_id: Optional[str] = None,
+                   on_field: Optional[Callable[[str, Any], None]] = None,
+                   request_id: Optional[str] = None) -> Tuple[bool, Any]:
+        """
+        Coroutine version of `run` with the same retry/parse/validate semantics.
+        Backoff uses asyncio.sleep so no thread is held between attempts.
+        """
+        logger.info("DeterministicChain.arun called session_id=%s", session_id)
+        state = self._start(user_input, session_id, request_id)
+        reused = self._reuse(state)
+        if reused is not None:
+            return self._complete(state, reused)
+        if self.coalesce and on_field is None:
+            result, shared = await self._flight.ado(self._flight_key(state), lambda: self._aattempts(state, None))
+            if shared:
+                result = _copy_result(result)
+                state.coalesced = True
+        else:
+            result = await self._aattempts(state, on_field)
+        return self._complete(state, result)
+
+    async def _aattempts(self, state: "_RunState",
+                         on_field: Optional[Callable[[str, Any], None]]) -> Tuple[bool, Any]:
+        if self.sectioned:
+            return await self._asectioned(state)
+        return await self._awhole_attempts(state, on_field)
+
+    async def _awhole_attempts(self, state: "_RunState",
+                               on_field: Optional[Callable[[str, Any], None]]) -> Tuple[bool, Any]:
+        import asyncio
+        while state.attempt <= self.max_retries:
+            system, user = self._next_prompts(state)
+            t0 = time.perf_counter()
+            checked = None
             try:
-                parsed = json.loads(raw)
-                logger.debug("JSON parsing succeeded")
+                if self.speculative is not None and state.fix_keys is None:
+                    (raw, checked), aborted = await self._aspeculate(state, system, user), None
+                else:
+                    raw, aborted = await self._agenerate(system, user, on_field if state.fix_keys is None else None)
             except Exception as e:
-                logger.warning("JSON parsing failed on attempt %d: %s", attempt, e)
-                if attempt <= self.max_retries:
-                    user_prompt = (
-                        "Return STRICT JSON matching the schema from system instructions. "
-                        "Do not include any explanation or commentary—only the JSON object.\n\n"
-                        + user_prompt
-                    )
-                    time.sleep(0.2 * attempt)
+                self._stage(state, "generate", t0)
+                result = self._on_llm_error(state, e)
+            else:
+                self._stage(state, "generate", t0)
+                result = self._on_output(state, raw, aborted, checked)
+            if result is not None:
+                return result
+            await asyncio.sleep(state.delay)
+        return self._exhausted(state)
+
+
+    # --- speculative candidates shared by run and arun ------------------
+
+    def _check_candidate(self, state: "_RunState", raw: str) -> Tuple[Optional[str], Any, Any]:
+        checked = self._parse_and_validate(raw, state.attempt, state=state)
+        self.speculative.record(checked[0] is None)
+        return checked
+
+    @staticmethod
+    def _pick_failure(failures: List[Tuple[str, Tuple[Optional[str], Any, Any]]],
+                      errors: List[Exception]) -> Tuple[str, Tuple[Optional[str], Any, Any]]:
+        if not failures:
+            raise errors[-1]
+        # Prefer a candidate that parsed: its failing fields can be fixed with a field-level retry.
+        for raw, checked in failures:
+            if checked[2] is not None:
+                return raw, checked
+        return failures[-1]
+
+    def _speculation_failed(self, n: int, failures: List[Tuple[str, Tuple[Optional[str], Any, Any]]],
+                            errors: List[Exception]) -> Tuple[str, Tuple[Optional[str], Any, Any]]:
+        # Only attempts whose candidates came back invalid say anything about correlation.
+        if failures:
+            self.speculative.record_attempt(n, False)
+        return self._pick_failure(failures, errors)
+
+    def _speculate(self, state: "_RunState", system: str, user: str) -> Tuple[str, Tuple[Optional[str], Any, Any]]:
+        """
+        Request n candidates and return (raw, checked) for the first that validates, else for
+        one that failed. Raises the provider error only when every candidate call failed.
+        Candidates are sampled at spread temperatures so their failures are less correlated.
+        """
+        policy = self.speculative
+        n = policy.n()
+        temperatures = policy.temperatures(self.temperature, n)
+        failures: List[Tuple[str, Tuple[Optional[str], Any, Any]]] = []
+        errors: List[Exception] = []
+        generate_n = getattr(self.llm, "generate_n", None)
+        if generate_n is not None:
+            # One request with n choices (e.g. the OpenAI `n` parameter) has one temperature.
+            temperature = sum(temperatures) / n
+            for raw in generate_n(system=system, user=user, n=n, temperature=temperature):
+                checked = self._check_candidate(state, raw)
+                if checked[0] is None:
+                    policy.record_attempt(n, True)
+                    return raw, checked
+                failures.append((raw, checked))
+            return self._speculation_failed(n, failures, errors)
+
+        pool = self._fanout_executor()
+        futures = [pool.submit(contextvars.copy_context().run, self.llm.generate,
+                               system=system, user=user, temperature=t) for t in temperatures]
+        try:
+            for future in as_completed(futures):
+                try:
+                    raw = future.result()
+                except Exception as e:
+                    errors.append(e)
                     continue
-                else:
-                    return False, {"error": "invalid_json", "raw": raw, "detail": str(e)}
+                checked = self._check_candidate(state, raw)
+                if checked[0] is None:
+                    logger.debug("Candidate accepted after %d failed of %d", len(failures) + len(errors), n)
+                    policy.record_attempt(n, True)
+                    return raw, checked
+                failures.append((raw, checked))
+        finally:
+            # Calls that have not started are dropped; running ones finish on the pool and are ignored.
+            for future in futures:
+                future.cancel()
+        return self._speculation_failed(n, failures, errors)
 
-            # Validate parsed JSON against pydantic schema
-            ok, model_or_err = validate_output(parsed)
-            if ok:
-                logger.info("Validation succeeded")
-                summary = parsed.get("summary", "") if isinstance(parsed.get("summary", ""), str) else ""
-                if session_id:
-                    self.memory.add(session_id, f"USER: {user_input}")
-                    self.memory.add(session_id, f"ASSISTANT_SUMMARY: {summary}")
-                return True, model_or_err
-            else:
-                logger.warning("Validation failed: %s", model_or_err)
-                if attempt <= self.max_retries:
-                    user_prompt = (
-                        "Validation failed. Return STRICT JSON matching the schema exactly. "
-                        "Do not include any text outside the JSON object.\n\n"
-                        + user_prompt
-                    )
-                    time.sleep(0.2 * attempt)
+    async def _aspeculate(self, state: "_RunState", system: str,
+                          user: str) -> Tuple[str, Tuple[Optional[str], Any, Any]]:
+        import asyncio
+        policy = self.speculative
+        n = policy.n()
+        temperatures = policy.temperatures(self.temperature, n)
+        failures: List[Tuple[str, Tuple[Optional[str], Any, Any]]] = []
+        errors: List[Exception] = []
+        agenerate_n = getattr(self.llm, "agenerate_n", None)
+        if agenerate_n is not None:
+            for raw in await agenerate_n(system=system, user=user, n=n, temperature=sum(temperatures) / n):
+                checked = self._check_candidate(state, raw)
+                if checked[0] is None:
+                    policy.record_attempt(n, True)
+                    return raw, checked
+                failures.append((raw, checked))
+            return self._speculation_failed(n, failures, errors)
+
+        tasks = [asyncio.ensure_future(self._acomplete(system, user, t)) for t in temperatures]
+        try:
+            for next_done in asyncio.as_completed(tasks):
+                try:
+                    raw = await next_done
+                except Exception as e:
+                    errors.append(e)
                     continue
-                else:
-                    return False, {"error": "validation_failed", "validation": str(model_or_err), "raw": raw}
+                checked = self._check_candidate(state, raw)
+                if checked[0] is None:
+                    logger.debug("Candidate accepted after %d failed of %d", len(failures) + len(errors), n)
+                    policy.record_attempt(n, True)
+                    return raw, checked
+                failures.append((raw, checked))
+        finally:
+            for task in tasks:
+                task.cancel()
+        return self._speculation_failed(n, failures, errors)
+
+    # --- sectioned generation shared by run and arun --------------------
+
+    def _build_section_system_prompt(self) -> str:
+        return SECTION_SYSTEM_PROMPT
+
+    @staticmethod
+    def _section_base(state: "_RunState") -> str:
+        # Memory and input block of the request without the whole-assessment instructions.
+        prompt = state.user_prompt
+        return prompt[:-len(USER_INSTRUCTIONS)] if prompt.endswith(USER_INSTRUCTIONS) else prompt
+
+    def _on_section_output(self, state: "_RunState", name: str, attempt: int, error_kind: Optional[str],
+                           detail: Any, raw: str) -> Tuple[Optional[Tuple[Optional[dict], Optional[dict]]],
+                                                           float, Optional[List[str]]]:
+        """
+        Returns (final, delay, retry_errors). `final` is (fields, None) on success or
+        (None, failure) once the section is out of attempts; otherwise None and the
+        section is retried after `delay` with `retry_errors` in its prompt.
+        """
+        if self.hooks is not None:
+            self.hooks.on_attempt_end(state, error_kind)
+        if error_kind is None:
+            return (detail, None), 0.0, None
+        logger.warning("Section %s attempt %d failed: %s", name, attempt, error_kind)
+        if attempt > self.max_retries:
+            if error_kind == "llm_call_failed":
+                failure = {"error": "llm_call_failed", "detail": str(detail), "attempt": attempt}
+            else:
+                failure = self._failure(error_kind, raw, detail)
+            failure["section"] = name
+            return (None, failure), 0.0, None
+        retry_errors = None if error_kind == "llm_call_failed" else error_lines(detail)
+        return None, self._backoff(attempt, error_kind), retry_errors
+
+    def _section_attempts(self, state: "_RunState", name: str, keys: Tuple[str, ...],
+                          context: Optional[Dict[str, Any]] = None,
+                          errors: Optional[List[str]] = None) -> Tuple[Optional[dict], Optional[dict]]:
+        system, base = self._build_section_system_prompt(), self._section_base(state)
+        for attempt in range(1, self.max_retries + 2):
+            user = build_section_prompt(base, keys, context, errors)
+            t0 = time.perf_counter()
+            raw = ""
+            try:
+                raw = self.llm.generate(system=system, user=user, temperature=self.temperature)
+            except Exception as e:
+                error_kind, detail = "llm_call_failed", e
+            else:
+                error_kind, detail = parse_section(raw, keys, self.repair)
+            self._stage(state, f"section_{name}", t0)
+            final, delay, errors = self._on_section_output(state, name, attempt, error_kind, detail, raw)
+            if final is not None:
+                return final
+            time.sleep(delay)
+        raise AssertionError("unreachable")
+
+    async def _asection_attempts(self, state: "_RunState", name: str, keys: Tuple[str, ...],
+                                 context: Optional[Dict[str, Any]] = None,
+                                 errors: Optional[List[str]] = None) -> Tuple[Optional[dict], Optional[dict]]:
+        import asyncio
+        system, base = self._build_section_system_prompt(), self._section_base(state)
+        for attempt in range(1, self.max_retries + 2):
+            user = build_section_prompt(base, keys, context, errors)
+            t0 = time.perf_counter()
+            raw = ""
+            try:
+                raw = await self._acomplete(system, user)
+            except Exception as e:
+                error_kind, detail = "llm_call_failed", e
+            else:
+                error_kind, detail = parse_section(raw, keys, self.repair)
+            self._stage(state, f"section_{name}", t0)
+            final, delay, errors = self._on_section_output(state, name, attempt, error_kind, detail, raw)
+            if final is not None:
+                return final
+            await asyncio.sleep(delay)
+        raise AssertionError("unreachable")
+
+    @staticmethod
+    def _collect_sections(parts: List[Tuple[Optional[dict], Optional[dict]]],
+                          fields: Dict[str, Any]) -> Optional[Tuple[bool, Any]]:
+        """Merge section fields into `fields`; returns the first section failure, if any."""
+        for section_fields, failure in parts:
+            if failure is not None:
+                return False, failure
+            fields.update(section_fields)
+        return None
+
+    def _check_merged(self, fields: Dict[str, Any],
+                      final: bool = False) -> Tuple[Optional[Tuple[bool, Any]], List[Tuple[str, Tuple[str, ...], List[str]]]]:
+        """
+        Validate the merged assessment. Returns (result, []) when done, or (None, redo)
+        where redo lists (section, keys, error lines) for the independent sections that
+        failed a whole-model check their sub-model does not cover (e.g. an empty summary).
+        """
+        ok, model_or_err = validate_output(fields)
+        if ok:
+            return (True, model_or_err), []
+        failing = failing_fields(model_or_err)
+        redo = [(name, keys, [line for k in keys for line in failing.get(k, [])])
+                for name, keys in SECTIONS if any(k in failing for k in keys)]
+        if final or not redo:
+            return (False, self._failure("validation_failed", json.dumps(fields, default=str), model_or_err)), []
+        logger.info("Merged assessment failed validation; regenerating sections %s", [r[0] for r in redo])
+        return None, redo
+
+    def _fanout_executor(self) -> ThreadPoolExecutor:
+        with self._fanout_lock:
+            if self._fanout_pool is None:
+                self._fanout_pool = ThreadPoolExecutor(max_workers=FANOUT_WORKERS, thread_name_prefix="chain-fanout")
+            return self._fanout_pool
+
+    def _sections_parallel(self, state: "_RunState",
+                           sections: List[Tuple[str, Tuple[str, ...], Optional[List[str]]]]) -> List[Tuple[Optional[dict], Optional[dict]]]:
+        pool = self._fanout_executor()
+        # copy_context keeps scheduling_context (priority / flow) for calls made on pool threads.
+        futures = [pool.submit(contextvars.copy_context().run, self._section_attempts, state, name, keys, None, errors)
+                   for name, keys, errors in sections]
+        return [f.result() for f in futures]
+
+    def _sectioned(self, state: "_RunState") -> Tuple[bool, Any]:
+        fields: Dict[str, Any] = {}
+        failed = self._collect_sections(self._sections_parallel(state, [(n, k, None) for n, k in SECTIONS]), fields)
+        if failed is None:
+            failed = self._collect_sections([self._section_attempts(state, *FINAL_SECTION, dict(fields))], fields)
+        if failed is not None:
+            return failed
+        result, redo = self._check_merged(fields)
+        if redo:
+            failed = self._collect_sections(self._sections_parallel(state, redo), fields)
+            result = failed or self._check_merged(fields, final=True)[0]
+        return result
+
+    async def _asectioned(self, state: "_RunState") -> Tuple[bool, Any]:
+        import asyncio
+        fields: Dict[str, Any] = {}
+        parts = await asyncio.gather(*(self._asection_attempts(state, name, keys) for name, keys in SECTIONS))
+        failed = self._collect_sections(parts, fields)
+        if failed is None:
+            failed = self._collect_sections([await self._asection_attempts(state, *FINAL_SECTION, dict(fields))], fields)
+        if failed is not None:
+            return failed
+        result, redo = self._check_merged(fields)
+        if redo:
+            parts = await asyncio.gather(*(self._asection_attempts(state, name, keys, None, errors)
+                                           for name, keys, errors in redo))
+            failed = self._collect_sections(parts, fields)
+            result = failed or self._check_merged(fields, final=True)[0]
+        return result
+
+def _copy_result(result: Tuple[bool, Any]) -> Tuple[bool, Any]:
+    """Give each coalesced waiter its own copy so callers can't mutate a shared result."""
+    ok, payload = result
+    if ok:
+        return ok, payload.model_copy(deep=True)
+    return ok, dict(payload)
+
 
-        logger.error("Exceeded max retries; last_raw_output present=%s", last_raw_output is not None)
-        return False, {"error": "exceeded_retries", "last_output": last_raw_output}
\ No newline at end of file
+class _RunState:
+    """Mutable per-call state of the attempt loop."""
+    def __init__(self, user_input: str, session_id: Optional[str], system_prompt: str, user_prompt: str,
+                 request_id: Optional[str] = None):
+        self.request_id = request_id or uuid.uuid4().hex
+        self.user_input = user_input
+        self.session_id = session_id
+        self.system_prompt = system_prompt
+        self.user_prompt = user_prompt
+        self.attempt = 0
+        self.delay = 0.0
+        self.last_raw_output: Optional[str] = None
+        # (previous parsed output, ValidationError) while doing field-level retries
+        self.fix: Optional[Tuple[dict, ValidationError]] = None
+        self.fix_keys: Optional[List[str]] = None
+        self.started = 0.0
+        self.prompt_tokens: Optional[int] = None  # estimated input tokens; only computed with hooks
+        self.coalesced = False  # received another caller's result (single-flight follower)
+        self.reused_from: Optional[int] = None  # near-duplicate entry id used for this run
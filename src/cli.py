@@ -0,0 +1,155 @@
+# src/cli.py
+"""
+Command-line entry point for one-off and batch analyses.
+
+Only the chain, schema and the chosen client are imported: provider SDKs,
+the async stack, Gradio and the HTTP service are never loaded, so short-lived
+workers start in roughly the time it takes to build the pydantic schema.
+
+  python -m src.cli "Acme builds ..."                 # one input, JSON to stdout
+  echo "Acme builds ..." | python -m src.cli          # one input from stdin
+  python -m src.cli --jsonl < in.jsonl > out.jsonl    # one record per line, streamed
+  python -m src.cli --jsonl --input in.jsonl --out out.jsonl --concurrency 8
+  python -m src.cli --prompt-report "Acme builds ..."  # input tokens per prompt section
+  python -m src.cli --jsonl --provider openai --record traffic.cassette < in.jsonl > out.jsonl
+  python -m src.cli --jsonl --provider replay --cassette traffic.cassette --time-scale 0 < in.jsonl
+
+JSONL records hold the description under "input" (optional "id" and
+"session_id"); output lines match src/batch.py.
+"""
+import argparse
+import json
+import sys
+from typing import Any, List, Optional, TextIO
+import logging
+
+from .chain import DeterministicChain
+from .memory import ShortTermMemory
+from .utils import dump_json
+
+logger = logging.getLogger(__name__)
+
+PROVIDERS = ("mock", "simulated", "openai", "replay")
+
+
+def build_client(provider: str, model: Optional[str] = None, mock_response: Optional[str] = None,
+                 cassette: Optional[str] = None, time_scale: float = 1.0) -> Any:
+    """Import and construct only the requested client."""
+    if provider == "replay":
+        if cassette is None:
+            raise ValueError("the replay provider needs a cassette")
+        from .cassette import ReplayClient
+        return ReplayClient(cassette, time_scale=time_scale, on_miss="cycle")
+    if provider == "openai":
+        from .providers import OpenAIClient, OPENAI_DEFAULT_MODEL
+        return OpenAIClient(model=model or OPENAI_DEFAULT_MODEL)
+    if provider == "simulated":
+        from .simulated import SimulatedClient
+        return SimulatedClient(latency_ms=50.0)
+    if provider == "mock":
+        from .models import MockClient
+        if mock_response is None:
+            from .simulated import SAMPLE_ASSESSMENT
+            return MockClient(json.dumps(SAMPLE_ASSESSMENT))
+        with open(mock_response, "r", encoding="utf-8") as f:
+            return MockClient(f.read())
+    raise ValueError(f"Unknown provider: {provider}")
+
+
+def _run_one(chain: DeterministicChain, text: str, out: TextIO) -> int:
+    ok, result = chain.run(text)
+    if not ok:
+        json.dump(result, sys.stderr, default=str)
+        sys.stderr.write("\n")
+        return 1
+    out.write(dump_json(result, indent=2) + "\n")
+    return 0
+
+
+def _run_jsonl(chain: DeterministicChain, source: TextIO, out: TextIO) -> int:
+    """Sequential, streaming: each result is written (and flushed) as soon as it is done."""
+    failed = 0
+    for n, line in enumerate(source):
+        if not line.strip():
+            continue
+        try:
+            record = json.loads(line)
+            text = record["input"]
+        except (ValueError, KeyError, TypeError) as e:
+            out.write(json.dumps({"id": None, "line": n, "ok": False, "error": {"error": "bad_record", "detail": str(e)}}) + "\n")
+            failed += 1
+            continue
+        ok, result = chain.run(text, session_id=record.get("session_id"))
+        head = json.dumps({"id": record.get("id"), "line": n, "ok": ok})[:-1]
+        if ok:
+            out.write(f'{head}, "result": {dump_json(result)}}}\n')
+        else:
+            out.write(f'{head}, "error": {json.dumps(result, default=str)}}}\n')
+            failed += 1
+        out.flush()
+    return 1 if failed else 0
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m src.cli", description="Startup Analyst command line")
+    parser.add_argument("text", nargs="?", help="startup description (default: read stdin)")
+    parser.add_argument("--jsonl", action="store_true", help="read JSONL records instead of one description")
+    parser.add_argument("--input", help="read from this file instead of stdin")
+    parser.add_argument("--out", help="write to this file instead of stdout")
+    parser.add_argument("--concurrency", type=int, default=1,
+                        help="JSONL only: analyze this many records at once (needs --input and --out)")
+    parser.add_argument("--provider", default="mock", choices=PROVIDERS)
+    parser.add_argument("--model", default=None)
+    parser.add_argument("--mock-response", help="file with the raw completion the mock provider returns")
+    parser.add_argument("--cassette", help="replay provider: cassette file to serve")
+    parser.add_argument("--time-scale", type=float, default=1.0,
+                        help="replay provider: multiply recorded latencies (0 = no waiting)")
+    parser.add_argument("--record", help="append every completion of the provider to this cassette")
+    parser.add_argument("--temperature", type=float, default=0.1)
+    parser.add_argument("--max-retries", type=int, default=2)
+    parser.add_argument("--prompt-report", action="store_true",
+                        help="print estimated input tokens per prompt section instead of running")
+    parser.add_argument("--log-level", default="WARNING")
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=args.log_level, stream=sys.stderr,
+                        format="%(asctime)s [%(levelname)s] %(name)s - %(message)s")
+
+    if args.provider == "replay" and not args.cassette:
+        parser.error("--provider replay needs --cassette")
+    client = build_client(args.provider, args.model, args.mock_response, args.cassette, args.time_scale)
+    if args.record:
+        from .cassette import RecordingClient
+        client = RecordingClient(client, args.record)
+    chain = DeterministicChain(client, ShortTermMemory(),
+                               max_retries=args.max_retries, temperature=args.temperature)
+    if args.prompt_report:
+        json.dump(chain.prompt_report(args.text or ""), sys.stdout, indent=2)
+        sys.stdout.write("\n")
+        return 0
+    if args.jsonl and args.concurrency > 1:
+        if not (args.input and args.out):
+            parser.error("--concurrency needs --input and --out")
+        from .batch import run_batch  # pulls in asyncio; only loaded for concurrent batches
+        stats = run_batch(chain, args.input, args.out, concurrency=args.concurrency, text_field="input")
+        json.dump(stats, sys.stderr)
+        sys.stderr.write("\n")
+        return 1 if stats.get("failed") else 0
+
+    source = open(args.input, "r", encoding="utf-8") if args.input else sys.stdin
+    out = open(args.out, "w", encoding="utf-8") if args.out else sys.stdout
+    try:
+        if args.jsonl:
+            return _run_jsonl(chain, source, out)
+        text = args.text if args.text is not None else source.read()
+        if not text.strip():
+            parser.error("no startup description given")
+        return _run_one(chain, text, out)
+    finally:
+        if source is not sys.stdin:
+            source.close()
+        if out is not sys.stdout:
+            out.close()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,81 @@
+# src/coalesce.py
+"""
+Single-flight request coalescing.
+
+Concurrent callers asking for the same key share one execution of the work:
+the first caller (the leader) runs it, the rest wait and receive the same
+result or exception. Keys are only held while the work is in flight, so this
+deduplicates bursts without caching anything.
+"""
+import threading
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional, Tuple
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class _Call:
+    __slots__ = ("event", "result", "error", "waiters")
+
+    def __init__(self):
+        self.event = threading.Event()
+        self.result: Any = None
+        self.error: Optional[BaseException] = None
+        self.waiters = 0
+
+
+class SingleFlight:
+    """
+    Thread-safe coalescing for blocking callers and coroutines.
+
+    `do(key, fn)` and `ado(key, coro_fn)` return (result, shared) where `shared`
+    is True for callers that received another caller's result. Threaded and
+    async callers use separate in-flight tables.
+    """
+    def __init__(self):
+        self._calls: Dict[Hashable, _Call] = {}
+        self._tasks: Dict[Tuple[int, Hashable], Any] = {}  # (loop id, key) -> asyncio.Task
+        self._lock = threading.Lock()
+        self.coalesced = 0
+
+    def do(self, key: Hashable, fn: Callable[[], Any]) -> Tuple[Any, bool]:
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+            else:
+                call.waiters += 1
+                self.coalesced += 1
+        if not leader:
+            call.event.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result, True
+
+        try:
+            call.result = fn()
+            return call.result, False
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            if call.waiters:
+                logger.debug("Coalesced %d waiter(s) onto one call", call.waiters)
+            call.event.set()
+
+    async def ado(self, key: Hashable, coro_fn: Callable[[], Awaitable[Any]]) -> Tuple[Any, bool]:
+        import asyncio  # loaded by the running loop; not imported for thread-only users
+        # Tasks are per event loop; the shared task keeps running if one caller is cancelled.
+        task_key = (id(asyncio.get_running_loop()), key)
+        with self._lock:
+            task = self._tasks.get(task_key)
+            shared = task is not None
+            if shared:
+                self.coalesced += 1
+            else:
+                task = self._tasks[task_key] = asyncio.ensure_future(coro_fn())
+                task.add_done_callback(lambda _t: self._tasks.pop(task_key, None))
+        return await asyncio.shield(task), shared
@@ -0,0 +1,292 @@
+# src/dedup.py
+"""
+Near-duplicate detection over previously assessed inputs.
+
+Inputs are normalized (case, punctuation, whitespace) and split into word
+shingles; a MinHash signature is computed with NumPy and indexed with banded
+LSH. Each band is a sorted uint64 array searched with np.searchsorted, so a
+lookup is a few binary searches regardless of index size. Candidates are
+verified with the b-bit (8-bit) MinHash estimate of Jaccard similarity.
+
+Entries (signature + the validated assessment JSON) persist in a local sqlite
+file; the in-memory arrays are rebuilt from it on open.
+"""
+import hashlib
+import re
+import sqlite3
+import threading
+import time
+from typing import Iterable, List, Optional, Tuple
+import logging
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# Config
+NUM_PERM = 64
+BANDS = 16  # BANDS * ROWS == NUM_PERM; 16x4 catches pairs with Jaccard >= ~0.6
+SHINGLE_SIZE = 2  # longest word n-gram per shingle
+DEFAULT_THRESHOLD = 0.85
+MERGE_EVERY = 512
+SEED = 0x5EED
+
+_MERSENNE = np.uint64((1 << 61) - 1)
+_MAX32 = np.uint64(0xFFFFFFFF)
+# Letter/digit runs in any script; ideographs, kana and hangul are one token per character
+# because those scripts do not separate words with spaces (bigrams come from the shingles).
+_CJK = "\u3040-\u30ff\u3400-\u4dbf\u4e00-\u9fff\uf900-\ufaff\uac00-\ud7af"
+_WORD_RE = re.compile(rf"[{_CJK}]|[^\W_{_CJK}]+")
+_SQL_SCHEMA = """
+CREATE TABLE IF NOT EXISTS dedup_entries (
+    id INTEGER PRIMARY KEY,
+    signature BLOB NOT NULL,
+    assessment TEXT NOT NULL,
+    created_at REAL NOT NULL
+)
+"""
+
+
+def normalize(text: str) -> List[str]:
+    """Lowercase word tokens (any script) with punctuation and whitespace differences removed."""
+    return _WORD_RE.findall((text or "").lower())
+
+
+def _token_hashes(tokens: List[str]) -> np.ndarray:
+    # Stable across processes (unlike hash()), so persisted signatures stay comparable.
+    return np.fromiter(
+        (int.from_bytes(hashlib.blake2b(t.encode("utf-8"), digest_size=8).digest(), "little") for t in tokens),
+        dtype=np.uint64, count=len(tokens),
+    )
+
+
+class MinHasher:
+    """Vectorized MinHash over word shingles with universal hashing (a*x + b) mod (2^61 - 1)."""
+    def __init__(self, num_perm: int = NUM_PERM, shingle_size: int = SHINGLE_SIZE, seed: int = SEED):
+        self.num_perm = num_perm
+        self.shingle_size = shingle_size
+        rng = np.random.RandomState(seed)
+        self._a = rng.randint(1, (1 << 61) - 1, size=num_perm, dtype=np.uint64)
+        self._b = rng.randint(0, (1 << 61) - 1, size=num_perm, dtype=np.uint64)
+
+    def shingles(self, text: str) -> Optional[np.ndarray]:
+        """
+        Unique 32-bit hashes of the words and the word n-grams up to shingle_size.
+        Single words keep reordered sentences similar; n-grams keep word order relevant.
+        None when the text has no word tokens (it has no meaningful signature).
+        """
+        tokens = normalize(text)
+        if not tokens:
+            return None
+        h = _token_hashes(tokens)
+        parts = [h]
+        combined = h
+        with np.errstate(over="ignore"):
+            for i in range(1, min(self.shingle_size, len(h))):
+                combined = combined[:-1] * np.uint64(0x100000001B3) ^ h[i:]
+                parts.append(combined)
+        return np.unique(np.concatenate(parts) & _MAX32)
+
+    def signature(self, text: str) -> Optional[np.ndarray]:
+        x = self.shingles(text)
+        if x is None:
+            return None
+        with np.errstate(over="ignore"):
+            hv = (np.outer(x, self._a) + self._b) % _MERSENNE
+        return (hv & _MAX32).min(axis=0).astype(np.uint32)
+
+
+def jaccard_estimate(sig_a: np.ndarray, sig_b: np.ndarray) -> float:
+    return float(np.mean(sig_a == sig_b))
+
+
+def _band_hashes(sigs: np.ndarray, bands: int) -> np.ndarray:
+    """(n, num_perm) uint32 -> (n, bands) uint64 band keys."""
+    n, num_perm = sigs.shape
+    rows = num_perm // bands
+    parts = sigs.reshape(n, bands, rows).astype(np.uint64)
+    out = np.zeros((n, bands), dtype=np.uint64)
+    with np.errstate(over="ignore"):
+        for r in range(rows):
+            out = (out * np.uint64(0x9E3779B97F4A7C15)) ^ parts[:, :, r]
+    return out
+
+
+def _bbit_similarity(low: np.ndarray, row: np.ndarray) -> np.ndarray:
+    """8-bit MinHash estimate, corrected for chance collisions of the low byte."""
+    match = (low == row).mean(axis=1)
+    return np.clip((match - 1.0 / 256) / (1.0 - 1.0 / 256), 0.0, 1.0)
+
+
+class NearDuplicateIndex:
+    """
+    Similarity index of validated assessments keyed by their input text.
+
+    `lookup(text)` returns (similarity, assessment_json, entry_id) for the most
+    similar stored input at or above `threshold`, else None. `add(text, json)`
+    stores a new entry. With `path`, entries persist in sqlite.
+    """
+    def __init__(self, path: Optional[str] = None, threshold: float = DEFAULT_THRESHOLD,
+                 num_perm: int = NUM_PERM, bands: int = BANDS, hasher: Optional[MinHasher] = None):
+        if num_perm % bands:
+            raise ValueError("num_perm must be a multiple of bands")
+        self.threshold = threshold
+        self.bands = bands
+        self.hasher = hasher or MinHasher(num_perm)
+        self.path = path
+        self._lock = threading.Lock()
+        # Sorted per-band keys and the row index each key belongs to.
+        self._keys = np.zeros((bands, 0), dtype=np.uint64)
+        self._rows = np.zeros((bands, 0), dtype=np.int64)
+        # Recent inserts, scanned linearly until MERGE_EVERY of them are merged into the sorted arrays.
+        self._pending_keys = np.zeros((MERGE_EVERY, bands), dtype=np.uint64)
+        self._pending_rows: List[int] = []
+        self._pending_n = 0
+        # Low byte of each signature (b-bit MinHash) for candidate verification; grown by doubling.
+        self._low = np.zeros((16, num_perm), dtype=np.uint8)
+        self._ids: List[int] = []
+        self._mem_assessments: List[str] = []  # only used without a path
+        self._conn: Optional[sqlite3.Connection] = None
+        if path:
+            self._conn = sqlite3.connect(path, check_same_thread=False)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            self._conn.execute(_SQL_SCHEMA)
+            self._load()
+
+    def _load(self) -> None:
+        rows = self._conn.execute("SELECT id, signature FROM dedup_entries ORDER BY id").fetchall()
+        if not rows:
+            return
+        sigs = np.frombuffer(b"".join(r[1] for r in rows), dtype=np.uint32).reshape(len(rows), -1)
+        self._ids = [r[0] for r in rows]
+        self._low = np.zeros((max(16, 2 * len(rows)), sigs.shape[1]), dtype=np.uint8)
+        self._low[: len(rows)] = sigs & 0xFF
+        self._rebuild(_band_hashes(sigs, self.bands))
+        logger.info("Loaded %d near-duplicate entries from %s", len(rows), self.path)
+
+    def _rebuild(self, band_keys: np.ndarray) -> None:
+        """band_keys: (n, bands) for rows 0..n-1."""
+        keys = band_keys.T
+        order = np.argsort(keys, axis=1, kind="stable")
+        self._keys = np.take_along_axis(keys, order, axis=1)
+        self._rows = order
+        self._pending_n = 0
+
+    def _merge_pending(self) -> None:
+        """Insert pending keys into the sorted band arrays (O(n) per band, no full re-sort)."""
+        n = self._pending_n
+        if not n:
+            return
+        new_keys = self._pending_keys[:n].T  # (bands, n)
+        new_rows = np.asarray(self._pending_rows[:n], dtype=np.int64)
+        keys = np.empty((self.bands, self._keys.shape[1] + n), dtype=np.uint64)
+        rows = np.empty_like(keys, dtype=np.int64)
+        for b in range(self.bands):
+            order = np.argsort(new_keys[b], kind="stable")
+            pos = np.searchsorted(self._keys[b], new_keys[b][order], side="right")
+            keys[b] = np.insert(self._keys[b], pos, new_keys[b][order])
+            rows[b] = np.insert(self._rows[b], pos, new_rows[order])
+        self._keys, self._rows = keys, rows
+        self._pending_n = 0
+        self._pending_rows = []
+
+    def __len__(self) -> int:
+        return len(self._ids)
+
+    def _candidates(self, band_keys: np.ndarray) -> np.ndarray:
+        found = []
+        if self._keys.shape[1]:
+            for b in range(self.bands):
+                keys = self._keys[b]
+                lo = keys.searchsorted(band_keys[b], side="left")
+                hi = keys.searchsorted(band_keys[b], side="right")
+                if hi > lo:
+                    found.append(self._rows[b, lo:hi])
+        n = self._pending_n
+        if n:
+            hit = np.flatnonzero((self._pending_keys[:n] == band_keys).any(axis=1))
+            if len(hit):
+                found.append(np.asarray(self._pending_rows, dtype=np.int64)[hit])
+        if not found:
+            return np.zeros(0, dtype=np.int64)
+        return np.unique(np.concatenate(found))
+
+    def lookup(self, text: str, threshold: Optional[float] = None) -> Optional[Tuple[float, str, int]]:
+        threshold = self.threshold if threshold is None else threshold
+        sig = self.hasher.signature(text)
+        if sig is None:
+            return None
+        band_keys = _band_hashes(sig[None, :], self.bands)[0]
+        with self._lock:
+            cands = self._candidates(band_keys)
+            if not len(cands):
+                return None
+            sims = _bbit_similarity(self._low[cands], (sig & 0xFF).astype(np.uint8))
+            best = int(np.argmax(sims))
+            similarity = float(sims[best])
+            if similarity < threshold:
+                return None
+            row = int(cands[best])
+            entry_id = self._ids[row]
+            if self._conn is None:
+                return similarity, self._mem_assessments[row], entry_id
+            found = self._conn.execute("SELECT assessment FROM dedup_entries WHERE id = ?", (entry_id,)).fetchone()
+        return (similarity, found[0], entry_id) if found else None
+
+    def indexable(self, text: str) -> bool:
+        """False for inputs without word tokens; lookup and add skip them."""
+        return bool(normalize(text))
+
+    def add(self, text: str, assessment_json: str) -> Optional[int]:
+        return self.add_many([(text, assessment_json)])[0]
+
+    def add_many(self, items: Iterable[Tuple[str, str]]) -> List[Optional[int]]:
+        """
+        Index (input_text, assessment_json) pairs; one transaction for the whole batch.
+        Returns the entry id per pair, None for inputs without a signature.
+        """
+        items = list(items)
+        out: List[Optional[int]] = [None] * len(items)
+        signed = [(i, self.hasher.signature(text)) for i, (text, _) in enumerate(items)]
+        signed = [(i, sig) for i, sig in signed if sig is not None]
+        if not signed:
+            return out
+        positions = [i for i, _ in signed]
+        items = [items[i] for i in positions]
+        sigs = np.stack([sig for _, sig in signed])
+        band_keys = _band_hashes(sigs, self.bands)
+        now = time.time()
+        with self._lock:
+            if self._conn is not None:
+                # sqlite assigns the ids, so processes sharing the file never collide.
+                with self._conn:
+                    entry_ids = [self._conn.execute(
+                        "INSERT INTO dedup_entries (signature, assessment, created_at) VALUES (?, ?, ?)",
+                        (sig.tobytes(), aj, now)).lastrowid for sig, (_, aj) in zip(sigs, items)]
+            else:
+                first = len(self._ids) + 1
+                entry_ids = list(range(first, first + len(items)))
+                self._mem_assessments.extend(aj for _, aj in items)
+            start = len(self._ids)
+            self._ids.extend(entry_ids)
+            end = len(self._ids)
+            if end > len(self._low):
+                grown = np.zeros((max(2 * len(self._low), end), self._low.shape[1]), dtype=np.uint8)
+                grown[:start] = self._low[:start]
+                self._low = grown
+            self._low[start:end] = sigs & 0xFF
+            for i in range(len(items)):
+                if self._pending_n == MERGE_EVERY:
+                    self._merge_pending()
+                self._pending_keys[self._pending_n] = band_keys[i]
+                self._pending_rows.append(start + i)
+                self._pending_n += 1
+        for pos, eid in zip(positions, entry_ids):
+            out[pos] = eid
+        return out
+
+    def close(self) -> None:
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
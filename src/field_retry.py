@@ -0,0 +1,77 @@
+# src/field_retry.py
+"""
+Targeted re-ask after a validation failure: only the failing top-level fields
+are sent back to the model, and the corrected values are merged into the
+previous output.
+"""
+import json
+import typing
+from typing import Any, Dict, List, Tuple, Union
+
+from pydantic import BaseModel, ValidationError
+
+from .schemas import StartupAssessment
+from .prompts.field_fix import FIELD_FIX_PROMPT
+
+
+def failing_fields(err: ValidationError) -> Dict[str, List[str]]:
+    """Map each failing top-level field to its error lines ("path: message")."""
+    fields: Dict[str, List[str]] = {}
+    for e in err.errors():
+        loc = e.get("loc") or ()
+        if not loc:
+            continue
+        path = ".".join(str(p) for p in loc)
+        fields.setdefault(str(loc[0]), []).append(f"{path}: {e.get('msg')}")
+    return fields
+
+
+def field_outline(annotation: Any, description: str = "") -> Any:
+    """Compact example shape for a schema field, e.g. {"invest": "yes/no/hold", ...}."""
+    if isinstance(annotation, type) and issubclass(annotation, BaseModel):
+        return {name: field_outline(f.annotation, f.description or "") for name, f in annotation.model_fields.items()}
+    origin = typing.get_origin(annotation)
+    if origin in (list, List):
+        (item_type,) = typing.get_args(annotation) or (str,)
+        return [field_outline(item_type)]
+    if origin is Union:
+        return description or " or ".join(getattr(a, "__name__", str(a)) for a in typing.get_args(annotation))
+    return description or getattr(annotation, "__name__", str(annotation))
+
+
+def build_fix_prompts(previous: Dict[str, Any], err: ValidationError,
+                      model: type = StartupAssessment) -> Tuple[str, str, List[str]]:
+    """
+    Build (system, user, keys) for a field-level fix request. `keys` is empty when
+    the error is not attributable to top-level fields, in which case callers
+    should fall back to a full retry.
+    """
+    failing = failing_fields(err)
+    keys = [k for k in failing if k in model.model_fields]
+    if not keys:
+        return "", "", []
+
+    shape = {k: field_outline(model.model_fields[k].annotation, model.model_fields[k].description or "")
+             for k in keys}
+    previous_values = {k: previous.get(k, "(missing)") for k in keys}
+    lines = [line for k in keys for line in failing[k]]
+    context = previous.get("summary") if "summary" not in keys else previous.get("name")
+
+    user = (
+        "FAILED_FIELDS:\n" + "\n".join(f"- {l}" for l in lines) + "\n\n"
+        "REQUIRED_SHAPE:\n" + json.dumps(shape, separators=(",", ":")) + "\n\n"
+        "PREVIOUS_VALUES:\n" + json.dumps(previous_values, separators=(",", ":"), default=str) + "\n\n"
+    )
+    if isinstance(context, str) and context.strip():
+        user += f"CONTEXT:\n{context.strip()}\n\n"
+    user += "INSTRUCTIONS:\nReturn only a JSON object with the keys " + json.dumps(keys) + "."
+    return FIELD_FIX_PROMPT.strip(), user, keys
+
+
+def merge_fix(previous: Dict[str, Any], patch: Dict[str, Any], keys: List[str]) -> Dict[str, Any]:
+    """Replace the requested top-level fields of `previous` with those in `patch`."""
+    merged = dict(previous)
+    for k in keys:
+        if k in patch:
+            merged[k] = patch[k]
+    return merged
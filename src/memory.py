@@ -1,23 +1,202 @@
-from collections import defaultdict, deque
-from typing import List, Optional
+from collections import OrderedDict, deque
+from typing import Deque, List, Optional, Tuple
+import threading
+import time
 import logging
 
 logger = logging.getLogger(__name__)
 
+# Config
+DEFAULT_MAX_SESSIONS = 10000
+DEFAULT_TTL_SECONDS = 24 * 3600.0  # idle time after which a session is dropped
+
+
+class MemoryBackend:
+    """
+    Storage interface for ShortTermMemory. Implementations must be safe to call
+    from concurrent request handlers and must never create a session on read.
+    """
+    def append(self, session_id: str, text: str, max_len: int) -> None:
+        raise NotImplementedError("Implement in subclass")
+
+    def recent(self, session_id: str) -> List[str]:
+        raise NotImplementedError("Implement in subclass")
+
+    def delete(self, session_id: str) -> None:
+        raise NotImplementedError("Implement in subclass")
+
+    def __len__(self) -> int:
+        raise NotImplementedError("Implement in subclass")
+
+
+class InMemoryBackend(MemoryBackend):
+    """
+    Process-local store: an LRU of sessions (oldest access first) with an idle TTL.
+    All operations are O(1) amortized under a single lock.
+    """
+    def __init__(self, max_sessions: int = DEFAULT_MAX_SESSIONS, ttl: Optional[float] = DEFAULT_TTL_SECONDS):
+        self.max_sessions = max_sessions
+        self.ttl = ttl
+        self._sessions: "OrderedDict[str, Tuple[Deque[str], float]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _expired(self, last_access: float, now: float) -> bool:
+        return self.ttl is not None and now - last_access > self.ttl
+
+    def _evict(self, now: float) -> None:
+        # Oldest sessions sit at the front, so expired ones can be popped until a live one is found.
+        while self._sessions:
+            session_id, (_, last_access) = next(iter(self._sessions.items()))
+            if len(self._sessions) > self.max_sessions or self._expired(last_access, now):
+                self._sessions.popitem(last=False)
+                logger.debug("Evicted memory session_id=%s", session_id)
+            else:
+                break
+
+    def append(self, session_id: str, text: str, max_len: int) -> None:
+        now = time.time()
+        with self._lock:
+            entry = self._sessions.pop(session_id, None)
+            if entry is None or self._expired(entry[1], now):
+                entries: Deque[str] = deque(maxlen=max_len)
+            else:
+                entries = entry[0]
+            entries.append(text)
+            self._sessions[session_id] = (entries, now)
+            self._evict(now)
+
+    def recent(self, session_id: str) -> List[str]:
+        now = time.time()
+        with self._lock:
+            entry = self._sessions.get(session_id)
+            if entry is None:
+                return []
+            if self._expired(entry[1], now):
+                del self._sessions[session_id]
+                return []
+            self._sessions[session_id] = (entry[0], now)
+            self._sessions.move_to_end(session_id)
+            return list(entry[0])
+
+    def delete(self, session_id: str) -> None:
+        with self._lock:
+            self._sessions.pop(session_id, None)
+
+    def __len__(self) -> int:
+        return len(self._sessions)
+
+
+class SqliteMemoryBackend(MemoryBackend):
+    """
+    Persistent store in a local sqlite file, shareable by several worker processes
+    (WAL mode). Session-count and TTL eviction run every `sweep_every` appends.
+    """
+    def __init__(self, path: str, max_sessions: int = DEFAULT_MAX_SESSIONS,
+                 ttl: Optional[float] = DEFAULT_TTL_SECONDS, sweep_every: int = 100):
+        self.path = path
+        self.max_sessions = max_sessions
+        self.ttl = ttl
+        self.sweep_every = sweep_every
+        self._appends = 0
+        self._lock = threading.Lock()
+        import sqlite3  # only needed for the persistent backend
+        self._conn = sqlite3.connect(path, timeout=10.0, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript(
+            "CREATE TABLE IF NOT EXISTS memory_sessions ("
+            "  session_id TEXT PRIMARY KEY, last_access REAL NOT NULL);"
+            "CREATE INDEX IF NOT EXISTS memory_sessions_access ON memory_sessions(last_access);"
+            "CREATE TABLE IF NOT EXISTS memory_entries ("
+            "  seq INTEGER PRIMARY KEY AUTOINCREMENT, session_id TEXT NOT NULL, text TEXT NOT NULL);"
+            "CREATE INDEX IF NOT EXISTS memory_entries_session ON memory_entries(session_id, seq);"
+        )
+        self._conn.commit()
+
+    def append(self, session_id: str, text: str, max_len: int) -> None:
+        now = time.time()
+        with self._lock, self._conn:
+            row = self._conn.execute(
+                "SELECT last_access FROM memory_sessions WHERE session_id = ?", (session_id,)
+            ).fetchone()
+            if row is not None and self.ttl is not None and now - row[0] > self.ttl:
+                self._conn.execute("DELETE FROM memory_entries WHERE session_id = ?", (session_id,))
+            self._conn.execute(
+                "INSERT OR REPLACE INTO memory_sessions (session_id, last_access) VALUES (?, ?)", (session_id, now)
+            )
+            self._conn.execute("INSERT INTO memory_entries (session_id, text) VALUES (?, ?)", (session_id, text))
+            self._conn.execute(
+                "DELETE FROM memory_entries WHERE session_id = ? AND seq NOT IN ("
+                "  SELECT seq FROM memory_entries WHERE session_id = ? ORDER BY seq DESC LIMIT ?)",
+                (session_id, session_id, max_len),
+            )
+            self._appends += 1
+            if self._appends % self.sweep_every == 0:
+                self._sweep(now)
+
+    def _sweep(self, now: float) -> None:
+        if self.ttl is not None:
+            self._conn.execute("DELETE FROM memory_sessions WHERE last_access < ?", (now - self.ttl,))
+        self._conn.execute(
+            "DELETE FROM memory_sessions WHERE session_id IN ("
+            "  SELECT session_id FROM memory_sessions ORDER BY last_access DESC LIMIT -1 OFFSET ?)",
+            (self.max_sessions,),
+        )
+        self._conn.execute(
+            "DELETE FROM memory_entries WHERE session_id NOT IN (SELECT session_id FROM memory_sessions)"
+        )
+
+    def recent(self, session_id: str) -> List[str]:
+        now = time.time()
+        with self._lock, self._conn:
+            row = self._conn.execute(
+                "SELECT last_access FROM memory_sessions WHERE session_id = ?", (session_id,)
+            ).fetchone()
+            if row is None:
+                return []
+            if self.ttl is not None and now - row[0] > self.ttl:
+                self._conn.execute("DELETE FROM memory_sessions WHERE session_id = ?", (session_id,))
+                self._conn.execute("DELETE FROM memory_entries WHERE session_id = ?", (session_id,))
+                return []
+            self._conn.execute(
+                "UPDATE memory_sessions SET last_access = ? WHERE session_id = ?", (now, session_id)
+            )
+            rows = self._conn.execute(
+                "SELECT text FROM memory_entries WHERE session_id = ? ORDER BY seq", (session_id,)
+            ).fetchall()
+        return [r[0] for r in rows]
+
+    def delete(self, session_id: str) -> None:
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM memory_sessions WHERE session_id = ?", (session_id,))
+            self._conn.execute("DELETE FROM memory_entries WHERE session_id = ?", (session_id,))
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM memory_sessions").fetchone()[0]
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
 class ShortTermMemory:
-    def __init__(self, max_len: int = 4):
+    def __init__(self, max_len: int = 4, max_sessions: int = DEFAULT_MAX_SESSIONS,
+                 ttl: Optional[float] = DEFAULT_TTL_SECONDS, backend: Optional[MemoryBackend] = None):
         self.max_len = max_len
-        self.store = defaultdict(lambda: deque(maxlen=max_len))
-        logger.debug("ShortTermMemory initialized max_len=%d", max_len)
+        self.backend = backend if backend is not None else InMemoryBackend(max_sessions=max_sessions, ttl=ttl)
+        logger.debug("ShortTermMemory initialized max_len=%d backend=%s", max_len, type(self.backend).__name__)
 
     def add(self, session_id: str, text: str):
         logger.debug("Memory add session_id=%s, text_len=%d", session_id, len(text or ""))
-        self.store[session_id].append(text)
+        self.backend.append(session_id, text, self.max_len)
 
     def get_recent(self, session_id: Optional[str] = None) -> List[str]:
         if session_id is None:
             logger.debug("get_recent called with session_id=None")
             return []
-        entries = list(self.store[session_id])
+        entries = self.backend.recent(session_id)
         logger.debug("get_recent session_id=%s, count=%d", session_id, len(entries))
-        return entries
\ No newline at end of file
+        return entries
+
+    def clear(self, session_id: str) -> None:
+        self.backend.delete(session_id)
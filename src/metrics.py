@@ -0,0 +1,299 @@
+# src/metrics.py
+"""
+In-process metrics and chain hooks.
+
+MetricsRegistry holds counters, gauges and histograms and renders them in the
+Prometheus text exposition format. ChainHooks is the extension point that
+DeterministicChain calls at request start/end, per stage and per attempt;
+MetricsHooks feeds a registry and SpanHooks emits span-style trace records.
+"""
+import bisect
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+import logging
+
+logger = logging.getLogger(__name__)
+
+TOKEN_BUCKETS = (250, 500, 750, 1000, 1500, 2000, 3000, 4000, 6000, 8000, 16000, 32000)
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+
+def _label_key(labelnames: Sequence[str], labels: Dict[str, str]) -> Tuple[str, ...]:
+    return tuple(str(labels.get(name, "")) for name in labelnames)
+
+
+def _format_labels(labelnames: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    parts = [f'{n}="{_escape(v)}"' for n, v in zip(labelnames, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _num(value: float) -> str:
+    return repr(float(value)) if value != int(value) else str(int(value))
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, help_text: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.help = help_text
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+
+    def render(self) -> List[str]:
+        return [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def __init__(self, name: str, help_text: str, labelnames: Sequence[str] = ()):
+        super().__init__(name, help_text, labelnames)
+        self._values: Dict[Tuple[str, ...], float] = {}
+
+    def inc(self, amount: float = 1.0, **labels: str) -> None:
+        key = _label_key(self.labelnames, labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def value(self, **labels: str) -> float:
+        return self._values.get(_label_key(self.labelnames, labels), 0.0)
+
+    def render(self) -> List[str]:
+        lines = super().render()
+        with self._lock:
+            items = sorted(self._values.items())
+        lines.extend(f"{self.name}{_format_labels(self.labelnames, k)} {_num(v)}" for k, v in items)
+        return lines
+
+
+class Gauge(Counter):
+    kind = "gauge"
+
+    def set(self, value: float, **labels: str) -> None:
+        key = _label_key(self.labelnames, labels)
+        with self._lock:
+            self._values[key] = value
+
+    def dec(self, amount: float = 1.0, **labels: str) -> None:
+        self.inc(-amount, **labels)
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, help_text: str, labelnames: Sequence[str] = (),
+                 buckets: Sequence[float] = DEFAULT_BUCKETS):
+        super().__init__(name, help_text, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # labels -> [per-bucket counts (+Inf last), sum, count]
+        self._values: Dict[Tuple[str, ...], List[Any]] = {}
+
+    def observe(self, value: float, **labels: str) -> None:
+        key = _label_key(self.labelnames, labels)
+        i = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            entry = self._values.get(key)
+            if entry is None:
+                entry = self._values[key] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            entry[0][i] += 1
+            entry[1] += value
+            entry[2] += 1
+
+    def count(self, **labels: str) -> int:
+        entry = self._values.get(_label_key(self.labelnames, labels))
+        return entry[2] if entry else 0
+
+    def render(self) -> List[str]:
+        lines = super().render()
+        with self._lock:
+            items = sorted((k, (list(v[0]), v[1], v[2])) for k, v in self._values.items())
+        for key, (counts, total, n) in items:
+            cumulative = 0
+            for bound, c in zip(self.buckets + (float("inf"),), counts):
+                cumulative += c
+                le = 'le="+Inf"' if bound == float("inf") else f'le="{_num(bound)}"'
+                lines.append(f"{self.name}_bucket{_format_labels(self.labelnames, key, le)} {cumulative}")
+            lines.append(f"{self.name}_sum{_format_labels(self.labelnames, key)} {_num(total)}")
+            lines.append(f"{self.name}_count{_format_labels(self.labelnames, key)} {n}")
+        return lines
+
+
+class MetricsRegistry:
+    """Thread-safe get-or-create store of metrics with Prometheus text rendering."""
+    def __init__(self):
+        self._metrics: Dict[str, _Metric] = {}
+        self._lock = threading.Lock()
+
+    def _get(self, cls, name: str, help_text: str, labelnames: Sequence[str], **kwargs) -> Any:
+        with self._lock:
+            metric = self._metrics.get(name)
+            if metric is None:
+                metric = self._metrics[name] = cls(name, help_text, labelnames, **kwargs)
+            elif type(metric) is not cls:
+                raise ValueError(f"metric {name} already registered as {metric.kind}")
+            return metric
+
+    def counter(self, name: str, help_text: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self._get(Counter, name, help_text, labelnames)
+
+    def gauge(self, name: str, help_text: str, labelnames: Sequence[str] = ()) -> Gauge:
+        return self._get(Gauge, name, help_text, labelnames)
+
+    def histogram(self, name: str, help_text: str, labelnames: Sequence[str] = (),
+                  buckets: Sequence[float] = DEFAULT_BUCKETS) -> Histogram:
+        return self._get(Histogram, name, help_text, labelnames, buckets=buckets)
+
+    def render_prometheus(self) -> str:
+        with self._lock:
+            metrics = list(self._metrics.values())
+        lines: List[str] = []
+        for metric in metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+DEFAULT_METRICS = MetricsRegistry()
+
+
+class ChainHooks:
+    """
+    No-op base for DeterministicChain hooks. `ctx` is the per-request state and
+    exposes request_id, session_id and attempt. Stages are "prompt_build",
+    "generate", "validate_json" (fast path), "parse", "repair" and "validate".
+    """
+    def on_request_start(self, ctx: Any) -> None:
+        pass
+
+    def on_stage(self, ctx: Any, stage: str, seconds: float) -> None:
+        pass
+
+    def on_attempt_end(self, ctx: Any, error_kind: Optional[str]) -> None:
+        pass
+
+    def on_repair(self, ctx: Any, repairs: List[str]) -> None:
+        pass
+
+    def on_request_end(self, ctx: Any, outcome: str, seconds: float) -> None:
+        pass
+
+
+class CompositeHooks(ChainHooks):
+    def __init__(self, *hooks: ChainHooks):
+        self.hooks = hooks
+
+    def on_request_start(self, ctx):
+        for h in self.hooks:
+            h.on_request_start(ctx)
+
+    def on_stage(self, ctx, stage, seconds):
+        for h in self.hooks:
+            h.on_stage(ctx, stage, seconds)
+
+    def on_attempt_end(self, ctx, error_kind):
+        for h in self.hooks:
+            h.on_attempt_end(ctx, error_kind)
+
+    def on_repair(self, ctx, repairs):
+        for h in self.hooks:
+            h.on_repair(ctx, repairs)
+
+    def on_request_end(self, ctx, outcome, seconds):
+        for h in self.hooks:
+            h.on_request_end(ctx, outcome, seconds)
+
+
+class MetricsHooks(ChainHooks):
+    """Records chain stage latencies, attempts, outcomes and repairs into a MetricsRegistry."""
+    def __init__(self, registry: MetricsRegistry = DEFAULT_METRICS):
+        self.registry = registry
+        self.stage_seconds = registry.histogram(
+            "chain_stage_seconds", "Time spent per chain stage.", ("stage",))
+        self.request_seconds = registry.histogram(
+            "chain_request_seconds", "End-to-end chain request latency.", ("outcome",))
+        self.prompt_tokens = registry.histogram(
+            "chain_prompt_tokens", "Estimated input tokens of the first prompt per request.", buckets=TOKEN_BUCKETS)
+        self.requests = registry.counter(
+            "chain_requests_total", "Chain requests by final outcome.", ("outcome",))
+        self.attempts = registry.counter(
+            "chain_attempts_total", "LLM attempts by result.", ("result",))
+        self.repairs = registry.counter(
+            "chain_repairs_total", "Local output repairs applied.", ("repair",))
+        self.in_flight = registry.gauge(
+            "chain_requests_in_flight", "Chain requests currently running.")
+
+    def on_request_start(self, ctx):
+        self.in_flight.inc()
+        tokens = getattr(ctx, "prompt_tokens", None)
+        if tokens is not None:
+            self.prompt_tokens.observe(tokens)
+
+    def on_stage(self, ctx, stage, seconds):
+        self.stage_seconds.observe(seconds, stage=stage)
+
+    def on_attempt_end(self, ctx, error_kind):
+        self.attempts.inc(result=error_kind or "ok")
+
+    def on_repair(self, ctx, repairs):
+        for r in repairs:
+            self.repairs.inc(repair=r.split(":", 1)[0])
+
+    def on_request_end(self, ctx, outcome, seconds):
+        self.in_flight.dec()
+        self.requests.inc(outcome=outcome)
+        self.request_seconds.observe(seconds, outcome=outcome)
+
+
+class SpanHooks(ChainHooks):
+    """
+    Emits one span dict per stage and per request to `sink`, tagged with the
+    request and session IDs. The default sink logs at DEBUG.
+    """
+    def __init__(self, sink: Optional[Callable[[Dict[str, Any]], None]] = None):
+        self.sink = sink or (lambda span: logger.debug("span %s", span))
+
+    def on_stage(self, ctx, stage, seconds):
+        self.sink({
+            "name": stage, "request_id": ctx.request_id, "session_id": ctx.session_id,
+            "attempt": ctx.attempt, "end": time.time(), "duration_ms": seconds * 1000.0,
+        })
+
+    def on_request_end(self, ctx, outcome, seconds):
+        self.sink({
+            "name": "chain.request", "request_id": ctx.request_id, "session_id": ctx.session_id,
+            "attempts": ctx.attempt, "outcome": outcome, "end": time.time(), "duration_ms": seconds * 1000.0,
+        })
+
+
+def start_metrics_server(port: int, registry: MetricsRegistry = DEFAULT_METRICS,
+                         host: str = "0.0.0.0") -> "ThreadingHTTPServer":
+    """Serve GET /metrics in Prometheus text format from a daemon thread."""
+    # Imported here so that importing the chain (which uses the hooks) stays cheap.
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+    class _Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.split("?", 1)[0] != "/metrics":
+                self.send_error(404)
+                return
+            body = registry.render_prometheus().encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer((host, port), _Handler)
+    threading.Thread(target=server.serve_forever, name="metrics-server", daemon=True).start()
+    logger.info("Metrics server listening on %s:%d", host, server.server_address[1])
+    return server
@@ -1,4 +1,4 @@
-from typing import Optional
+from typing import AsyncIterator, Iterator, Optional
 import logging
 
 logger = logging.getLogger(__name__)
@@ -10,17 +10,71 @@ class LLMClient:
     def generate(self, system: str, user: str, temperature: float = 0.1) -> str:
         raise NotImplementedError("Implement in subclass")
 
+    def generate_stream(self, system: str, user: str, temperature: float = 0.1) -> Iterator[str]:
+        """
+        Optional: yield the completion in chunks. Closing the iterator early should cancel
+        the provider request. The default yields the whole `generate` result at once.
+        """
+        yield self.generate(system=system, user=user, temperature=temperature)
+
+
+class AsyncLLMClient:
+    """
+    Abstract async LLM client. Implement `agenerate` for providers with a non-blocking SDK.
+    DeterministicChain.arun awaits `agenerate` when present and otherwise runs the
+    blocking `generate` in a worker thread.
+    """
+    async def agenerate(self, system: str, user: str, temperature: float = 0.1) -> str:
+        raise NotImplementedError("Implement in subclass")
+
+    async def agenerate_stream(self, system: str, user: str, temperature: float = 0.1) -> AsyncIterator[str]:
+        """Optional async counterpart of LLMClient.generate_stream."""
+        yield await self.agenerate(system=system, user=user, temperature=temperature)
+
 
 class MockClient(LLMClient):
     """
     Deterministic mock for tests: returns a supplied JSON string or raises.
     Use MockClient(response_text) for predictable testing.
     """
-    def __init__(self, response_text: str):
+    def __init__(self, response_text: str, chunk_size: int = 16):
         self.response_text = response_text
+        self.chunk_size = chunk_size
         logger.debug("MockClient initialized")
 
     def generate(self, system: str, user: str, temperature: float = 0.1) -> str:
         logger.info("MockClient.generate called (temp=%s)", temperature)
         logger.debug("System prompt len=%d, user prompt len=%d", len(system or ""), len(user or ""))
-        return self.response_text
\ No newline at end of file
+        return self.response_text
+
+    def generate_stream(self, system: str, user: str, temperature: float = 0.1) -> Iterator[str]:
+        logger.info("MockClient.generate_stream called (temp=%s)", temperature)
+        for i in range(0, len(self.response_text), self.chunk_size):
+            yield self.response_text[i:i + self.chunk_size]
+
+
+class AsyncMockClient(AsyncLLMClient):
+    """
+    Async counterpart of MockClient: returns a supplied JSON string after an optional delay.
+    """
+    def __init__(self, response_text: str, delay: float = 0.0, chunk_size: int = 16):
+        self.response_text = response_text
+        self.delay = delay
+        self.chunk_size = chunk_size
+        logger.debug("AsyncMockClient initialized delay=%s", delay)
+
+    async def agenerate(self, system: str, user: str, temperature: float = 0.1) -> str:
+        import asyncio  # loaded by the running loop; kept off the import path of sync clients
+        logger.info("AsyncMockClient.agenerate called (temp=%s)", temperature)
+        logger.debug("System prompt len=%d, user prompt len=%d", len(system or ""), len(user or ""))
+        if self.delay:
+            await asyncio.sleep(self.delay)
+        return self.response_text
+
+    async def agenerate_stream(self, system: str, user: str, temperature: float = 0.1) -> AsyncIterator[str]:
+        import asyncio
+        logger.info("AsyncMockClient.agenerate_stream called (temp=%s)", temperature)
+        if self.delay:
+            await asyncio.sleep(self.delay)
+        for i in range(0, len(self.response_text), self.chunk_size):
+            yield self.response_text[i:i + self.chunk_size]
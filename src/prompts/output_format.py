@@ -1,39 +1,23 @@
 """
-Output format prompt and schema instructions.
-Export: OUTPUT_FORMAT_PROMPT (string)
+Output format prompt, generated from the pydantic models in src/schemas.py so it
+cannot drift from what the validator accepts. The schema is sent as one compact
+JSON outline: each value is the field's description or type, [x] is a list of x.
+Export: OUTPUT_FORMAT_PROMPT (string), schema_outline(model) -> str
 """
-OUTPUT_FORMAT_PROMPT = """
-OUTPUT INSTRUCTIONS (MANDATORY):
-Return ONLY a single valid JSON object (no surrounding code fences, no commentary). Follow this exact schema. If a value is not available, use "unknown" or an empty list.
+import json
 
-{
-  "name": "string",
-  "summary": "string (1-3 sentences)",
-  "market": {
-    "size_estimate": "string (e.g., '> $100M' or 'unknown')",
-    "top_markets": ["string"],
-    "competitors": ["string"]
-  },
-  "product": {
-    "category": "string",
-    "differentiation": "string"
-  },
-  "business_model": {
-    "revenue_streams": ["string"],
-    "monetization_risks": ["string"]
-  },
-  "team": {
-    "founders_count": "int or 'unknown'",
-    "strengths": ["string"],
-    "gaps": ["string"]
-  },
-  "risks": ["string"],
-  "recommendation": {
-    "invest": "yes/no/hold",
-    "rationale": "string"
-  },
-  "assumptions": ["string"]
-}
+from ..schemas import StartupAssessment
+from ..field_retry import field_outline
 
-STRICT: No extra fields. No surrounding text. The JSON must parse. If partial, include filled fields and set unknowns explicitly.
-"""
\ No newline at end of file
+
+def schema_outline(model: type = StartupAssessment) -> str:
+    """Minimal-token JSON outline of a pydantic model, e.g. {"name":"str","risks":["str"],...}."""
+    return json.dumps(field_outline(model), separators=(",", ":"), ensure_ascii=False)
+
+
+OUTPUT_FORMAT_PROMPT = (
+    "OUTPUT (MANDATORY): Return ONLY one valid JSON object with exactly these fields; no code fences, "
+    "no commentary, no extra fields. Values show the expected content; [x] is a list of x. "
+    'Use "unknown" or [] when a value is unavailable.\n'
+    + schema_outline()
+)
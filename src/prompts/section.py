@@ -0,0 +1,12 @@
+"""
+Section output prompt used by sectioned generation, where each request covers
+only part of the assessment.
+Export: SECTION_FORMAT_PROMPT (string)
+"""
+SECTION_FORMAT_PROMPT = """
+OUTPUT INSTRUCTIONS (MANDATORY):
+You are writing ONE section of a larger startup assessment; other sections are written separately.
+- Return ONLY a single valid JSON object whose keys are exactly the fields listed in REQUIRED_SHAPE.
+- Each value must match the required shape. No code fences, no commentary, no other fields.
+- If a value is not available, use "unknown" or an empty list.
+"""
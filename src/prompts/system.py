@@ -0,0 +1,43 @@
+"""
+System prompts assembled once at import, with stable fingerprints.
+
+The system prompt is the same for every request, so it is built a single
+time and sent first. Identical leading bytes on every call let
+provider-side prefix caching hit. The fingerprint identifies the exact
+text in logs and reports.
+Export: SYSTEM_PROMPT, SYSTEM_PROMPT_PARTS, SYSTEM_FINGERPRINT,
+        SECTION_SYSTEM_PROMPT, SECTION_SYSTEM_FINGERPRINT
+"""
+import hashlib
+from typing import Sequence, Tuple
+
+from .role import ROLE_PROMPT
+from .behavior import BEHAVIOR_PROMPT
+from .style import STYLE_PROMPT
+from .output_format import OUTPUT_FORMAT_PROMPT
+from .section import SECTION_FORMAT_PROMPT
+
+BEGIN = "SYSTEM: Begin system instructions."
+END = "SYSTEM: End system instructions."
+
+
+def assemble(parts: Sequence[Tuple[str, str]]) -> str:
+    return "\n\n".join([BEGIN, *(text.strip() for _, text in parts), END])
+
+
+def fingerprint(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()[:16]
+
+
+# (name, text) in prompt order; names label the per-section token report.
+SYSTEM_PROMPT_PARTS: Tuple[Tuple[str, str], ...] = (
+    ("role", ROLE_PROMPT),
+    ("behavior", BEHAVIOR_PROMPT),
+    ("style", STYLE_PROMPT),
+    ("output_format", OUTPUT_FORMAT_PROMPT),
+)
+SYSTEM_PROMPT = assemble(SYSTEM_PROMPT_PARTS)
+SYSTEM_FINGERPRINT = fingerprint(SYSTEM_PROMPT)
+
+SECTION_SYSTEM_PROMPT = assemble(SYSTEM_PROMPT_PARTS[:-1] + (("section_format", SECTION_FORMAT_PROMPT),))
+SECTION_SYSTEM_FINGERPRINT = fingerprint(SECTION_SYSTEM_PROMPT)
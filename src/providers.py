@@ -0,0 +1,89 @@
+# src/providers.py
+import os
+import threading
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+import logging
+
+from .models import LLMClient
+
+logger = logging.getLogger(__name__)
+
+OPENAI_DEFAULT_MODEL = "gpt-4o-mini"
+
+# One SDK client per (api_key, base_url). Each SDK client owns a pooled keep-alive
+# HTTP transport, so sharing it means connections are reused across requests,
+# models and threads instead of being re-established per call.
+_SDK_CLIENTS: Dict[Tuple[str, Optional[str]], Any] = {}
+_SDK_LOCK = threading.Lock()
+
+
+def openai_available() -> bool:
+    """True if the optional openai SDK can be imported (without importing it)."""
+    import importlib.util
+    return importlib.util.find_spec("openai") is not None
+
+
+def shared_openai_sdk(api_key: str, base_url: Optional[str] = None) -> Any:
+    key = (api_key, base_url)
+    with _SDK_LOCK:
+        sdk = _SDK_CLIENTS.get(key)
+        if sdk is None:
+            from openai import OpenAI  # optional dependency, imported on first use
+            sdk = OpenAI(api_key=api_key, base_url=base_url) if base_url else OpenAI(api_key=api_key)
+            _SDK_CLIENTS[key] = sdk
+            logger.debug("Created shared OpenAI SDK client base_url=%s", base_url)
+        return sdk
+
+
+class OpenAIClient(LLMClient):
+    def __init__(self, api_key: Optional[str] = None, model: str = OPENAI_DEFAULT_MODEL,
+                 base_url: Optional[str] = None, sdk_client: Any = None):
+        logger.debug("Initializing OpenAIClient with model=%s", model)
+        if api_key is None:
+            api_key = os.getenv("OPENAI_API_KEY")
+        if not api_key and sdk_client is None:
+            logger.error("OpenAI API key not found in env")
+            raise RuntimeError("OpenAI API key not found.")
+        self.model = model
+        base_url = base_url or os.getenv("OPENAI_BASE_URL")
+        self._client = sdk_client if sdk_client is not None else shared_openai_sdk(api_key, base_url)
+
+    def _messages(self, system: str, user: str):
+        return [
+            {"role": "system", "content": system},
+            {"role": "user", "content": user},
+        ]
+
+    def generate(self, system: str, user: str, temperature: float = 0.1) -> str:
+        logger.info("OpenAIClient.generate called (temp=%s)", temperature)
+        resp = self._client.chat.completions.create(
+            model=self.model, messages=self._messages(system, user), temperature=temperature
+        )
+        text = resp.choices[0].message.content
+        logger.debug("OpenAIClient.generate got %d chars", len(text or ""))
+        return text
+
+    def generate_n(self, system: str, user: str, n: int, temperature: float = 0.1) -> List[str]:
+        """
+        `n` completions from one request (speculative mode of DeterministicChain). All
+        choices share one temperature, so the chain passes the mean of its spread.
+        """
+        logger.info("OpenAIClient.generate_n called (n=%d, temp=%s)", n, temperature)
+        resp = self._client.chat.completions.create(
+            model=self.model, messages=self._messages(system, user), temperature=temperature, n=n
+        )
+        return [c.message.content or "" for c in sorted(resp.choices, key=lambda c: c.index)]
+
+    def generate_stream(self, system: str, user: str, temperature: float = 0.1) -> Iterator[str]:
+        logger.info("OpenAIClient.generate_stream called (temp=%s)", temperature)
+        stream = self._client.chat.completions.create(
+            model=self.model, messages=self._messages(system, user), temperature=temperature, stream=True
+        )
+        try:
+            for event in stream:
+                delta = event.choices[0].delta.content if event.choices else None
+                if delta:
+                    yield delta
+        finally:
+            # Closing the response cancels generation when the chain aborts early.
+            stream.close()
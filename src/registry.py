@@ -0,0 +1,66 @@
+# src/registry.py
+import threading
+from typing import Any, Callable, Dict, Optional, Tuple
+import logging
+
+from .chain import DeterministicChain
+from .memory import ShortTermMemory
+
+logger = logging.getLogger(__name__)
+
+ClientFactory = Callable[[str], Any]  # model name -> LLMClient
+
+
+class ChainRegistry:
+    """
+    Process-wide cache of LLM clients and chains.
+
+    Clients are built once per (provider, model); chains once per
+    (provider, model, temperature) and share the client and memory. Safe to call
+    from concurrent request handlers: construction happens under a lock and the
+    cached objects hold no per-request state.
+
+    `chain_kwargs` apply to every chain; `provider_kwargs` override them per
+    provider, e.g. to keep a demo provider's output out of a shared dedup index.
+    """
+    def __init__(self, memory: ShortTermMemory, factories: Dict[str, ClientFactory],
+                 provider_kwargs: Optional[Dict[str, Dict[str, Any]]] = None, **chain_kwargs: Any):
+        self.memory = memory
+        self.factories = dict(factories)
+        self.chain_kwargs = chain_kwargs
+        self.provider_kwargs = dict(provider_kwargs or {})
+        self._clients: Dict[Tuple[str, str], Any] = {}
+        self._chains: Dict[Tuple[str, str, float], DeterministicChain] = {}
+        self._lock = threading.Lock()
+
+    def get_client(self, provider: str, model: str) -> Any:
+        key = (provider, model)
+        client = self._clients.get(key)
+        if client is not None:
+            return client
+        with self._lock:
+            client = self._clients.get(key)
+            if client is None:
+                factory = self.factories.get(provider)
+                if factory is None:
+                    raise ValueError(f"Unknown provider: {provider}")
+                client = factory(model)
+                self._clients[key] = client
+                logger.info("Built client provider=%s model=%s", provider, model)
+        return client
+
+    def get_chain(self, provider: str, model: str, temperature: float) -> DeterministicChain:
+        key = (provider, model, round(float(temperature), 4))
+        chain = self._chains.get(key)
+        if chain is not None:
+            return chain
+        client = self.get_client(provider, model)
+        with self._lock:
+            chain = self._chains.get(key)
+            if chain is None:
+                kwargs = {**self.chain_kwargs, **self.provider_kwargs.get(provider, {})}
+                chain = DeterministicChain(llm_client=client, memory=self.memory,
+                                           temperature=key[2], **kwargs)
+                self._chains[key] = chain
+                logger.debug("Built chain provider=%s model=%s temperature=%s", *key)
+        return chain
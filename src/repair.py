@@ -0,0 +1,215 @@
+# src/repair.py
+"""
+Deterministic repair of model output before validation.
+
+Each helper returns the repaired value plus a list of repair labels
+("<repair>" or "<repair>:<field.path>") describing what was changed, so callers
+can log and count them.
+"""
+import json
+import re
+import typing
+from typing import Any, List, Optional, Tuple, Union
+
+from pydantic import BaseModel
+
+from .schemas import StartupAssessment, INVEST_CHOICES
+
+_FENCE_RE = re.compile(r"```(?:json|JSON)?\s*(.*?)(?:```|$)", re.DOTALL)
+
+# Fields whose string values must come from a fixed set; matched case-insensitively.
+_CHOICE_FIELDS = {"recommendation.invest": INVEST_CHOICES}
+
+
+def _match_object_end(text: str, start: int) -> Optional[int]:
+    """Index just past the brace closing the object opened at `start`, or None if truncated."""
+    depth = 0
+    in_string = escape = False
+    for i in range(start, len(text)):
+        ch = text[i]
+        if in_string:
+            if escape:
+                escape = False
+            elif ch == "\\":
+                escape = True
+            elif ch == '"':
+                in_string = False
+        elif ch == '"':
+            in_string = True
+        elif ch in "{[":
+            depth += 1
+        elif ch in "}]":
+            depth -= 1
+            if depth == 0:
+                return i + 1
+    return None
+
+
+def extract_json_text(raw: str) -> Tuple[str, List[str]]:
+    """Cut the JSON object out of code fences and surrounding prose."""
+    repairs: List[str] = []
+    text = raw or ""
+    if "```" in text:
+        m = _FENCE_RE.search(text)
+        if m:
+            text = m.group(1)
+            repairs.append("stripped_code_fence")
+    start = text.find("{")
+    if start < 0:
+        return text.strip(), repairs
+    if text[:start].strip():
+        repairs.append("stripped_leading_text")
+    end = _match_object_end(text, start)
+    if end is not None and text[end:].strip():
+        repairs.append("stripped_trailing_text")
+    return text[start:end].strip() if end is not None else text[start:].rstrip(), repairs
+
+
+def repair_json_syntax(text: str) -> Tuple[str, List[str]]:
+    """Drop trailing commas and close a truncated object (open string, dangling key, brackets)."""
+    repairs: List[str] = []
+    out: List[str] = []
+    stack: List[str] = []  # "{" / "["
+    expect_key = False
+    after_key = False
+    in_string = escape = False
+
+    def last_significant() -> int:
+        i = len(out) - 1
+        while i >= 0 and out[i] in " \t\r\n":
+            i -= 1
+        return i
+
+    for ch in text:
+        if in_string:
+            out.append(ch)
+            if escape:
+                escape = False
+            elif ch == "\\":
+                escape = True
+            elif ch == '"':
+                in_string = False
+                if expect_key:
+                    expect_key, after_key = False, True
+            continue
+        if ch == '"':
+            in_string = True
+        elif ch in "{[":
+            stack.append(ch)
+            expect_key = ch == "{"
+        elif ch in "}]":
+            i = last_significant()
+            if i >= 0 and out[i] == ",":
+                del out[i]
+                if "removed_trailing_comma" not in repairs:
+                    repairs.append("removed_trailing_comma")
+            if stack:
+                stack.pop()
+            expect_key = False
+        elif ch == ",":
+            expect_key = bool(stack) and stack[-1] == "{"
+        elif ch == ":":
+            after_key = False
+        out.append(ch)
+
+    if in_string or stack:
+        if in_string:
+            if escape:
+                out.pop()
+            out.append('"')
+            if expect_key:
+                expect_key, after_key = False, True
+        i = last_significant()
+        del out[i + 1:]
+        if out and out[-1] == ",":
+            out.pop()
+        elif after_key:
+            out.append(": null")
+        elif out and out[-1] == ":":
+            out.append(" null")
+        for opener in reversed(stack):
+            out.append("}" if opener == "{" else "]")
+        repairs.append("closed_truncated_json")
+    return "".join(out), repairs
+
+
+def load_repaired(raw: str) -> Tuple[Optional[Any], List[str]]:
+    """Extract and syntax-repair raw output, then parse it. Returns (None, repairs) if still invalid."""
+    text, repairs = extract_json_text(raw)
+    try:
+        return json.loads(text), repairs
+    except ValueError:
+        pass
+    text, syntax_repairs = repair_json_syntax(text)
+    repairs.extend(syntax_repairs)
+    try:
+        return json.loads(text), repairs
+    except ValueError:
+        return None, repairs
+
+
+def _coerce_value(value: Any, annotation: Any, path: str, repairs: List[str]) -> Any:
+    origin = typing.get_origin(annotation)
+    if isinstance(annotation, type) and issubclass(annotation, BaseModel):
+        if isinstance(value, dict):
+            return _coerce_model(value, annotation, path + ".", repairs)
+        return value
+    if origin in (list, List):
+        (item_type,) = typing.get_args(annotation) or (Any,)
+        if value is None:
+            repairs.append(f"null_to_list:{path}")
+            return []
+        if isinstance(value, str):
+            repairs.append(f"wrapped_in_list:{path}")
+            return [value] if value.strip() else []
+        if isinstance(value, list):
+            return [_coerce_value(v, item_type, path, repairs) for v in value]
+        return value
+    if origin is Union:
+        args = typing.get_args(annotation)
+        if int in args and isinstance(value, str) and value.strip().isdigit():
+            repairs.append(f"coerced_int:{path}")
+            return int(value.strip())
+        if int in args and isinstance(value, float) and value.is_integer():
+            repairs.append(f"coerced_int:{path}")
+            return int(value)
+        return value
+    if annotation is str:
+        if isinstance(value, (int, float)) and not isinstance(value, bool):
+            repairs.append(f"coerced_str:{path}")
+            return str(value)
+        choices = _CHOICE_FIELDS.get(path)
+        if choices and isinstance(value, str) and value not in choices:
+            normalized = value.strip().strip(".").lower()
+            if normalized in choices:
+                repairs.append(f"normalized_choice:{path}")
+                return normalized
+    return value
+
+
+def _coerce_model(obj: dict, model: type, prefix: str, repairs: List[str]) -> dict:
+    out = dict(obj)
+    for name, field in model.model_fields.items():
+        if name in out:
+            out[name] = _coerce_value(out[name], field.annotation, prefix + name, repairs)
+    return out
+
+
+def coerce_to_schema(obj: Any, model: type = StartupAssessment) -> Tuple[Any, List[str]]:
+    """Fix field types the schema can infer (e.g. founders_count "2" -> 2, invest "Hold" -> "hold")."""
+    repairs: List[str] = []
+    if not isinstance(obj, dict):
+        return obj, repairs
+    return _coerce_model(obj, model, "", repairs), repairs
+
+
+def repair_output(raw: str, model: type = StartupAssessment) -> Tuple[Optional[Any], List[str]]:
+    """Full pipeline: tolerant extraction, syntax repair and schema-guided coercion."""
+    try:
+        parsed, repairs = json.loads(raw), []
+    except (TypeError, ValueError):
+        parsed, repairs = load_repaired(raw)
+    if parsed is None:
+        return None, repairs
+    parsed, coerced = coerce_to_schema(parsed, model)
+    return parsed, repairs + coerced
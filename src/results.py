@@ -0,0 +1,175 @@
+# src/results.py
+"""
+Local store of validated assessments.
+
+ResultsStore appends StartupAssessment outputs to a sqlite file (WAL mode)
+with the fields people filter on (name, product category, invest
+recommendation, created_at) pulled out into indexed columns. Writes are
+buffered and inserted in batches; `query` and `export_jsonl` stream rows from
+their own read connection with `fetchmany`, so large exports never sit in
+memory and do not block writers.
+"""
+import atexit
+import json
+import sqlite3
+import threading
+import time
+import uuid
+from typing import Any, Dict, Iterator, List, Optional, TextIO, Tuple
+import logging
+
+from .utils import dump_json
+
+logger = logging.getLogger(__name__)
+
+# Config
+BATCH_SIZE = 64  # buffered rows per insert transaction
+FLUSH_INTERVAL = 1.0  # seconds a buffered row may wait before the next add flushes it
+FETCH_SIZE = 500  # rows per fetchmany while streaming
+
+_SQL_SCHEMA = """
+CREATE TABLE IF NOT EXISTS results (
+    id TEXT PRIMARY KEY,
+    created_at REAL NOT NULL,
+    session_id TEXT,
+    model TEXT,
+    name TEXT NOT NULL,
+    category TEXT NOT NULL,
+    invest TEXT NOT NULL,
+    assessment TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS results_name ON results(name COLLATE NOCASE);
+CREATE INDEX IF NOT EXISTS results_category ON results(category COLLATE NOCASE, created_at);
+CREATE INDEX IF NOT EXISTS results_invest ON results(invest, created_at);
+CREATE INDEX IF NOT EXISTS results_created ON results(created_at);
+CREATE INDEX IF NOT EXISTS results_session ON results(session_id, created_at);
+"""
+_COLUMNS = "id, created_at, session_id, model, assessment"
+
+
+class ResultsStore:
+    """
+    Append-optimized results store in a local sqlite file.
+
+    `add(model, session_id=..., model_name=...)` buffers a row and returns its id;
+    rows are inserted BATCH_SIZE at a time, when the oldest buffered row is
+    FLUSH_INTERVAL old, before any query, and at exit.
+    """
+    def __init__(self, path: str, batch_size: int = BATCH_SIZE, flush_interval: float = FLUSH_INTERVAL):
+        self.path = path
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self._lock = threading.Lock()
+        self._buffer: List[Tuple] = []
+        self._oldest = 0.0
+        self._conn = sqlite3.connect(path, timeout=10.0, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(_SQL_SCHEMA)
+        self._conn.commit()
+        atexit.register(self.close)
+
+    def add(self, model: Any, session_id: Optional[str] = None, model_name: Optional[str] = None,
+            result_id: Optional[str] = None) -> str:
+        """Buffer one validated StartupAssessment; returns its result id."""
+        result_id = result_id or uuid.uuid4().hex
+        now = time.time()
+        row = (result_id, now, session_id, model_name, model.name, model.product.category,
+               model.recommendation.invest, dump_json(model))
+        with self._lock:
+            if not self._buffer:
+                self._oldest = now
+            self._buffer.append(row)
+            if len(self._buffer) >= self.batch_size or now - self._oldest >= self.flush_interval:
+                self._flush_locked()
+        return result_id
+
+    def _flush_locked(self) -> None:
+        if not self._buffer or self._conn is None:
+            return
+        rows, self._buffer = self._buffer, []
+        with self._conn:
+            self._conn.executemany("INSERT OR REPLACE INTO results VALUES (?, ?, ?, ?, ?, ?, ?, ?)", rows)
+        logger.debug("Inserted %d results", len(rows))
+
+    def flush(self) -> None:
+        with self._lock:
+            self._flush_locked()
+
+    def _where(self, name: Optional[str], category: Optional[str], invest: Optional[str],
+               session_id: Optional[str], since: Optional[float], until: Optional[float]) -> Tuple[str, List[Any]]:
+        clauses, params = [], []
+        for column, value, collate in (("name", name, " COLLATE NOCASE"), ("category", category, " COLLATE NOCASE"),
+                                       ("invest", invest, ""), ("session_id", session_id, "")):
+            if value is not None:
+                clauses.append(f"{column} = ?{collate}")
+                params.append(value)
+        if since is not None:
+            clauses.append("created_at >= ?")
+            params.append(since)
+        if until is not None:
+            clauses.append("created_at < ?")
+            params.append(until)
+        return (" WHERE " + " AND ".join(clauses)) if clauses else "", params
+
+    def _rows(self, name: Optional[str] = None, category: Optional[str] = None, invest: Optional[str] = None,
+              session_id: Optional[str] = None, since: Optional[float] = None, until: Optional[float] = None,
+              limit: Optional[int] = None, newest_first: bool = False) -> Iterator[Tuple]:
+        self.flush()
+        where, params = self._where(name, category, invest, session_id, since, until)
+        sql = f"SELECT {_COLUMNS} FROM results{where} ORDER BY created_at {'DESC' if newest_first else 'ASC'}"
+        if limit is not None:
+            sql += " LIMIT ?"
+            params.append(limit)
+        # A separate read connection: WAL readers don't block the writer, even for long exports.
+        conn = sqlite3.connect(self.path, timeout=10.0)
+        try:
+            cursor = conn.execute(sql, params)
+            while True:
+                batch = cursor.fetchmany(FETCH_SIZE)
+                if not batch:
+                    return
+                yield from batch
+        finally:
+            conn.close()
+
+    def query(self, **filters: Any) -> Iterator[Dict[str, Any]]:
+        """
+        Stream matching results as dicts (oldest first unless newest_first=True).
+        Filters: name, category (case-insensitive), invest, session_id, since/until
+        (epoch seconds), limit.
+        """
+        for result_id, created_at, session_id, model, assessment in self._rows(**filters):
+            yield {"id": result_id, "created_at": created_at, "session_id": session_id,
+                   "model": model, "assessment": json.loads(assessment)}
+
+    def get(self, result_id: str) -> Optional[str]:
+        """Stored assessment JSON for one result id."""
+        self.flush()
+        with self._lock:
+            row = self._conn.execute("SELECT assessment FROM results WHERE id = ?", (result_id,)).fetchone()
+        return row[0] if row else None
+
+    def export_jsonl(self, out: TextIO, **filters: Any) -> int:
+        """Write matching results to `out` as JSONL, one row at a time; returns the row count."""
+        count = 0
+        for result_id, created_at, session_id, model, assessment in self._rows(**filters):
+            # The stored assessment is already JSON; splice it in instead of re-encoding.
+            head = json.dumps({"id": result_id, "created_at": created_at, "session_id": session_id, "model": model})
+            out.write(f'{head[:-1]}, "assessment": {assessment}}}\n')
+            count += 1
+        return count
+
+    def __len__(self) -> int:
+        self.flush()
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM results").fetchone()[0]
+
+    def close(self) -> None:
+        with self._lock:
+            if self._conn is None:
+                return
+            self._flush_locked()
+            self._conn.close()
+            self._conn = None
+        atexit.unregister(self.close)
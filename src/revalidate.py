@@ -0,0 +1,177 @@
+# src/revalidate.py
+"""
+Offline re-validation of archived model outputs against the current schema.
+
+The archive is a JSONL file. Each line is either a raw model output or a
+JSON object holding it under `field`. The file is cut into byte ranges that
+end on a line boundary. Worker processes mmap the file and validate their
+ranges independently, so throughput scales with cores. The parent only
+writes results in input order and merges counters.
+
+Output, one line per record:
+  {"line": n, "id": ..., "ok": true}
+  {"line": n, "id": ..., "ok": false, "errors": [{"path": "recommendation.invest", "type": "missing"}]}
+With `migrate`, passing records also carry the re-validated "assessment"
+(current defaults and validators applied).
+
+Run:
+  PYTHONPATH=. python -m src.revalidate archive.jsonl --out revalidated.jsonl --report report.json
+"""
+import argparse
+import json
+import mmap
+import os
+import time
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+import logging
+
+from pydantic import ValidationError
+
+from .repair import repair_output
+from .utils import validate_json, validate_output
+
+logger = logging.getLogger(__name__)
+
+# Config
+CHUNK_BYTES = 4 * 1024 * 1024
+TOP_FIELDS = 20
+
+_Chunk = Tuple[str, int, int, Optional[str], bool, bool]
+_encode = json.JSONEncoder().encode
+
+
+def _error_entries(err: Any) -> List[Dict[str, str]]:
+    if isinstance(err, ValidationError):
+        return [{"path": ".".join(str(p) for p in e["loc"]) or "<root>", "type": e["type"]} for e in err.errors()]
+    return [{"path": "<root>", "type": type(err).__name__}]
+
+
+def _generic_path(path: str) -> str:
+    # risks.3 and risks.0 count as the same field in the report.
+    return ".".join("*" if part.isdigit() else part for part in path.split("."))
+
+
+def check_record(line: bytes, field: Optional[str] = None, repair: bool = False) -> Tuple[Any, bool, Any]:
+    """Validate one archive line; returns (record_id, ok, StartupAssessment or error)."""
+    record_id, value = None, line
+    if field is not None:
+        try:
+            record = json.loads(line.decode("utf-8") if isinstance(line, bytes) else line)
+        except ValueError as e:
+            return None, False, e
+        if not isinstance(record, dict):
+            return None, False, ValueError(f"archive line is not an object with {field!r}")
+        record_id, value = record.get("id"), record.get(field)
+    if isinstance(value, dict):
+        ok, result = validate_output(value)
+    else:
+        ok, result = validate_json(value if isinstance(value, (str, bytes)) else json.dumps(value))
+    if not ok and repair and isinstance(value, (str, bytes)):
+        parsed, _ = repair_output(value.decode("utf-8", "replace") if isinstance(value, bytes) else value)
+        if parsed is not None:
+            ok, result = validate_output(parsed)
+    return record_id, ok, result
+
+
+def _validate_chunk(chunk: _Chunk) -> Tuple[List[str], int, Counter, Counter]:
+    """Worker: validate the lines in [start, end); output lines lack the leading "line" key."""
+    path, start, end, field, repair, migrate = chunk
+    lines: List[str] = []
+    passed = 0
+    fields: Counter = Counter()
+    kinds: Counter = Counter()
+    with open(path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        for raw in mm[start:end].splitlines():
+            if not raw.strip():
+                continue
+            record_id, ok, result = check_record(raw, field, repair)
+            head = f'{{"id": {_encode(record_id)}, "ok": {"true" if ok else "false"}'
+            if ok:
+                passed += 1
+                lines.append(f'{head}, "assessment": {result.model_dump_json()}}}' if migrate else head + "}")
+                continue
+            errors = _error_entries(result)
+            fields.update({_generic_path(e["path"]) for e in errors})
+            kinds.update(e["type"] for e in errors)
+            lines.append(f'{head}, "errors": {_encode(errors)}}}')
+    return lines, passed, fields, kinds
+
+
+def chunk_ranges(path: str, chunk_bytes: int = CHUNK_BYTES) -> Iterator[Tuple[int, int]]:
+    """Byte ranges of about `chunk_bytes` that start and end on line boundaries."""
+    size = os.path.getsize(path)
+    with open(path, "rb") as f:
+        start = 0
+        while start < size:
+            f.seek(min(start + chunk_bytes, size))
+            f.readline()
+            end = min(f.tell(), size)
+            yield start, end
+            start = end
+
+
+def revalidate(input_path: str, output_path: str, field: Optional[str] = None, repair: bool = False,
+               migrate: bool = False, workers: Optional[int] = None,
+               chunk_bytes: int = CHUNK_BYTES) -> Dict[str, Any]:
+    """Re-validate an archive and write per-record results; returns the aggregate report."""
+    workers = workers or os.cpu_count() or 1
+    t0 = time.perf_counter()
+    chunks = [(input_path, s, e, field, repair, migrate) for s, e in chunk_ranges(input_path, chunk_bytes)]
+    total = passed = 0
+    fields: Counter = Counter()
+    kinds: Counter = Counter()
+    pool = ProcessPoolExecutor(max_workers=workers) if workers > 1 and len(chunks) > 1 else None
+    try:
+        results = pool.map(_validate_chunk, chunks) if pool else map(_validate_chunk, chunks)
+        with open(output_path, "w", encoding="utf-8") as out:
+            for lines, chunk_passed, chunk_fields, chunk_kinds in results:
+                for line in lines:
+                    out.write(f'{{"line": {total}, {line[1:]}\n')
+                    total += 1
+                passed += chunk_passed
+                fields.update(chunk_fields)
+                kinds.update(chunk_kinds)
+    finally:
+        if pool is not None:
+            pool.shutdown()
+    elapsed = time.perf_counter() - t0
+    report = {
+        "records": total,
+        "passed": passed,
+        "failed": total - passed,
+        "pass_rate": passed / total if total else 1.0,
+        "top_failing_fields": fields.most_common(TOP_FIELDS),
+        "error_types": dict(kinds.most_common()),
+        "workers": workers,
+        "elapsed_seconds": round(elapsed, 3),
+        "records_per_second": round(total / elapsed, 1) if elapsed else None,
+    }
+    logger.info("Re-validated %d records: %d passed in %.1fs", total, passed, elapsed)
+    return report
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Re-validate archived model outputs against src/schemas.py.")
+    parser.add_argument("archive", help="JSONL archive of model outputs")
+    parser.add_argument("--out", default="revalidated.jsonl", help="per-record results (JSONL)")
+    parser.add_argument("--report", help="write the aggregate report here instead of stdout")
+    parser.add_argument("--field", help="key holding the output when archive lines are wrapper objects")
+    parser.add_argument("--repair", action="store_true", help="apply local repairs before failing a record")
+    parser.add_argument("--migrate", action="store_true", help="include re-validated assessments in the output")
+    parser.add_argument("--workers", type=int, default=None, help="processes (default: all cores)")
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.INFO)
+    report = revalidate(args.archive, args.out, field=args.field, repair=args.repair,
+                        migrate=args.migrate, workers=args.workers)
+    text = json.dumps(report, indent=2)
+    if args.report:
+        with open(args.report, "w", encoding="utf-8") as f:
+            f.write(text)
+    else:
+        print(text)
+
+
+if __name__ == "__main__":
+    main()
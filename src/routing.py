@@ -0,0 +1,385 @@
+# src/routing.py
+"""
+Multi-provider routing: hedged requests, per-backend circuit breakers and
+latency-driven retry backoff.
+
+RoutingClient wraps several LLM clients in priority order. A call goes to the
+first backend whose breaker is closed; if it hasn't answered by that backend's
+observed p95 latency, a hedged duplicate is sent to the next healthy backend
+and the first successful reply wins. AdaptiveBackoff gives DeterministicChain
+jittered exponential retry delays scaled by the latency the router observes.
+"""
+import asyncio
+import random
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Any, AsyncIterator, Callable, Deque, Dict, Iterator, List, Optional, Sequence, Tuple
+import logging
+
+from .models import LLMClient, AsyncLLMClient
+
+logger = logging.getLogger(__name__)
+
+# Config
+FAILURE_THRESHOLD = 5  # consecutive errors that open a backend's circuit
+RESET_TIMEOUT = 30.0  # seconds an open circuit waits before a half-open trial call
+LATENCY_WINDOW = 200  # recent successful latencies kept per backend
+MIN_LATENCY_SAMPLES = 20  # below this the p95 is not trusted and DEFAULT_HEDGE_DELAY is used
+DEFAULT_HEDGE_DELAY = 2.0  # seconds
+MIN_HEDGE_DELAY = 0.05  # seconds
+HEDGE_POOL_WORKERS = 64  # threads for blocking clients (primary + hedge per call)
+
+
+class NoBackendAvailable(RuntimeError):
+    """Every backend's circuit is open."""
+
+
+class CircuitBreaker:
+    """
+    Closed -> open after `failure_threshold` consecutive failures; open -> half-open
+    after `reset_timeout`, where one trial call decides between closed and open.
+    """
+    CLOSED, OPEN, HALF_OPEN = "closed", "open", "half_open"
+
+    def __init__(self, failure_threshold: int = FAILURE_THRESHOLD, reset_timeout: float = RESET_TIMEOUT,
+                 clock: Callable[[], float] = time.monotonic):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._clock = clock
+        self.state = self.CLOSED
+        self.failures = 0
+        self._opened_at = 0.0
+        self._trial_started: Optional[float] = None
+        self._lock = threading.Lock()
+
+    def allow(self) -> bool:
+        with self._lock:
+            if self.state == self.CLOSED:
+                return True
+            now = self._clock()
+            if self.state == self.OPEN and now - self._opened_at >= self.reset_timeout:
+                self.state = self.HALF_OPEN
+                self._trial_started = None
+            # One trial call at a time; a trial that never reports back (cancelled
+            # hedge, unused candidate) expires after reset_timeout.
+            if self.state == self.HALF_OPEN and (
+                    self._trial_started is None or now - self._trial_started >= self.reset_timeout):
+                self._trial_started = now
+                return True
+            return False
+
+    def record_success(self) -> None:
+        with self._lock:
+            self.state = self.CLOSED
+            self.failures = 0
+            self._trial_started = None
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self.failures += 1
+            if self.state == self.HALF_OPEN or self.failures >= self.failure_threshold:
+                if self.state != self.OPEN:
+                    logger.warning("Circuit opened after %d consecutive failures", self.failures)
+                self.state = self.OPEN
+                self._opened_at = self._clock()
+                self._trial_started = None
+
+
+class LatencyTracker:
+    """Sliding window of recent successful call latencies."""
+    def __init__(self, window: int = LATENCY_WINDOW):
+        self._samples: Deque[float] = deque(maxlen=window)
+        self._lock = threading.Lock()
+
+    def record(self, seconds: float) -> None:
+        with self._lock:
+            self._samples.append(seconds)
+
+    def percentile(self, pct: float, min_samples: int = MIN_LATENCY_SAMPLES) -> Optional[float]:
+        with self._lock:
+            if len(self._samples) < max(min_samples, 1):
+                return None
+            ordered = sorted(self._samples)
+        return ordered[min(len(ordered) - 1, int(pct / 100.0 * len(ordered)))]
+
+
+class Backend:
+    """One routed client with its breaker, latency window and counters."""
+    def __init__(self, name: str, client: Any, breaker: CircuitBreaker):
+        self.name = name
+        self.client = client
+        self.breaker = breaker
+        self.latency = LatencyTracker()
+        self.calls = 0
+        self.errors = 0
+        self.hedges = 0  # times this backend was the hedge target
+        self.wins = 0  # hedged races this backend won
+
+    def hedge_delay(self) -> float:
+        p95 = self.latency.percentile(95)
+        return max(MIN_HEDGE_DELAY, p95 if p95 is not None else DEFAULT_HEDGE_DELAY)
+
+    def call(self, system: str, user: str, temperature: float) -> str:
+        self.calls += 1
+        t0 = time.perf_counter()
+        try:
+            out = self.client.generate(system=system, user=user, temperature=temperature)
+        except Exception:
+            self.errors += 1
+            self.breaker.record_failure()
+            raise
+        self.latency.record(time.perf_counter() - t0)
+        self.breaker.record_success()
+        return out
+
+    async def acall(self, system: str, user: str, temperature: float) -> str:
+        self.calls += 1
+        t0 = time.perf_counter()
+        try:
+            agenerate = getattr(self.client, "agenerate", None)
+            if agenerate is not None:
+                out = await agenerate(system=system, user=user, temperature=temperature)
+            else:
+                out = await asyncio.to_thread(self.client.generate, system=system, user=user,
+                                              temperature=temperature)
+        except asyncio.CancelledError:
+            # Lost a hedged race; neither a failure nor a latency sample.
+            raise
+        except Exception:
+            self.errors += 1
+            self.breaker.record_failure()
+            raise
+        self.latency.record(time.perf_counter() - t0)
+        self.breaker.record_success()
+        return out
+
+
+class RoutingClient(LLMClient, AsyncLLMClient):
+    """
+    LLM client over several backends, given in priority order as clients or
+    (name, client) pairs.
+
+    Non-streaming calls are hedged: once the primary exceeds its observed p95
+    latency (DEFAULT_HEDGE_DELAY until MIN_LATENCY_SAMPLES are seen), the same
+    request is sent to the next healthy backend and the first success wins.
+    Streaming calls are not hedged; they fail over to the next backend when a
+    stream errors before its first chunk. Backends with an open circuit are
+    skipped; if all are open, NoBackendAvailable is raised.
+    """
+    def __init__(self, backends: Sequence[Any], hedge: bool = True,
+                 failure_threshold: int = FAILURE_THRESHOLD, reset_timeout: float = RESET_TIMEOUT,
+                 max_workers: int = HEDGE_POOL_WORKERS):
+        if not backends:
+            raise ValueError("RoutingClient needs at least one backend")
+        self.backends: List[Backend] = []
+        for i, b in enumerate(backends):
+            name, client = b if isinstance(b, tuple) else (getattr(b, "model", None) or f"backend{i}", b)
+            self.backends.append(Backend(name, client, CircuitBreaker(failure_threshold, reset_timeout)))
+        self.hedge = hedge
+        self._max_workers = max_workers
+        self._pool: Optional[ThreadPoolExecutor] = None
+        self._pool_lock = threading.Lock()
+
+    def _healthy(self) -> List[Backend]:
+        # allow() reserves the half-open trial slot, so only ask as many as we may use.
+        picked = []
+        for b in self.backends:
+            if b.breaker.allow():
+                picked.append(b)
+                if len(picked) == 2:
+                    break
+        if not picked:
+            raise NoBackendAvailable("all backends have an open circuit")
+        return picked
+
+    def _executor(self) -> ThreadPoolExecutor:
+        if self._pool is None:
+            with self._pool_lock:
+                if self._pool is None:
+                    self._pool = ThreadPoolExecutor(max_workers=self._max_workers, thread_name_prefix="hedge")
+        return self._pool
+
+    def observed_latency(self) -> Optional[float]:
+        """Median recent latency of the first backend with enough samples."""
+        for b in self.backends:
+            p50 = b.latency.percentile(50)
+            if p50 is not None:
+                return p50
+        return None
+
+    def generate(self, system: str, user: str, temperature: float = 0.1) -> str:
+        candidates = self._healthy()
+        primary = candidates[0]
+        secondary = candidates[1] if self.hedge and len(candidates) > 1 else None
+        if secondary is None:
+            try:
+                return primary.call(system, user, temperature)
+            except Exception:
+                if len(candidates) < 2:
+                    raise
+                logger.warning("Backend %s failed; failing over to %s", primary.name, candidates[1].name)
+                return candidates[1].call(system, user, temperature)
+
+        pool = self._executor()
+        pending = {pool.submit(primary.call, system, user, temperature): primary}
+        done, _ = wait(pending, timeout=primary.hedge_delay())
+        if not done or next(iter(done)).exception() is not None:
+            if not done:
+                logger.info("Hedging %s -> %s", primary.name, secondary.name)
+                secondary.hedges += 1
+            pending[pool.submit(secondary.call, system, user, temperature)] = secondary
+        return self._first_success(pending, hedged=not done)
+
+    @staticmethod
+    def _first_success(pending: Dict[Any, Backend], hedged: bool) -> str:
+        error: Optional[BaseException] = None
+        remaining = set(pending)
+        while remaining:
+            done, remaining = wait(remaining, return_when=FIRST_COMPLETED)
+            for fut in done:
+                if fut.exception() is None:
+                    if hedged:
+                        pending[fut].wins += 1
+                    # A losing blocking call can't be interrupted; it finishes in the pool.
+                    return fut.result()
+                error = fut.exception()
+        raise error
+
+    async def agenerate(self, system: str, user: str, temperature: float = 0.1) -> str:
+        candidates = self._healthy()
+        primary = candidates[0]
+        secondary = candidates[1] if len(candidates) > 1 else None
+        first = asyncio.ensure_future(primary.acall(system, user, temperature))
+        tasks = {first: primary}
+        hedged = False
+        try:
+            done, _ = await asyncio.wait({first}, timeout=primary.hedge_delay() if self.hedge else None)
+            if secondary is not None and (not done or first.exception() is not None):
+                if not done:
+                    logger.info("Hedging %s -> %s", primary.name, secondary.name)
+                    secondary.hedges += 1
+                    hedged = True
+                tasks[asyncio.ensure_future(secondary.acall(system, user, temperature))] = secondary
+            error: Optional[BaseException] = None
+            remaining = set(tasks)
+            while remaining:
+                done, remaining = await asyncio.wait(remaining, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        if hedged:
+                            tasks[task].wins += 1
+                        return task.result()
+                    error = task.exception()
+            raise error
+        finally:
+            for task in tasks:
+                if not task.done():
+                    task.cancel()
+
+    def generate_stream(self, system: str, user: str, temperature: float = 0.1) -> Iterator[str]:
+        candidates = self._healthy()
+        for i, b in enumerate(candidates):
+            b.calls += 1
+            t0 = time.perf_counter()
+            started = False
+            chunks = b.client.generate_stream(system=system, user=user, temperature=temperature) \
+                if hasattr(b.client, "generate_stream") else None
+            try:
+                if chunks is None:
+                    chunks = iter([b.client.generate(system=system, user=user, temperature=temperature)])
+                for chunk in chunks:
+                    started = True
+                    yield chunk
+            except GeneratorExit:
+                # The consumer stopped early (e.g. the JSON object was complete).
+                if started:
+                    b.latency.record(time.perf_counter() - t0)
+                    b.breaker.record_success()
+                raise
+            except Exception:
+                b.errors += 1
+                b.breaker.record_failure()
+                if started or i == len(candidates) - 1:
+                    raise
+                logger.warning("Stream from %s failed; failing over to %s", b.name, candidates[i + 1].name)
+                continue
+            finally:
+                close = getattr(chunks, "close", None)
+                if close is not None:
+                    close()
+            b.latency.record(time.perf_counter() - t0)
+            b.breaker.record_success()
+            return
+
+    async def agenerate_stream(self, system: str, user: str, temperature: float = 0.1) -> AsyncIterator[str]:
+        candidates = self._healthy()
+        for i, b in enumerate(candidates):
+            b.calls += 1
+            t0 = time.perf_counter()
+            started = False
+            stream_fn = getattr(b.client, "agenerate_stream", None)
+            chunks = stream_fn(system=system, user=user, temperature=temperature) if stream_fn else None
+            try:
+                if chunks is None:
+                    # acall records its own outcome; no partial output is possible here.
+                    b.calls -= 1
+                    text = await b.acall(system, user, temperature)
+                    yield text
+                    return
+                async for chunk in chunks:
+                    started = True
+                    yield chunk
+            except GeneratorExit:
+                if started:
+                    b.latency.record(time.perf_counter() - t0)
+                    b.breaker.record_success()
+                raise
+            except Exception:
+                if chunks is not None:
+                    b.errors += 1
+                    b.breaker.record_failure()
+                if started or i == len(candidates) - 1:
+                    raise
+                logger.warning("Stream from %s failed; failing over to %s", b.name, candidates[i + 1].name)
+                continue
+            finally:
+                if chunks is not None:
+                    await chunks.aclose()
+            b.latency.record(time.perf_counter() - t0)
+            b.breaker.record_success()
+            return
+
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        return {
+            b.name: {"calls": b.calls, "errors": b.errors, "hedges": b.hedges, "hedge_wins": b.wins,
+                     "circuit": b.breaker.state, "p95_seconds": b.latency.percentile(95)}
+            for b in self.backends
+        }
+
+
+class AdaptiveBackoff:
+    """
+    Full-jitter exponential backoff for DeterministicChain retries.
+
+    After a provider error the base delay is `latency_factor` x the observed
+    provider latency (from `latency_fn`, e.g. RoutingClient.observed_latency),
+    floored at `base`; after unusable output (invalid JSON / validation) it is
+    `base`. The delay is uniform in [0, min(cap, base * 2 ** (attempt - 1))].
+    """
+    def __init__(self, latency_fn: Optional[Callable[[], Optional[float]]] = None, base: float = 0.05,
+                 cap: float = 10.0, latency_factor: float = 0.5, rng: Optional[random.Random] = None):
+        self.latency_fn = latency_fn
+        self.base = base
+        self.cap = cap
+        self.latency_factor = latency_factor
+        self._rng = rng or random.Random()
+
+    def delay(self, attempt: int, error_kind: str) -> float:
+        base = self.base
+        if error_kind == "llm_call_failed" and self.latency_fn is not None:
+            observed = self.latency_fn()
+            if observed is not None:
+                base = max(base, observed * self.latency_factor)
+        return self._rng.uniform(0.0, min(self.cap, base * 2 ** max(attempt - 1, 0)))
@@ -0,0 +1,250 @@
+# src/scheduler.py
+"""
+Provider quota scheduling: RPM/TPM token buckets, priority classes and fair
+queuing across sessions.
+
+RequestScheduler admits one provider call at a time from its queues: the
+highest priority class with waiters goes first, and within a class the
+sessions ("flows") take turns round-robin. A call is admitted only when both
+the request and the token bucket can cover it. RateLimitedClient puts the
+scheduler in front of any LLM client; the priority and flow of a call come
+from `scheduling_context`, so the chain itself is unchanged.
+"""
+import asyncio
+import contextvars
+import threading
+import time
+from collections import OrderedDict, deque
+from contextlib import contextmanager
+from typing import Any, AsyncIterator, Callable, Deque, Dict, Iterator, Optional
+import logging
+
+from .metrics import DEFAULT_METRICS, MetricsRegistry
+from .models import LLMClient, AsyncLLMClient
+from .tokens import TokenEstimator, default_estimator
+
+logger = logging.getLogger(__name__)
+
+# Config
+PRIORITIES = ("interactive", "batch")  # highest first
+DEFAULT_PRIORITY = "interactive"
+DEFAULT_FLOW = "default"
+EXPECTED_OUTPUT_TOKENS = 600  # completion tokens charged to TPM up front per call
+
+_priority: contextvars.ContextVar = contextvars.ContextVar("scheduler_priority", default=DEFAULT_PRIORITY)
+_flow: contextvars.ContextVar = contextvars.ContextVar("scheduler_flow", default=DEFAULT_FLOW)
+
+
+@contextmanager
+def scheduling_context(priority: str = DEFAULT_PRIORITY, flow: Optional[str] = None) -> Iterator[None]:
+    """Set the priority class and fairness flow (usually the session id) for calls made inside."""
+    if priority not in PRIORITIES:
+        raise ValueError(f"unknown priority {priority!r}; expected one of {PRIORITIES}")
+    p_token = _priority.set(priority)
+    f_token = _flow.set(flow or DEFAULT_FLOW)
+    try:
+        yield
+    finally:
+        _flow.reset(f_token)
+        _priority.reset(p_token)
+
+
+class TokenBucket:
+    """Refills continuously at `per_minute / 60` per second up to `burst` (default: one minute's worth)."""
+    def __init__(self, per_minute: float, burst: Optional[float] = None,
+                 clock: Callable[[], float] = time.monotonic):
+        self.rate = per_minute / 60.0
+        self.capacity = float(burst if burst is not None else per_minute)
+        self.tokens = self.capacity
+        self._clock = clock
+        self._last = clock()
+
+    def _refill(self) -> None:
+        now = self._clock()
+        self.tokens = min(self.capacity, self.tokens + (now - self._last) * self.rate)
+        self._last = now
+
+    def wait_time(self, amount: float) -> float:
+        """Seconds until `amount` is available (0 when it is now). Not thread-safe; callers lock."""
+        self._refill()
+        amount = min(amount, self.capacity)  # oversized requests wait for a full bucket
+        if self.tokens >= amount:
+            return 0.0
+        return (amount - self.tokens) / self.rate
+
+    def take(self, amount: float) -> None:
+        self.tokens -= min(amount, self.capacity)
+
+
+class _Ticket:
+    __slots__ = ("tokens", "priority", "flow", "enqueued", "grant", "cancelled")
+
+    def __init__(self, tokens: int, priority: str, flow: str, grant: Callable[[], None]):
+        self.tokens = tokens
+        self.priority = priority
+        self.flow = flow
+        self.enqueued = time.monotonic()
+        self.grant = grant
+        self.cancelled = False
+
+
+class RequestScheduler:
+    """
+    Admission control for one provider quota. `rpm` / `tpm` of None disable that
+    bucket. A daemon dispatcher thread grants tickets; blocking callers wait on
+    an Event and coroutines on a future, so both can share one quota.
+    """
+    def __init__(self, rpm: Optional[float] = None, tpm: Optional[float] = None,
+                 rpm_burst: Optional[float] = None, tpm_burst: Optional[float] = None,
+                 metrics: MetricsRegistry = DEFAULT_METRICS):
+        self.requests = TokenBucket(rpm, rpm_burst) if rpm else None
+        self.tokens = TokenBucket(tpm, tpm_burst) if tpm else None
+        # priority -> flow -> FIFO of tickets; flows rotate for round-robin
+        self._queues: Dict[str, "OrderedDict[str, Deque[_Ticket]]"] = {p: OrderedDict() for p in PRIORITIES}
+        self._cond = threading.Condition()
+        self._thread: Optional[threading.Thread] = None
+        self._closed = False
+        self.queue_depth = metrics.gauge(
+            "scheduler_queue_depth", "Provider calls waiting for quota.", ("priority",))
+        self.wait_seconds = metrics.histogram(
+            "scheduler_wait_seconds", "Time provider calls waited for quota.", ("priority",))
+        self.dispatched = metrics.counter(
+            "scheduler_dispatched_total", "Provider calls admitted.", ("priority",))
+
+    def depth(self, priority: Optional[str] = None) -> int:
+        with self._cond:
+            prios = [priority] if priority else PRIORITIES
+            return sum(len(q) for p in prios for q in self._queues[p].values())
+
+    def _enqueue(self, ticket: _Ticket) -> None:
+        with self._cond:
+            if self._closed:
+                raise RuntimeError("scheduler is closed")
+            self._queues[ticket.priority].setdefault(ticket.flow, deque()).append(ticket)
+            self.queue_depth.inc(priority=ticket.priority)
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._dispatch_loop, name="request-scheduler", daemon=True)
+                self._thread.start()
+            self._cond.notify()
+
+    def _head(self) -> Optional[_Ticket]:
+        for priority in PRIORITIES:
+            flows = self._queues[priority]
+            while flows:
+                flow, tickets = next(iter(flows.items()))
+                while tickets and tickets[0].cancelled:
+                    tickets.popleft()
+                    self.queue_depth.dec(priority=priority)
+                if tickets:
+                    return tickets[0]
+                del flows[flow]
+        return None
+
+    def _pop(self, ticket: _Ticket) -> None:
+        flows = self._queues[ticket.priority]
+        tickets = flows[ticket.flow]
+        tickets.popleft()
+        # Round-robin: the flow that was just served goes to the back.
+        del flows[ticket.flow]
+        if tickets:
+            flows[ticket.flow] = tickets
+        self.queue_depth.dec(priority=ticket.priority)
+
+    def _dispatch_loop(self) -> None:
+        with self._cond:
+            while not self._closed:
+                ticket = self._head()
+                if ticket is None:
+                    self._cond.wait()
+                    continue
+                wait = 0.0
+                if self.requests is not None:
+                    wait = max(wait, self.requests.wait_time(1))
+                if self.tokens is not None:
+                    wait = max(wait, self.tokens.wait_time(ticket.tokens))
+                if wait > 0:
+                    # A higher-priority arrival notifies and is re-evaluated first.
+                    self._cond.wait(wait)
+                    continue
+                if self.requests is not None:
+                    self.requests.take(1)
+                if self.tokens is not None:
+                    self.tokens.take(ticket.tokens)
+                self._pop(ticket)
+                self.dispatched.inc(priority=ticket.priority)
+                self.wait_seconds.observe(time.monotonic() - ticket.enqueued, priority=ticket.priority)
+                ticket.grant()
+
+    def acquire(self, tokens: int, priority: Optional[str] = None, flow: Optional[str] = None) -> None:
+        """Block until a call costing `tokens` may be sent."""
+        event = threading.Event()
+        self._enqueue(_Ticket(tokens, priority or _priority.get(), flow or _flow.get(), event.set))
+        event.wait()
+
+    async def aacquire(self, tokens: int, priority: Optional[str] = None, flow: Optional[str] = None) -> None:
+        loop = asyncio.get_running_loop()
+        fut = loop.create_future()
+
+        def grant() -> None:
+            loop.call_soon_threadsafe(lambda: fut.done() or fut.set_result(None))
+
+        ticket = _Ticket(tokens, priority or _priority.get(), flow or _flow.get(), grant)
+        self._enqueue(ticket)
+        try:
+            await fut
+        except asyncio.CancelledError:
+            with self._cond:
+                ticket.cancelled = True
+                self._cond.notify()
+            raise
+
+    def close(self) -> None:
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+
+
+class RateLimitedClient(LLMClient, AsyncLLMClient):
+    """
+    Wraps an LLM client so every call first waits for RPM/TPM quota from
+    `scheduler`. The TPM charge is the estimated prompt tokens plus
+    `expected_output_tokens`.
+    """
+    def __init__(self, inner: Any, scheduler: RequestScheduler, estimator: Optional[TokenEstimator] = None,
+                 expected_output_tokens: int = EXPECTED_OUTPUT_TOKENS):
+        self.inner = inner
+        self.scheduler = scheduler
+        self.estimator = estimator or default_estimator()
+        self.expected_output_tokens = expected_output_tokens
+
+    def _cost(self, system: str, user: str) -> int:
+        return self.estimator.count(system) + self.estimator.count(user) + self.expected_output_tokens
+
+    def generate(self, system: str, user: str, temperature: float = 0.1) -> str:
+        self.scheduler.acquire(self._cost(system, user))
+        return self.inner.generate(system=system, user=user, temperature=temperature)
+
+    def generate_stream(self, system: str, user: str, temperature: float = 0.1) -> Iterator[str]:
+        self.scheduler.acquire(self._cost(system, user))
+        if hasattr(self.inner, "generate_stream"):
+            yield from self.inner.generate_stream(system=system, user=user, temperature=temperature)
+        else:
+            yield self.inner.generate(system=system, user=user, temperature=temperature)
+
+    async def _ainner(self, system: str, user: str, temperature: float) -> str:
+        agenerate = getattr(self.inner, "agenerate", None)
+        if agenerate is not None:
+            return await agenerate(system=system, user=user, temperature=temperature)
+        return await asyncio.to_thread(self.inner.generate, system=system, user=user, temperature=temperature)
+
+    async def agenerate(self, system: str, user: str, temperature: float = 0.1) -> str:
+        await self.scheduler.aacquire(self._cost(system, user))
+        return await self._ainner(system, user, temperature)
+
+    async def agenerate_stream(self, system: str, user: str, temperature: float = 0.1) -> AsyncIterator[str]:
+        await self.scheduler.aacquire(self._cost(system, user))
+        if hasattr(self.inner, "agenerate_stream"):
+            async for chunk in self.inner.agenerate_stream(system=system, user=user, temperature=temperature):
+                yield chunk
+        else:
+            yield await self._ainner(system, user, temperature)
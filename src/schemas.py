@@ -1,5 +1,14 @@
 from typing import List, Optional, Union
-from pydantic import BaseModel, Field, field_validator
+from pydantic import BaseModel, Field, ValidationInfo, field_validator
+
+INVEST_CHOICES = ('yes', 'no', 'hold')
+
+# Validation context that rejects values the lax schema would silently accept or
+# default (e.g. invest "Yes" -> "hold"), so callers can repair them first.
+CANONICAL = {"canonical": True}
+
+def _canonical(info: ValidationInfo) -> bool:
+    return bool(info.context and info.context.get("canonical"))
 
 class Market(BaseModel):
     size_estimate: str = Field(..., description="Market size estimate (e.g., '> $100M' or 'unknown')")  
@@ -15,18 +24,25 @@ class BusinessModel(BaseModel):
     monetization_risks: List[str] = Field(default_factory=list)
 
 class Team(BaseModel):
-    founders_count: Union[int, str]
+    founders_count: Union[int, str] = Field(..., description="Number of founders (integer) or 'unknown'")
     strengths: List[str] = Field(default_factory=list)
     gaps: List[str] = Field(default_factory=list)
 
+    @field_validator('founders_count')
+    def founders_count_canonical(cls, v, info: ValidationInfo):
+        if _canonical(info) and isinstance(v, str) and v.strip().isdigit():
+            raise ValueError("founders_count must be an integer, not a digit string")
+        return v
+
 class Recommendation(BaseModel):
     invest: str = Field(..., description="Investment recommendation (yes/no/hold)")
     rationale: str
 
     @field_validator('invest')
-    def invest_must_be_valid(cls, v):
-        allowed = {'yes', 'no', 'hold'}
-        if v not in allowed:
+    def invest_must_be_valid(cls, v, info: ValidationInfo):
+        if v not in INVEST_CHOICES:
+            if _canonical(info):
+                raise ValueError(f"invest must be one of {INVEST_CHOICES}")
             # instead of raising, coerce to a safe default
             # you could also choose "no" instead of "hold"
             return "hold"
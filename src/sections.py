@@ -0,0 +1,89 @@
+# src/sections.py
+"""
+Sectioned generation: the assessment schema split into independent parts.
+
+Each section is a few top-level fields of StartupAssessment with its own
+prompt and its own sub-model for validation. That keeps each completion
+short, so sections can be requested concurrently. The recommendation is
+requested last, with the other sections as context. DeterministicChain
+(sectioned=True) drives the requests and retries; this module only holds the
+section layout, prompts, parsing and merging.
+"""
+import json
+from functools import lru_cache
+from typing import Any, Dict, List, Optional, Tuple
+import logging
+
+from pydantic import BaseModel, ValidationError, create_model
+
+from .schemas import StartupAssessment
+from .field_retry import failing_fields, field_outline
+from .repair import load_repaired, coerce_to_schema
+
+logger = logging.getLogger(__name__)
+
+# Config
+# (section name, top-level fields). Together they cover every StartupAssessment field.
+SECTIONS: Tuple[Tuple[str, Tuple[str, ...]], ...] = (
+    ("overview", ("name", "summary", "assumptions")),
+    ("market", ("market",)),
+    ("product", ("product",)),
+    ("business_model", ("business_model",)),
+    ("team", ("team",)),
+    ("risks", ("risks",)),
+)
+# Generated after the sections above, conditioned on them.
+FINAL_SECTION: Tuple[str, Tuple[str, ...]] = ("recommendation", ("recommendation",))
+
+
+@lru_cache(maxsize=None)
+def section_model(keys: Tuple[str, ...]) -> type:
+    """Sub-model with just `keys` of StartupAssessment (same types, defaults and descriptions)."""
+    fields = StartupAssessment.model_fields
+    return create_model("Section_" + "_".join(keys), **{k: (fields[k].annotation, fields[k]) for k in keys})
+
+
+def build_section_prompt(base_user: str, keys: Tuple[str, ...], context: Optional[Dict[str, Any]] = None,
+                         errors: Optional[List[str]] = None) -> str:
+    """User prompt for one section: the request's input block plus the section's shape and instructions."""
+    fields = StartupAssessment.model_fields
+    shape = {k: field_outline(fields[k].annotation, fields[k].description or "") for k in keys}
+    user = base_user + "REQUIRED_SHAPE:\n" + json.dumps(shape, separators=(",", ":")) + "\n\n"
+    if context:
+        user += "OTHER_SECTIONS (already written; base this section on them):\n" \
+                + json.dumps(context, separators=(",", ":"), default=str) + "\n\n"
+    if errors:
+        user += "PREVIOUS_ATTEMPT_ERRORS:\n" + "\n".join(f"- {e}" for e in errors) + "\n\n"
+    return user + "INSTRUCTIONS:\nReturn only a JSON object with the keys " + json.dumps(list(keys)) + "."
+
+
+def parse_section(raw: str, keys: Tuple[str, ...], repair: bool = True) -> Tuple[Optional[str], Any]:
+    """
+    Parse and validate one section completion against its sub-model.
+    Returns (None, {field: value}) on success, else (error_kind, detail).
+    """
+    model = section_model(keys)
+    try:
+        parsed = json.loads(raw)
+    except (TypeError, ValueError) as e:
+        if not repair:
+            return "invalid_json", e
+        parsed, _ = load_repaired(raw)
+        if parsed is None:
+            return "invalid_json", e
+    if not isinstance(parsed, dict):
+        return "invalid_json", ValueError("section output is not a JSON object")
+    if repair:
+        parsed, _ = coerce_to_schema(parsed, model)
+    try:
+        validated: BaseModel = model.model_validate(parsed)
+    except ValidationError as e:
+        return "validation_failed", e
+    return None, validated.model_dump()
+
+
+def error_lines(detail: Any) -> List[str]:
+    """Short error list for the retry prompt of a section."""
+    if isinstance(detail, ValidationError):
+        return [line for lines in failing_fields(detail).values() for line in lines] or [str(detail)]
+    return [str(detail)]
@@ -0,0 +1,336 @@
+# src/service.py
+"""
+Headless async HTTP service around DeterministicChain (stdlib asyncio only).
+
+Endpoints:
+  POST /v1/analyze        {"input": "...", "session_id": "..."?}  -> one JSON result
+  POST /v1/analyze/batch  {"items": [{"id", "input", "session_id"?}, ...]} or NDJSON
+                          lines of the same objects -> chunked NDJSON, one line per
+                          item in completion order
+  GET  /healthz           liveness + in-flight count
+  GET  /metrics           Prometheus text from the metrics registry
+
+Every analysis runs under a session id: the one supplied, or a fresh one that is
+returned in the body and the X-Session-Id header. At most `max_in_flight`
+analyses run at once; single requests beyond that get 429 with Retry-After.
+Batch items wait for one of at most `max_in_flight - reserved_interactive`
+batch slots, so batches can never take the capacity kept for single requests.
+At most `max_batches` batch requests are accepted at once (429 beyond that),
+and streamed lines are flushed with drain() so a slow reader throttles its own
+batch.
+
+Run: PYTHONPATH=. python -m src.service --port 8080 [--provider mock|openai]
+"""
+import argparse
+import asyncio
+import json
+import uuid
+from typing import Any, Dict, List, Optional, Tuple
+import logging
+
+from .chain import DeterministicChain
+from .metrics import DEFAULT_METRICS, MetricsHooks, MetricsRegistry
+from .scheduler import scheduling_context
+from .utils import dump_json
+
+logger = logging.getLogger(__name__)
+
+# Config
+MAX_IN_FLIGHT = 64  # concurrent chain runs across all requests
+MAX_BATCH_ITEMS = 1000
+BATCH_CONCURRENCY = 16  # concurrent items per batch request
+RESERVED_INTERACTIVE = 16  # in-flight slots batch items never use
+MAX_BATCHES = 8  # batch requests accepted at once
+MAX_BODY_BYTES = 1 << 20
+MAX_HEADER_BYTES = 16 << 10
+RETRY_AFTER_SECONDS = 1
+
+_REASONS = {200: "OK", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed",
+            411: "Length Required", 413: "Payload Too Large", 422: "Unprocessable Entity",
+            429: "Too Many Requests", 500: "Internal Server Error", 502: "Bad Gateway"}
+
+
+class HTTPError(Exception):
+    def __init__(self, status: int, message: str, headers: Optional[Dict[str, str]] = None):
+        super().__init__(message)
+        self.status = status
+        self.message = message
+        self.headers = headers or {}
+
+
+def _result_line(envelope: Dict[str, Any], ok: bool, result: Any) -> bytes:
+    if ok:
+        # Splice the model's own JSON into the envelope instead of dumping a dict.
+        return (json.dumps({**envelope, "ok": True})[:-1] + ', "result": ' + dump_json(result) + "}").encode("utf-8")
+    return json.dumps({**envelope, "ok": False, "error": result}).encode("utf-8")
+
+
+class AnalysisService:
+    def __init__(self, chain: DeterministicChain, max_in_flight: int = MAX_IN_FLIGHT,
+                 max_batch_items: int = MAX_BATCH_ITEMS, batch_concurrency: int = BATCH_CONCURRENCY,
+                 reserved_interactive: int = RESERVED_INTERACTIVE, max_batches: int = MAX_BATCHES,
+                 metrics: MetricsRegistry = DEFAULT_METRICS):
+        self.chain = chain
+        self.max_in_flight = max_in_flight
+        self.max_batch_items = max_batch_items
+        self.batch_concurrency = batch_concurrency
+        # Batch items share at most this many slots; the rest stay free for single requests.
+        self.max_batch_in_flight = max(1, max_in_flight - reserved_interactive)
+        self.max_batches = max_batches
+        self.metrics = metrics
+        self.in_flight = 0
+        self.active_batches = 0
+        self._slots: Optional[asyncio.Semaphore] = None
+        self._batch_slots: Optional[asyncio.Semaphore] = None
+        self.rejected = metrics.counter("service_rejected_total", "Requests rejected by backpressure.")
+        self.in_flight_gauge = metrics.gauge("service_analyses_in_flight", "Chain runs in progress.")
+
+    # --- analysis ------------------------------------------------------
+
+    async def _analyze(self, text: str, session_id: str, priority: str, flow: str) -> Tuple[bool, Any]:
+        async with self._slots:
+            self.in_flight += 1
+            self.in_flight_gauge.inc()
+            try:
+                with scheduling_context(priority, flow=flow):
+                    return await self.chain.arun(text, session_id=session_id)
+            except Exception as e:
+                logger.exception("Chain raised for session %s", session_id)
+                return False, {"error": "chain_exception", "detail": str(e)}
+            finally:
+                self.in_flight -= 1
+                self.in_flight_gauge.dec()
+
+    @staticmethod
+    def _parse_item(obj: Any) -> Tuple[str, str]:
+        if not isinstance(obj, dict):
+            raise HTTPError(400, "expected a JSON object")
+        text = obj.get("input")
+        if not isinstance(text, str) or not text.strip():
+            raise HTTPError(422, "missing 'input'")
+        session_id = obj.get("session_id")
+        return text, session_id if isinstance(session_id, str) and session_id else uuid.uuid4().hex
+
+    async def handle_analyze(self, body: bytes) -> Tuple[int, bytes, Dict[str, str]]:
+        try:
+            obj = json.loads(body)
+        except Exception:
+            raise HTTPError(400, "body is not valid JSON")
+        text, session_id = self._parse_item(obj)
+        if self.in_flight >= self.max_in_flight:
+            self.rejected.inc()
+            raise HTTPError(429, "too many analyses in flight", {"Retry-After": str(RETRY_AFTER_SECONDS)})
+        ok, result = await self._analyze(text, session_id, "interactive", session_id)
+        status = 200 if ok else 502 if result.get("error") == "llm_call_failed" else 422
+        return status, _result_line({"session_id": session_id}, ok, result), {"X-Session-Id": session_id}
+
+    def _batch_items(self, body: bytes, content_type: str) -> List[Dict[str, Any]]:
+        try:
+            if "ndjson" in content_type or "jsonl" in content_type:
+                items = [json.loads(line) for line in body.splitlines() if line.strip()]
+            else:
+                obj = json.loads(body)
+                items = obj.get("items") if isinstance(obj, dict) else obj
+        except Exception:
+            raise HTTPError(400, "body is not valid JSON / NDJSON")
+        if not isinstance(items, list):
+            raise HTTPError(400, "expected {\"items\": [...]}")
+        if len(items) > self.max_batch_items:
+            raise HTTPError(413, f"batch exceeds {self.max_batch_items} items")
+        return items
+
+    async def stream_batch(self, items: List[Any], writer: asyncio.StreamWriter) -> None:
+        batch_id = uuid.uuid4().hex
+        queue: asyncio.Queue = asyncio.Queue()
+        per_batch = asyncio.Semaphore(self.batch_concurrency)
+
+        async def one(index: int, obj: Any) -> None:
+            async with per_batch:
+                item_id = obj.get("id", index) if isinstance(obj, dict) else index
+                try:
+                    text, session_id = self._parse_item(obj)
+                except HTTPError as e:
+                    await queue.put(_result_line({"id": item_id, "index": index}, False,
+                                                 {"error": "invalid_record", "detail": e.message}))
+                    return
+                async with self._batch_slots:
+                    ok, result = await self._analyze(text, session_id, "batch", f"batch:{batch_id}")
+                await queue.put(_result_line({"id": item_id, "index": index, "session_id": session_id}, ok, result))
+
+        tasks = [asyncio.create_task(one(i, obj)) for i, obj in enumerate(items)]
+        try:
+            for _ in range(len(tasks)):
+                line = await queue.get()
+                await _write_chunk(writer, line + b"\n")
+            await _write_chunk(writer, b"")
+        finally:
+            # Client went away: stop the remaining analyses.
+            for t in tasks:
+                t.cancel()
+            self.active_batches -= 1
+
+    def _admit_batch(self) -> None:
+        """Count a new batch request in, or reject it when max_batches are already running."""
+        if self.active_batches >= self.max_batches:
+            self.rejected.inc()
+            raise HTTPError(429, "too many batches in progress", {"Retry-After": str(RETRY_AFTER_SECONDS)})
+        self.active_batches += 1
+
+    # --- HTTP ----------------------------------------------------------
+
+    async def handle_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        if self._slots is None:
+            self._slots = asyncio.Semaphore(self.max_in_flight)
+            self._batch_slots = asyncio.Semaphore(self.max_batch_in_flight)
+        try:
+            while True:
+                request = await _read_request(reader)
+                if request is None:
+                    break
+                method, path, headers, body = request
+                keep_alive = headers.get("connection", "").lower() != "close"
+                try:
+                    if path == "/v1/analyze/batch" and method == "POST":
+                        items = self._batch_items(body, headers.get("content-type", ""))
+                        self._admit_batch()  # released when stream_batch finishes
+                        writer.write(_head(200, {"Content-Type": "application/x-ndjson",
+                                                 "Transfer-Encoding": "chunked"}, keep_alive))
+                        await self.stream_batch(items, writer)
+                    else:
+                        status, payload, extra = await self._route(method, path, body)
+                        writer.write(_response(status, payload, extra, keep_alive))
+                        await writer.drain()
+                except HTTPError as e:
+                    writer.write(_response(e.status, json.dumps({"error": e.message}).encode("utf-8"),
+                                           e.headers, keep_alive))
+                    await writer.drain()
+                if not keep_alive:
+                    break
+        except HTTPError as e:
+            # Malformed framing: answer once and drop the connection.
+            writer.write(_response(e.status, json.dumps({"error": e.message}).encode("utf-8"), e.headers, False))
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            try:
+                await writer.drain()
+                writer.close()
+                await writer.wait_closed()
+            except Exception:
+                pass
+
+    async def _route(self, method: str, path: str, body: bytes) -> Tuple[int, bytes, Dict[str, str]]:
+        if path == "/v1/analyze":
+            if method != "POST":
+                raise HTTPError(405, "use POST")
+            status, payload, extra = await self.handle_analyze(body)
+            return status, payload, {"Content-Type": "application/json", **extra}
+        if path == "/healthz":
+            return 200, json.dumps({"ok": True, "in_flight": self.in_flight,
+                                    "batches": self.active_batches}).encode("utf-8"), \
+                {"Content-Type": "application/json"}
+        if path == "/metrics":
+            return 200, self.metrics.render_prometheus().encode("utf-8"), \
+                {"Content-Type": "text/plain; version=0.0.4; charset=utf-8"}
+        if path == "/v1/analyze/batch":
+            raise HTTPError(405, "use POST")
+        raise HTTPError(404, "not found")
+
+    async def serve(self, host: str = "127.0.0.1", port: int = 8080) -> asyncio.AbstractServer:
+        server = await asyncio.start_server(self.handle_connection, host, port, limit=MAX_HEADER_BYTES)
+        logger.info("Analysis service listening on %s", [s.getsockname() for s in server.sockets])
+        return server
+
+
+async def _read_request(reader: asyncio.StreamReader) -> Optional[Tuple[str, str, Dict[str, str], bytes]]:
+    try:
+        head = await reader.readuntil(b"\r\n\r\n")
+    except asyncio.IncompleteReadError as e:
+        if e.partial.strip():
+            raise HTTPError(400, "incomplete request")
+        return None
+    except asyncio.LimitOverrunError:
+        raise HTTPError(413, "headers too large")
+    lines = head.decode("latin-1").split("\r\n")
+    try:
+        method, target, _version = lines[0].split(" ", 2)
+    except ValueError:
+        raise HTTPError(400, "bad request line")
+    headers: Dict[str, str] = {}
+    for line in lines[1:]:
+        if ":" in line:
+            name, value = line.split(":", 1)
+            headers[name.strip().lower()] = value.strip()
+    body = b""
+    if method in ("POST", "PUT"):
+        if "chunked" in headers.get("transfer-encoding", "").lower():
+            raise HTTPError(411, "chunked request bodies are not supported; send Content-Length")
+        try:
+            length = int(headers.get("content-length", "0"))
+        except ValueError:
+            raise HTTPError(400, "bad Content-Length")
+        if length > MAX_BODY_BYTES:
+            raise HTTPError(413, f"body exceeds {MAX_BODY_BYTES} bytes")
+        body = await reader.readexactly(length)
+    return method.upper(), target.split("?", 1)[0], headers, body
+
+
+def _head(status: int, headers: Dict[str, str], keep_alive: bool) -> bytes:
+    lines = [f"HTTP/1.1 {status} {_REASONS.get(status, '')}"]
+    lines += [f"{k}: {v}" for k, v in headers.items()]
+    lines.append("Connection: keep-alive" if keep_alive else "Connection: close")
+    return ("\r\n".join(lines) + "\r\n\r\n").encode("latin-1")
+
+
+def _response(status: int, body: bytes, headers: Dict[str, str], keep_alive: bool) -> bytes:
+    headers = {"Content-Type": "application/json", **headers, "Content-Length": str(len(body))}
+    return _head(status, headers, keep_alive) + body
+
+
+async def _write_chunk(writer: asyncio.StreamWriter, data: bytes) -> None:
+    writer.write(b"%x\r\n%s\r\n" % (len(data), data))
+    await writer.drain()
+
+
+def build_chain(provider: str, model: Optional[str] = None, stream: bool = False) -> DeterministicChain:
+    from .memory import ShortTermMemory
+    if provider == "openai":
+        from .providers import OpenAIClient, OPENAI_DEFAULT_MODEL
+        client: Any = OpenAIClient(model=model or OPENAI_DEFAULT_MODEL)
+    elif provider == "mock":
+        from .models import MockClient
+        from .simulated import SAMPLE_ASSESSMENT
+        client = MockClient(json.dumps(SAMPLE_ASSESSMENT))
+    else:
+        raise ValueError(f"Unknown provider: {provider}")
+    return DeterministicChain(client, ShortTermMemory(), stream=stream, coalesce=True,
+                              hooks=MetricsHooks(DEFAULT_METRICS))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Startup Analyst HTTP service")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--provider", default="mock", choices=["mock", "openai"])
+    parser.add_argument("--model", default=None)
+    parser.add_argument("--stream", action="store_true", help="stream completions from the provider")
+    parser.add_argument("--max-in-flight", type=int, default=MAX_IN_FLIGHT)
+    parser.add_argument("--log-level", default="INFO")
+    args = parser.parse_args()
+    logging.basicConfig(level=args.log_level, format="%(asctime)s [%(levelname)s] %(name)s - %(message)s")
+
+    service = AnalysisService(build_chain(args.provider, args.model, args.stream), max_in_flight=args.max_in_flight)
+
+    async def run() -> None:
+        server = await service.serve(args.host, args.port)
+        async with server:
+            await server.serve_forever()
+
+    try:
+        asyncio.run(run())
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,149 @@
+# src/simulated.py
+import json
+import random
+import threading
+import time
+from collections import Counter
+from typing import AsyncIterator, Callable, Dict, Iterator, Optional, Tuple
+import logging
+
+from .models import LLMClient, AsyncLLMClient
+
+logger = logging.getLogger(__name__)
+
+SAMPLE_ASSESSMENT = {
+    "name": "Demo Startup",
+    "summary": "Marketplace connecting local suppliers to SMBs; revenue: transaction fees.",
+    "market": {"size_estimate": "unknown", "top_markets": ["India"], "competitors": []},
+    "product": {"category": "marketplace", "differentiation": "focus on local logistics"},
+    "business_model": {"revenue_streams": ["transaction fees"], "monetization_risks": []},
+    "team": {"founders_count": "unknown", "strengths": [], "gaps": []},
+    "risks": ["execution risk"],
+    "recommendation": {"invest": "hold", "rationale": "insufficient data on unit economics"},
+    "assumptions": ["market size unknown — estimated qualitatively"],
+}
+
+
+class SimulatedProviderError(RuntimeError):
+    """Injected provider failure (timeout / 5xx stand-in)."""
+
+
+def _invalid_json_variants(text: str):
+    # Unrepairable prose plus the defects local repair can fix.
+    return [
+        "I'm sorry, I can't produce a JSON assessment for this description.",
+        "Here is the assessment:\n```json\n" + text + "\n```",
+        text[: len(text) // 2],
+    ]
+
+
+def _schema_violation(obj: dict, rng: random.Random) -> dict:
+    broken = json.loads(json.dumps(obj))
+    choice = rng.randrange(3)
+    if choice == 0:
+        broken.pop("summary", None)
+    elif choice == 1:
+        broken["recommendation"] = {"invest": "hold"}
+    else:
+        broken["team"] = "two founders"
+    return broken
+
+
+class SimulatedClient(LLMClient, AsyncLLMClient):
+    """
+    Configurable stand-in for a real provider, for load tests and benchmarks.
+
+    Latency is log-normal around `latency_ms` (median) with `latency_sigma`, or
+    drawn from `latency_fn()` in seconds. Each call independently fails with
+    `error_rate`, returns invalid JSON with `invalid_json_rate` or a
+    schema-violating object with `schema_violation_rate`. Sync, async and
+    streaming calls are supported; `outcomes` counts what was served.
+    """
+    def __init__(
+        self,
+        response: Optional[dict] = None,
+        latency_ms: float = 800.0,
+        latency_sigma: float = 0.4,
+        error_rate: float = 0.0,
+        invalid_json_rate: float = 0.0,
+        schema_violation_rate: float = 0.0,
+        seed: Optional[int] = None,
+        latency_fn: Optional[Callable[[], float]] = None,
+        chunk_size: int = 16,
+        model: str = "simulated",
+    ):
+        self.response = response or SAMPLE_ASSESSMENT
+        self.response_text = json.dumps(self.response)
+        self.latency_ms = latency_ms
+        self.latency_sigma = latency_sigma
+        self.error_rate = error_rate
+        self.invalid_json_rate = invalid_json_rate
+        self.schema_violation_rate = schema_violation_rate
+        self.latency_fn = latency_fn
+        self.chunk_size = chunk_size
+        self.model = model
+        self.outcomes: Counter = Counter()
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+
+    def _plan(self) -> Tuple[float, str, Optional[str]]:
+        """Draw (latency_seconds, outcome, text) for one call."""
+        with self._lock:
+            if self.latency_fn is not None:
+                latency = max(0.0, self.latency_fn())
+            else:
+                latency = self._rng.lognormvariate(0.0, self.latency_sigma) * self.latency_ms / 1000.0
+            r = self._rng.random()
+            if r < self.error_rate:
+                outcome, text = "error", None
+            elif r < self.error_rate + self.invalid_json_rate:
+                outcome, text = "invalid_json", self._rng.choice(_invalid_json_variants(self.response_text))
+            elif r < self.error_rate + self.invalid_json_rate + self.schema_violation_rate:
+                outcome, text = "schema_violation", json.dumps(_schema_violation(self.response, self._rng))
+            else:
+                outcome, text = "ok", self.response_text
+            self.outcomes[outcome] += 1
+        return latency, outcome, text
+
+    def generate(self, system: str, user: str, temperature: float = 0.1) -> str:
+        latency, outcome, text = self._plan()
+        time.sleep(latency)
+        if outcome == "error":
+            raise SimulatedProviderError("simulated provider error")
+        return text
+
+    async def agenerate(self, system: str, user: str, temperature: float = 0.1) -> str:
+        import asyncio  # loaded by the running loop; kept off the import path of sync users
+        latency, outcome, text = self._plan()
+        await asyncio.sleep(latency)
+        if outcome == "error":
+            raise SimulatedProviderError("simulated provider error")
+        return text
+
+    def _chunks(self, text: str):
+        return [text[i:i + self.chunk_size] for i in range(0, len(text), self.chunk_size)] or [""]
+
+    def generate_stream(self, system: str, user: str, temperature: float = 0.1) -> Iterator[str]:
+        latency, outcome, text = self._plan()
+        if outcome == "error":
+            time.sleep(latency)
+            raise SimulatedProviderError("simulated provider error")
+        chunks = self._chunks(text)
+        for chunk in chunks:
+            time.sleep(latency / len(chunks))
+            yield chunk
+
+    async def agenerate_stream(self, system: str, user: str, temperature: float = 0.1) -> AsyncIterator[str]:
+        import asyncio
+        latency, outcome, text = self._plan()
+        if outcome == "error":
+            await asyncio.sleep(latency)
+            raise SimulatedProviderError("simulated provider error")
+        chunks = self._chunks(text)
+        for chunk in chunks:
+            await asyncio.sleep(latency / len(chunks))
+            yield chunk
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return dict(self.outcomes)
@@ -0,0 +1,121 @@
+# src/speculative.py
+"""
+Speculative multi-candidate generation policy.
+
+With speculation on, each attempt of DeterministicChain asks for N candidate
+completions at once and keeps the first one that validates, so a bad
+completion no longer costs a whole extra round-trip. N follows the measured
+per-candidate validity rate p: all N candidates fail with probability
+(1 - p)^N, and N is the smallest count that keeps this at or below
+1 - target_quantile. The target quantile of requests (e.g. p99) then
+finishes in one round-trip.
+
+That formula assumes candidates fail independently, which only roughly
+holds when they are sampled at different, fairly high temperatures; at
+the same low temperature they are near copies and fail together. So
+candidates are spread from the chain's temperature up to
+`spread_temperature`, and the policy also measures how often a whole
+attempt failed against how often the formula predicted it would. When
+failures are correlated, N is scaled up by the measured shortfall.
+"""
+import math
+import threading
+from typing import Dict, List, Optional
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Config
+TARGET_QUANTILE = 0.99
+MIN_CANDIDATES = 1
+MAX_CANDIDATES = 5
+INITIAL_VALIDITY = 0.8  # assumed until candidates have been measured
+EWMA_ALPHA = 0.05  # weight of each new candidate in the validity estimate
+SPREAD_TEMPERATURE = 0.8  # temperature of the last candidate of an attempt
+MIN_ATTEMPTS_FOR_CORRELATION = 50  # attempts observed before N is corrected for correlation
+MIN_EFFICIENCY = 0.2  # lower bound of the measured independence factor
+
+
+class SpeculationPolicy:
+    """
+    Picks the candidate count per attempt. Set `fixed_n` to turn off tuning;
+    otherwise `record(valid)` updates an exponentially weighted validity rate
+    for every candidate that finished.
+    """
+    def __init__(self, target_quantile: float = TARGET_QUANTILE, min_n: int = MIN_CANDIDATES,
+                 max_n: int = MAX_CANDIDATES, initial_rate: float = INITIAL_VALIDITY,
+                 alpha: float = EWMA_ALPHA, fixed_n: Optional[int] = None,
+                 spread_temperature: Optional[float] = SPREAD_TEMPERATURE):
+        if not 0 < target_quantile < 1:
+            raise ValueError("target_quantile must be between 0 and 1")
+        self.target_quantile = target_quantile
+        self.min_n = min_n
+        self.max_n = max_n
+        self.alpha = alpha
+        self.fixed_n = fixed_n
+        # None keeps every candidate at the chain's temperature.
+        self.spread_temperature = spread_temperature
+        self._rate = initial_rate
+        self._lock = threading.Lock()
+        self.candidates = 0
+        self.valid = 0
+        # Per attempt: how many failed outright, and the sum of (1 - p)^n predicted for them.
+        self.attempts = 0
+        self.failed_attempts = 0
+        self._predicted_failures = 0.0
+
+    @property
+    def validity_rate(self) -> float:
+        return self._rate
+
+    def record(self, valid: bool) -> None:
+        with self._lock:
+            self.candidates += 1
+            self.valid += int(valid)
+            self._rate += self.alpha * (float(valid) - self._rate)
+
+    def record_attempt(self, n: int, any_valid: bool) -> None:
+        """One speculative attempt of `n` candidates finished; `any_valid` if one validated."""
+        with self._lock:
+            self.attempts += 1
+            self.failed_attempts += int(not any_valid)
+            self._predicted_failures += (1 - self._clamped_rate()) ** n
+
+    def _clamped_rate(self) -> float:
+        return min(max(self._rate, 1e-3), 1 - 1e-9)
+
+    @property
+    def efficiency(self) -> float:
+        """
+        Measured independence of candidates: 1.0 when attempts fail as often as
+        (1 - p)^n predicts, towards 1/n when candidates fail together.
+        """
+        expected = self._predicted_failures
+        # Within about two standard deviations (Poisson) of the prediction is noise, not correlation.
+        if self.attempts < MIN_ATTEMPTS_FOR_CORRELATION or self.failed_attempts <= expected + 2 * math.sqrt(expected):
+            return 1.0
+        observed = self.failed_attempts / self.attempts
+        predicted = expected / self.attempts
+        if predicted <= 0:
+            return 1.0
+        # Effective candidate count relative to n: solve observed = predicted ** efficiency.
+        return max(MIN_EFFICIENCY, min(1.0, math.log(observed) / math.log(predicted)))
+
+    def n(self) -> int:
+        if self.fixed_n is not None:
+            return self.fixed_n
+        p = self._clamped_rate()
+        needed = math.log(1 - self.target_quantile) / math.log(1 - p) / self.efficiency
+        return max(self.min_n, min(self.max_n, math.ceil(needed)))
+
+    def temperatures(self, base: float, n: int) -> List[float]:
+        """Per-candidate temperatures: the first at `base`, the rest spread up to spread_temperature."""
+        if self.spread_temperature is None or n == 1 or self.spread_temperature <= base:
+            return [base] * n
+        step = (self.spread_temperature - base) / (n - 1)
+        return [round(base + i * step, 3) for i in range(n)]
+
+    def stats(self) -> Dict[str, float]:
+        return {"candidates": self.candidates, "valid": self.valid,
+                "validity_rate": round(self._rate, 4), "attempts": self.attempts,
+                "failed_attempts": self.failed_attempts, "efficiency": round(self.efficiency, 3), "n": self.n()}
@@ -0,0 +1,258 @@
+# src/streaming.py
+import json
+import typing
+from typing import Any, Callable, Dict, List, Optional
+import logging
+
+from pydantic import BaseModel
+
+from .schemas import StartupAssessment
+
+logger = logging.getLogger(__name__)
+
+_WHITESPACE = " \t\r\n"
+_LITERAL_CHARS = set("0123456789+-.eEtruefalsn")
+MAX_PREAMBLE = 200  # chars of fence/prose tolerated before the object in repairable mode
+
+
+class StreamAbort(Exception):
+    """
+    Raised by StreamingJSONValidator once the stream can no longer become a valid
+    StartupAssessment. `kind` is "invalid_json" or "validation_failed".
+    """
+    def __init__(self, kind: str, reason: str, position: int):
+        super().__init__(f"{reason} (at char {position})")
+        self.kind = kind
+        self.reason = reason
+        self.position = position
+
+
+def _expected_kind(annotation: Any) -> Optional[str]:
+    if annotation is str:
+        return "string"
+    if isinstance(annotation, type) and issubclass(annotation, BaseModel):
+        return "object"
+    if typing.get_origin(annotation) in (list, List):
+        return "array"
+    return None
+
+
+def _top_level_kinds(model: type) -> Dict[str, Optional[str]]:
+    return {name: _expected_kind(field.annotation) for name, field in model.model_fields.items()}
+
+
+_VALUE_KIND_BY_CHAR = {'"': "string", "{": "object", "[": "array"}
+
+
+class StreamingJSONValidator:
+    """
+    Incremental checker for a streamed StartupAssessment completion.
+
+    Feed chunks as they arrive. The validator tracks JSON structure character by
+    character and raises StreamAbort as soon as the text cannot parse (prose
+    preamble, code fences, bad tokens, trailing text) or a top-level field has the
+    wrong JSON type. Each top-level field is passed to `on_field(name, value)` as
+    soon as its value is complete, so callers can show e.g. `name` and `summary`
+    before generation finishes.
+
+    With `repairable=True` the validator lets through the defects src/repair.py
+    fixes locally: a short fence/prose preamble, trailing commas, text after the
+    object and truncation. `done` turns true once the object is closed so the
+    caller can stop reading.
+    """
+    def __init__(self, on_field: Optional[Callable[[str, Any], None]] = None, model: type = StartupAssessment,
+                 repairable: bool = False, max_preamble: int = MAX_PREAMBLE):
+        self.on_field = on_field
+        self.repairable = repairable
+        self.max_preamble = max_preamble if repairable else 0
+        self.kinds = _top_level_kinds(model)
+        self.fields: Dict[str, Any] = {}
+        self._buf: List[str] = []
+        self._pos = 0
+        # Stack of [container, state]; container is "{" or "[".
+        self._stack: List[List[str]] = []
+        self._started = False
+        self._done = False
+        self._in_string = False
+        self._escape = False
+        self._literal: List[str] = []
+        self._key_chars: List[str] = []
+        self._reading_key = False
+        self._current_key: Optional[str] = None
+        self._value_start: Optional[int] = None
+
+    @property
+    def text(self) -> str:
+        return "".join(self._buf)
+
+    @property
+    def done(self) -> bool:
+        return self._done
+
+    def _abort(self, reason: str, kind: str = "invalid_json") -> None:
+        raise StreamAbort(kind, reason, self._pos)
+
+    def feed(self, chunk: str) -> None:
+        for ch in chunk:
+            self._buf.append(ch)
+            self._step(ch)
+            self._pos += 1
+
+    def close(self) -> str:
+        """Signal end of stream; returns the full text or raises StreamAbort if incomplete."""
+        if self._literal:
+            self._end_literal()
+        if not self._done and not self.repairable:
+            self._abort("stream ended before the JSON object was closed")
+        return self.text
+
+    # --- state machine -------------------------------------------------
+
+    def _step(self, ch: str) -> None:
+        if self._in_string:
+            self._string_char(ch)
+            return
+        if self._literal:
+            if ch in _LITERAL_CHARS:
+                self._literal.append(ch)
+                return
+            self._end_literal()
+        if ch in _WHITESPACE:
+            return
+        if self._done:
+            if self.repairable:
+                return
+            self._abort("unexpected text after the JSON object")
+        if not self._started:
+            if ch != "{":
+                if self._pos < self.max_preamble:
+                    return
+                self._abort(f"output must start with '{{', got {ch!r}")
+            self._started = True
+            self._stack.append(["{", "key_or_end"])
+            return
+
+        container, state = self._stack[-1]
+        if container == "{":
+            if state in ("key_or_end", "key"):
+                if ch == "}" and (state == "key_or_end" or self.repairable):
+                    self._close_container()
+                elif ch == '"':
+                    self._in_string = True
+                    self._reading_key = True
+                    self._key_chars = []
+                else:
+                    self._abort(f"expected object key, got {ch!r}")
+            elif state == "colon":
+                if ch != ":":
+                    self._abort(f"expected ':', got {ch!r}")
+                self._stack[-1][1] = "value"
+            elif state == "value":
+                self._start_value(ch)
+            elif state == "comma_or_end":
+                if ch == ",":
+                    self._stack[-1][1] = "key"
+                elif ch == "}":
+                    self._close_container()
+                else:
+                    self._abort(f"expected ',' or '}}', got {ch!r}")
+        else:
+            if state in ("value_or_end", "value"):
+                if ch == "]" and (state == "value_or_end" or self.repairable):
+                    self._close_container()
+                else:
+                    self._start_value(ch)
+            elif state == "comma_or_end":
+                if ch == ",":
+                    self._stack[-1][1] = "value"
+                elif ch == "]":
+                    self._close_container()
+                else:
+                    self._abort(f"expected ',' or ']', got {ch!r}")
+
+    def _string_char(self, ch: str) -> None:
+        if self._escape:
+            self._escape = False
+        elif ch == "\\":
+            self._escape = True
+        elif ch == '"':
+            self._in_string = False
+            if self._reading_key:
+                self._reading_key = False
+                if len(self._stack) == 1:
+                    self._current_key = json.loads('"' + "".join(self._key_chars) + '"')
+                self._stack[-1][1] = "colon"
+                return
+            self._value_done()
+            return
+        elif ord(ch) < 0x20:
+            self._abort("control character inside string")
+        if self._reading_key:
+            self._key_chars.append(ch)
+
+    def _start_value(self, ch: str) -> None:
+        # Parent state becomes "comma_or_end" once this value completes.
+        self._stack[-1][1] = "pending"
+        if len(self._stack) == 1:
+            self._check_top_level_kind(ch)
+            self._value_start = self._pos
+        if ch == '"':
+            self._in_string = True
+        elif ch == "{":
+            self._stack.append(["{", "key_or_end"])
+        elif ch == "[":
+            self._stack.append(["[", "value_or_end"])
+        elif ch in _LITERAL_CHARS:
+            self._literal = [ch]
+        else:
+            self._abort(f"unexpected character {ch!r}")
+
+    def _end_literal(self) -> None:
+        literal = "".join(self._literal)
+        self._literal = []
+        try:
+            json.loads(literal)
+        except ValueError:
+            self._abort(f"invalid literal {literal!r}")
+        self._value_done(end=self._pos)
+
+    def _close_container(self) -> None:
+        self._stack.pop()
+        if not self._stack:
+            self._done = True
+            return
+        self._value_done()
+
+    def _value_done(self, end: Optional[int] = None) -> None:
+        parent = self._stack[-1]
+        parent[1] = "comma_or_end"
+        if len(self._stack) == 1 and self._current_key is not None and self._value_start is not None:
+            stop = (self._pos if end is None else end - 1) + 1
+            key, start = self._current_key, self._value_start
+            self._current_key = None
+            self._value_start = None
+            try:
+                value = json.loads("".join(self._buf[start:stop]))
+            except ValueError:
+                # Only reachable in repairable mode (e.g. a trailing comma inside the value).
+                return
+            self._report(key, value)
+
+    def _check_top_level_kind(self, ch: str) -> None:
+        expected = self.kinds.get(self._current_key) if self._current_key else None
+        if expected is None:
+            return
+        actual = _VALUE_KIND_BY_CHAR.get(ch, "literal")
+        if self.repairable and expected != "object":
+            # Scalars in string fields and strings/null in list fields are coerced by repair.
+            return
+        if actual != expected:
+            self._abort(f"field '{self._current_key}' must be a JSON {expected}", kind="validation_failed")
+
+    def _report(self, key: str, value: Any) -> None:
+        if key == "summary" and isinstance(value, str) and not value.strip():
+            self._abort("summary cannot be empty", kind="validation_failed")
+        self.fields[key] = value
+        logger.debug("Streamed field complete: %s", key)
+        if self.on_field is not None:
+            self.on_field(key, value)
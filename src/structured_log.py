@@ -0,0 +1,168 @@
+# src/structured_log.py
+"""
+Structured, low-overhead logging for the request hot path.
+
+In "structured" mode the per-stage DEBUG/INFO lines of the src.* modules are
+disabled (so their arguments are never formatted), and RequestLogHooks emits a
+single JSON event per chain request. Records go through a QueueHandler and are
+formatted and written by a background QueueListener thread, so request threads
+never block on stderr.
+"""
+import atexit
+import copy
+import json
+import logging
+import logging.handlers
+import queue
+import random
+import sys
+from typing import Any, Dict, Optional, TextIO
+
+from .metrics import ChainHooks
+
+logger = logging.getLogger(__name__)
+
+# Config
+REQUEST_LOGGER = "src.requests"
+DEBUG_SAMPLE_RATE = 0.01  # fraction of requests whose events carry per-stage detail
+STAGE_LOGGERS = ("src.chain", "src.memory", "src.models", "src.streaming", "src.repair", "src.providers")
+LOG_MODES = ("debug", "structured")
+
+_listener: Optional[logging.handlers.QueueListener] = None
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line. A dict `msg` is merged in as the event body."""
+    def format(self, record: logging.LogRecord) -> str:
+        event: Dict[str, Any] = {
+            "ts": round(record.created, 6),
+            "level": record.levelname,
+            "logger": record.name,
+        }
+        if isinstance(record.msg, dict):
+            event.update(record.msg)
+        else:
+            event["msg"] = record.getMessage()
+        if record.exc_info:
+            event["exc"] = self.formatException(record.exc_info)
+        return json.dumps(event, default=str, ensure_ascii=False)
+
+
+class _DeferredQueueHandler(logging.handlers.QueueHandler):
+    """
+    QueueHandler that leaves formatting of request events to the listener
+    thread. Those carry a per-request event dict that is no longer touched
+    once logged, so passing it through as-is is safe. Any other record
+    (third-party loggers included) may have mutable args, so its message is
+    rendered in the caller before it is queued.
+    """
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        if record.name == REQUEST_LOGGER or not record.args:
+            return record
+        record = copy.copy(record)  # other handlers still see the original
+        record.msg = record.getMessage()
+        record.args = None
+        return record
+
+
+def configure_logging(mode: str = "structured", level: int = logging.INFO,
+                      stream: Optional[TextIO] = None) -> None:
+    """
+    Replace the root handlers.
+
+    "debug" is the classic synchronous text handler with every stage logged.
+    "structured" writes JSON lines through a background queue and silences the
+    per-stage loggers below WARNING; pair it with RequestLogHooks on the chain.
+    """
+    global _listener
+    if mode not in LOG_MODES:
+        raise ValueError(f"unknown log mode {mode!r}; expected one of {LOG_MODES}")
+    stop_logging()
+    stream = stream or sys.stderr
+    root = logging.getLogger()
+    for h in list(root.handlers):
+        root.removeHandler(h)
+        h.close()
+
+    if mode == "debug":
+        handler = logging.StreamHandler(stream)
+        handler.setFormatter(logging.Formatter("%(asctime)s [%(levelname)s] %(name)s - %(message)s"))
+        root.addHandler(handler)
+        root.setLevel(level)
+        for name in STAGE_LOGGERS:
+            logging.getLogger(name).setLevel(logging.NOTSET)
+        return
+
+    sink = logging.StreamHandler(stream)
+    sink.setFormatter(JsonFormatter())
+    q: "queue.SimpleQueue[logging.LogRecord]" = queue.SimpleQueue()
+    root.addHandler(_DeferredQueueHandler(q))
+    root.setLevel(level)
+    # Disabled loggers short-circuit in isEnabledFor before any %-formatting.
+    for name in STAGE_LOGGERS:
+        logging.getLogger(name).setLevel(logging.WARNING)
+    logging.getLogger(REQUEST_LOGGER).setLevel(logging.INFO)
+    _listener = logging.handlers.QueueListener(q, sink, respect_handler_level=True)
+    _listener.start()
+
+
+def stop_logging() -> None:
+    """Flush and stop the background listener, if any."""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+
+
+atexit.register(stop_logging)
+
+
+class RequestLogHooks(ChainHooks):
+    """
+    Emits one structured event per chain request (id, session, outcome, attempts,
+    duration, repairs). A `sample_rate` fraction of requests also carries
+    per-stage timings and attempt errors. Unsampled requests only pay for a
+    dict lookup per stage.
+    """
+    def __init__(self, sample_rate: float = DEBUG_SAMPLE_RATE, log: Optional[logging.Logger] = None,
+                 rng: Optional[random.Random] = None):
+        self.sample_rate = sample_rate
+        self.log = log or logging.getLogger(REQUEST_LOGGER)
+        self._rng = rng or random.Random()
+        # request_id -> event under construction
+        self._events: Dict[str, Dict[str, Any]] = {}
+
+    def on_request_start(self, ctx):
+        event: Dict[str, Any] = {"event": "chain.request", "request_id": ctx.request_id,
+                                 "session_id": ctx.session_id}
+        if getattr(ctx, "prompt_tokens", None) is not None:
+            event["prompt_tokens"] = ctx.prompt_tokens
+        if self.sample_rate and self._rng.random() < self.sample_rate:
+            event["debug"] = {"input_chars": len(ctx.user_input or ""), "prompt_chars": len(ctx.user_prompt),
+                              "stages": [], "errors": []}
+        self._events[ctx.request_id] = event
+
+    def on_stage(self, ctx, stage, seconds):
+        debug = self._events.get(ctx.request_id, {}).get("debug")
+        if debug is not None:
+            debug["stages"].append((stage, ctx.attempt, round(seconds * 1000.0, 3)))
+
+    def on_attempt_end(self, ctx, error_kind):
+        if error_kind is None:
+            return
+        debug = self._events.get(ctx.request_id, {}).get("debug")
+        if debug is not None:
+            debug["errors"].append((ctx.attempt, error_kind))
+
+    def on_repair(self, ctx, repairs):
+        event = self._events.get(ctx.request_id)
+        if event is not None:
+            event["repairs"] = list(repairs)
+
+    def on_request_end(self, ctx, outcome, seconds):
+        event = self._events.pop(ctx.request_id, None)
+        if event is None or not self.log.isEnabledFor(logging.INFO):
+            return
+        event.update(outcome=outcome, attempts=ctx.attempt, duration_ms=round(seconds * 1000.0, 3))
+        level = logging.INFO if outcome == "success" else logging.WARNING
+        self.log.log(level, event)
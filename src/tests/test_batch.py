@@ -0,0 +1,53 @@
+import json
+from src.batch import run_batch, BatchCheckpoint
+from src.chain import DeterministicChain
+from src.models import MockClient
+from src.memory import ShortTermMemory
+from src.tests.test_chain import VALID_JSON_STR
+
+
+class CountingMock(MockClient):
+    def __init__(self, response_text):
+        super().__init__(response_text)
+        self.calls = 0
+
+    def generate(self, system, user, temperature=0.1):
+        self.calls += 1
+        return super().generate(system, user, temperature)
+
+
+def _write_input(path, n):
+    with open(path, "w") as f:
+        for i in range(n):
+            f.write(json.dumps({"id": f"r{i}", "input": f"Startup number {i}"}) + "\n")
+        f.write("\n")
+        f.write("not-json\n")
+
+
+def test_batch_writes_results_and_failures(tmp_path):
+    inp, out = tmp_path / "in.jsonl", tmp_path / "out.jsonl"
+    _write_input(inp, 20)
+    chain = DeterministicChain(MockClient(VALID_JSON_STR), ShortTermMemory())
+    stats = run_batch(chain, str(inp), str(out), concurrency=4)
+    lines = [json.loads(l) for l in out.read_text().splitlines()]
+    assert stats["succeeded"] == 20 and stats["failed"] == 1
+    assert sorted(l["id"] for l in lines if l["ok"]) == sorted(f"r{i}" for i in range(20))
+    assert [l["error"]["error"] for l in lines if not l["ok"]] == ["invalid_record"]
+    assert lines[0]["result"]["name"] == "Acme Market"
+
+
+def test_batch_resumes_from_checkpoint(tmp_path):
+    inp, out, ckpt = tmp_path / "in.jsonl", tmp_path / "out.jsonl", tmp_path / "ckpt.json"
+    _write_input(inp, 10)
+    # Simulate a crash after lines 0-4 and 7 finished.
+    ckpt.write_text(json.dumps({"next_index": 5, "done_above": [7]}))
+    mock = CountingMock(VALID_JSON_STR)
+    chain = DeterministicChain(mock, ShortTermMemory())
+    stats = run_batch(chain, str(inp), str(out), concurrency=2, checkpoint_path=str(ckpt))
+    assert mock.calls == 4  # lines 5, 6, 8, 9
+    assert stats["skipped"] == 6
+    assert BatchCheckpoint(str(ckpt)).next_index == 12
+
+    # A second run has nothing left to do.
+    stats = run_batch(chain, str(inp), str(out), concurrency=2, checkpoint_path=str(ckpt))
+    assert mock.calls == 4 and stats["processed"] == 0
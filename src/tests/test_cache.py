@@ -0,0 +1,59 @@
+import time
+from src.cache import CachingClient, LRUCache
+from src.chain import DeterministicChain
+from src.memory import ShortTermMemory
+from src.tests.test_chain import VALID_JSON_STR
+
+
+class SequenceMock:
+    def __init__(self, seq):
+        self.seq = seq
+        self.i = 0
+    def generate(self, system, user, temperature=0.1):
+        out = self.seq[min(self.i, len(self.seq)-1)]
+        self.i += 1
+        return out
+
+
+def test_cache_hits_on_identical_request():
+    inner = SequenceMock([VALID_JSON_STR])
+    client = CachingClient(inner)
+    chain = DeterministicChain(client, ShortTermMemory())
+    for _ in range(3):
+        ok, result = chain.run("Analyze Acme")
+        assert ok is True
+    assert inner.i == 1
+    stats = client.stats()
+    assert stats["hits"] == 2 and stats["misses"] == 1 and stats["stores"] == 1
+
+
+def test_cache_skips_invalid_outputs():
+    inner = SequenceMock(["not-json", VALID_JSON_STR])
+    client = CachingClient(inner)
+    assert client.generate("sys", "user") == "not-json"
+    assert client.generate("sys", "user") == VALID_JSON_STR
+    assert client.generate("sys", "user") == VALID_JSON_STR
+    assert inner.i == 2
+    assert client.generate("sys", "user", temperature=0.5) == VALID_JSON_STR
+    assert inner.i == 3
+
+
+def test_lru_evicts_by_size_and_ttl():
+    lru = LRUCache(max_entries=2, ttl=0.05)
+    now = time.time()
+    lru.put("a", ("A", 0.0, now))
+    lru.put("b", ("B", 0.0, now))
+    lru.get("a")
+    lru.put("c", ("C", 0.0, now))
+    assert lru.get("b") is None and lru.get("a") is not None
+    time.sleep(0.06)
+    assert lru.get("a") is None
+
+
+def test_disk_tier_survives_restart(tmp_path):
+    path = str(tmp_path / "cache.sqlite")
+    inner = SequenceMock([VALID_JSON_STR])
+    CachingClient(inner, disk_path=path).generate("sys", "user")
+    restarted = CachingClient(SequenceMock(["not-json"]), disk_path=path, model_name="SequenceMock")
+    assert restarted.generate("sys", "user") == VALID_JSON_STR
+    assert restarted.stats()["disk_hits"] == 1
@@ -0,0 +1,71 @@
+import asyncio
+import time
+import pytest
+from src.cassette import RecordingClient, ReplayClient, CassetteMiss, ReplayedProviderError
+from src.chain import DeterministicChain
+from src.memory import ShortTermMemory
+from src.simulated import SimulatedClient
+
+class _NoBackoff:
+    def delay(self, attempt, error_kind):
+        return 0.0
+
+
+INPUTS = [f"Startup {i} builds tools for SMB logistics." for i in range(20)]
+
+
+def _record(path, **kwargs):
+    recorder = RecordingClient(SimulatedClient(latency_ms=1, seed=5, **kwargs), str(path))
+    chain = DeterministicChain(recorder, ShortTermMemory(), field_retry=False, backoff=_NoBackoff())
+    results = [chain.run(text) for text in INPUTS]
+    recorder.close()
+    return recorder, results
+
+
+def test_replay_reproduces_recorded_runs_including_retries(tmp_path):
+    path = tmp_path / "traffic.cassette"
+    recorder, recorded = _record(path, error_rate=0.1, invalid_json_rate=0.2, schema_violation_rate=0.2)
+    assert recorder.recorded > len(INPUTS)  # failures were retried and recorded
+
+    replay = ReplayClient(str(path), time_scale=0)
+    chain = DeterministicChain(replay, ShortTermMemory(), field_retry=False, backoff=_NoBackoff())
+    replayed = [chain.run(text) for text in INPUTS]
+    assert [ok for ok, _ in replayed] == [ok for ok, _ in recorded]
+    assert [r.get("error") for ok, r in replayed if not ok] == [r.get("error") for ok, r in recorded if not ok]
+    assert replay.stats()["misses"] == 0 and len(replay) == recorder.recorded
+
+
+def test_repeated_prompt_cycles_through_recorded_responses(tmp_path):
+    path = tmp_path / "c.cassette"
+    recorder = RecordingClient(SimulatedClient(latency_ms=0, error_rate=0.5, seed=2), str(path))
+    outcomes = []
+    for _ in range(6):
+        try:
+            outcomes.append(recorder.generate("s", "u"))
+        except Exception:
+            outcomes.append(None)
+    recorder.close()
+    replay = ReplayClient(str(path), time_scale=0)
+    served = []
+    for _ in range(12):
+        try:
+            served.append(replay.generate("s", "u"))
+        except ReplayedProviderError:
+            served.append(None)
+    assert served == outcomes * 2
+
+
+def test_miss_modes_and_time_scale(tmp_path):
+    path = tmp_path / "c.cassette"
+    recorder = RecordingClient(SimulatedClient(latency_fn=lambda: 0.05), str(path))
+    text = recorder.generate("s", "u")
+    recorder.close()
+
+    with pytest.raises(CassetteMiss):
+        ReplayClient(str(path), time_scale=0).generate("s", "other")
+    cycling = ReplayClient(str(path), time_scale=0.5, on_miss="cycle")
+    start = time.perf_counter()
+    assert cycling.generate("s", "other") == text
+    assert 0.02 <= time.perf_counter() - start < 0.05
+    assert asyncio.run(cycling.agenerate("s", "u")) == text
+    assert "".join(cycling.generate_stream("s", "u")) == text
@@ -58,4 +58,45 @@ def test_chain_invalid_json_retries_and_fails():
     chain = DeterministicChain(mock, memory, max_retries=2)
     ok, result = chain.run("Please analyze", session_id="s1")
     assert ok is True
-    assert result.name == "Acme Market"
\ No newline at end of file
+    assert result.name == "Acme Market"
+
+def test_chain_arun_success():
+    import asyncio
+    from src.models import AsyncMockClient
+    memory = ShortTermMemory(max_len=4)
+    chain = DeterministicChain(AsyncMockClient(VALID_JSON_STR), memory)
+    ok, result = asyncio.run(chain.arun("Analyze this startup: Acme Market", session_id="test"))
+    assert ok is True
+    assert result.name == "Acme Market"
+    assert any("ASSISTANT_SUMMARY" in m for m in memory.get_recent("test"))
+
+def test_chain_arun_sync_client_retries():
+    import asyncio
+    class SequenceMock:
+        def __init__(self, seq):
+            self.seq = seq
+            self.i = 0
+        def generate(self, system, user, temperature=0.1):
+            out = self.seq[min(self.i, len(self.seq)-1)]
+            self.i += 1
+            return out
+
+    mock = SequenceMock(["not-json", VALID_JSON_STR])
+    chain = DeterministicChain(mock, ShortTermMemory(), max_retries=2)
+    ok, result = asyncio.run(chain.arun("Please analyze", session_id="s1"))
+    assert ok is True
+    assert mock.i == 2
+
+def test_chain_arun_runs_concurrently():
+    import asyncio
+    import time
+    from src.models import AsyncMockClient
+    chain = DeterministicChain(AsyncMockClient(VALID_JSON_STR, delay=0.1), ShortTermMemory())
+
+    async def many():
+        return await asyncio.gather(*(chain.arun(f"startup {i}", session_id=f"s{i}") for i in range(50)))
+
+    start = time.perf_counter()
+    results = asyncio.run(many())
+    assert all(ok for ok, _ in results)
+    assert time.perf_counter() - start < 2.0
@@ -0,0 +1,53 @@
+import io
+import json
+import subprocess
+import sys
+from src import cli
+from src.tests.test_chain import VALID_JSON_STR
+
+LAZY = ("openai", "gradio", "numpy", "asyncio", "http.server", "sqlite3", "src.service", "src.batch")
+
+
+def test_cli_import_keeps_heavy_modules_lazy():
+    code = "import sys, json, src.cli; print(json.dumps(sorted(sys.modules)))"
+    loaded = set(json.loads(subprocess.check_output([sys.executable, "-c", code], text=True)))
+    assert [m for m in LAZY if m in loaded] == []
+
+
+def test_single_input_prints_assessment(tmp_path, capsys):
+    response = tmp_path / "response.json"
+    response.write_text(VALID_JSON_STR)
+    assert cli.main(["Acme builds scheduling software.", "--mock-response", str(response)]) == 0
+    assert json.loads(capsys.readouterr().out)["name"] == json.loads(VALID_JSON_STR)["name"]
+
+
+def test_invalid_output_exits_nonzero(tmp_path, capsys):
+    response = tmp_path / "response.json"
+    response.write_text("no json here")
+    assert cli.main(["x", "--mock-response", str(response), "--max-retries", "0"]) == 1
+    assert json.loads(capsys.readouterr().err)["error"] == "invalid_json"
+
+
+def test_jsonl_streams_one_line_per_record(tmp_path, monkeypatch, capsys):
+    records = [{"id": "a", "input": "first"}, {"id": "b", "input": "second", "session_id": "s"}]
+    monkeypatch.setattr(sys, "stdin", io.StringIO("\n".join(json.dumps(r) for r in records) + "\nnot json\n"))
+    assert cli.main(["--jsonl"]) == 1
+    lines = [json.loads(line) for line in capsys.readouterr().out.splitlines()]
+    assert [(l["id"], l["ok"]) for l in lines] == [("a", True), ("b", True), (None, False)]
+    assert lines[0]["result"]["name"] and lines[2]["error"]["error"] == "bad_record"
+
+
+def test_jsonl_concurrency_uses_batch_runner(tmp_path):
+    src, out = tmp_path / "in.jsonl", tmp_path / "out.jsonl"
+    src.write_text("".join(json.dumps({"id": i, "input": f"startup {i}"}) + "\n" for i in range(5)))
+    assert cli.main(["--jsonl", "--input", str(src), "--out", str(out), "--concurrency", "3"]) == 0
+    assert sorted(json.loads(l)["id"] for l in out.read_text().splitlines()) == list(range(5))
+
+
+def test_record_then_replay(tmp_path, capsys):
+    cassette = tmp_path / "traffic.cassette"
+    assert cli.main(["Acme builds drones.", "--record", str(cassette)]) == 0
+    recorded = capsys.readouterr().out
+    assert cli.main(["Acme builds drones.", "--provider", "replay", "--cassette", str(cassette),
+                     "--time-scale", "0"]) == 0
+    assert capsys.readouterr().out == recorded
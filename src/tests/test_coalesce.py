@@ -0,0 +1,100 @@
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+import pytest
+from src.chain import DeterministicChain
+from src.coalesce import SingleFlight
+from src.dedup import NearDuplicateIndex
+from src.memory import ShortTermMemory
+from src.results import ResultsStore
+from src.tests.test_chain import VALID_JSON_STR
+
+
+class _SlowClient:
+    def __init__(self, delay=0.1):
+        self.delay = delay
+        self.calls = 0
+        self._lock = threading.Lock()
+
+    def generate(self, system, user, temperature=0.1):
+        with self._lock:
+            self.calls += 1
+        time.sleep(self.delay)
+        return VALID_JSON_STR
+
+    async def agenerate(self, system, user, temperature=0.1):
+        self.calls += 1
+        await asyncio.sleep(self.delay)
+        return VALID_JSON_STR
+
+
+def test_single_flight_shares_result_and_errors():
+    flight = SingleFlight()
+    gate = threading.Event()
+
+    def work():
+        gate.wait()
+        return 42
+
+    with ThreadPoolExecutor(max_workers=4) as pool:
+        futures = [pool.submit(flight.do, "k", work) for _ in range(4)]
+        time.sleep(0.05)
+        gate.set()
+        results = [f.result() for f in futures]
+    assert [r[0] for r in results] == [42] * 4
+    assert sorted(r[1] for r in results) == [False, True, True, True]
+
+    def boom():
+        raise ValueError("x")
+
+    with pytest.raises(ValueError):
+        flight.do("k", boom)
+
+
+def test_threaded_runs_share_one_generation_and_update_each_session():
+    client = _SlowClient()
+    memory = ShortTermMemory()
+    chain = DeterministicChain(client, memory, coalesce=True)
+    with ThreadPoolExecutor(max_workers=6) as pool:
+        results = list(pool.map(lambda i: chain.run("Same startup", session_id=f"s{i}"), range(6)))
+    assert client.calls == 1 and chain._flight.coalesced == 5
+    assert all(ok for ok, _ in results)
+    assert len({id(model) for _, model in results}) == 6
+    for i in range(6):
+        assert len(memory.get_recent(f"s{i}")) == 2
+
+
+def test_async_runs_share_one_generation():
+    client = _SlowClient()
+    chain = DeterministicChain(client, ShortTermMemory(), coalesce=True)
+
+    async def main():
+        return await asyncio.gather(*(chain.arun("Same startup", session_id=f"s{i}") for i in range(5)),
+                                    chain.arun("Different startup", session_id="other"))
+
+    results = asyncio.run(main())
+    assert all(ok for ok, _ in results)
+    assert client.calls == 2
+
+
+def test_coalescing_is_off_by_default():
+    client = _SlowClient(delay=0.02)
+    chain = DeterministicChain(client, ShortTermMemory())
+    with ThreadPoolExecutor(max_workers=3) as pool:
+        list(pool.map(lambda i: chain.run("Same startup"), range(3)))
+    assert client.calls == 3
+
+
+def test_only_the_leader_writes_dedup_and_results(tmp_path):
+    store = ResultsStore(str(tmp_path / "results.sqlite"))
+    chain = DeterministicChain(_SlowClient(), ShortTermMemory(), coalesce=True,
+                               dedup=NearDuplicateIndex(threshold=0.99), results=store)
+
+    async def main():
+        return await asyncio.gather(*(chain.arun("Same startup", session_id=f"s{i}") for i in range(4)))
+
+    assert all(ok for ok, _ in asyncio.run(main()))
+    assert len(chain.dedup) == 1
+    assert len(list(store.query())) == 1
+    store.close()
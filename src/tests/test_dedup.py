@@ -0,0 +1,104 @@
+import numpy as np
+from src.chain import DeterministicChain
+from src.dedup import MinHasher, NearDuplicateIndex, jaccard_estimate
+from src.memory import ShortTermMemory
+from src.tests.test_chain import VALID_JSON_STR
+
+PITCH = ("Acme builds AI scheduling software for dental clinics. Founded 2021, "
+         "raised a $2M seed round, growing 20% month over month with 40 paying clinics.")
+REWORDED = ("Founded in 2021, Acme builds AI scheduling software for dental clinics; "
+            "it raised a $2M seed round and is growing 20% month over month with 40 paying clinics!")
+OTHER = "Globex sells refurbished industrial drones to farmers in Brazil through a dealer network."
+
+
+class _CountingClient:
+    def __init__(self):
+        self.calls = 0
+        self.prompts = []
+
+    def generate(self, system, user, temperature=0.1):
+        self.calls += 1
+        self.prompts.append(user)
+        return VALID_JSON_STR
+
+
+def test_signature_similarity_tracks_rewording():
+    hasher = MinHasher()
+    a, b, c = hasher.signature(PITCH), hasher.signature(REWORDED), hasher.signature(OTHER)
+    assert a.dtype == np.uint32 and a.shape == (hasher.num_perm,)
+    assert np.array_equal(a, MinHasher().signature(PITCH.upper()))
+    assert jaccard_estimate(a, b) > 0.6
+    assert jaccard_estimate(a, c) < 0.2
+
+
+def test_lookup_finds_near_duplicates_only():
+    index = NearDuplicateIndex(threshold=0.7)
+    entry_id = index.add(PITCH, '{"stored": 1}')
+    index.add_many((f"unrelated startup number {i} sells widget {i * 7}", "{}") for i in range(1000))
+    similarity, stored, found_id = index.lookup(REWORDED)
+    assert found_id == entry_id and stored == '{"stored": 1}' and similarity >= 0.7
+    assert index.lookup(OTHER) is None
+
+
+def test_index_persists_across_reopen(tmp_path):
+    path = str(tmp_path / "dedup.sqlite")
+    index = NearDuplicateIndex(path, threshold=0.7)
+    index.add(PITCH, VALID_JSON_STR)
+    index.close()
+    reopened = NearDuplicateIndex(path, threshold=0.7)
+    assert len(reopened) == 1
+    assert reopened.lookup(REWORDED)[1] == VALID_JSON_STR
+    reopened.close()
+
+
+def test_writers_sharing_a_file_get_distinct_ids(tmp_path):
+    path = str(tmp_path / "dedup.sqlite")
+    first, second = NearDuplicateIndex(path), NearDuplicateIndex(path)
+    ids = first.add_many([(PITCH, VALID_JSON_STR)]) + second.add_many([(REWORDED, VALID_JSON_STR)])
+    ids += first.add_many([("An unrelated pitch about farm drones.", VALID_JSON_STR)])
+    assert len(set(ids)) == 3
+    first.close()
+    second.close()
+    reopened = NearDuplicateIndex(path)
+    assert len(reopened) == 3
+    reopened.close()
+
+
+def test_chain_reuses_stored_assessment():
+    client = _CountingClient()
+    chain = DeterministicChain(client, ShortTermMemory(), dedup=NearDuplicateIndex(threshold=0.7))
+    assert chain.run(PITCH)[0]
+    ok, model = chain.run(REWORDED)
+    assert ok and model.name == chain.run(PITCH)[1].name
+    assert client.calls == 1
+    assert len(chain.dedup) == 1
+
+
+def test_chain_seed_mode_adds_reference_to_prompt():
+    client = _CountingClient()
+    chain = DeterministicChain(client, ShortTermMemory(), dedup=NearDuplicateIndex(threshold=0.7),
+                               dedup_mode="seed")
+    chain.run(PITCH)
+    assert chain.run(REWORDED)[0]
+    assert client.calls == 2
+    assert "REFERENCE_ASSESSMENT" not in client.prompts[0]
+    assert "REFERENCE_ASSESSMENT" in client.prompts[1]
+
+
+def test_unrelated_non_ascii_inputs_do_not_match():
+    client = _CountingClient()
+    chain = DeterministicChain(client, ShortTermMemory(), dedup=NearDuplicateIndex(threshold=0.7))
+    assert chain.run("Компания делает роботов для складов")[0]
+    assert chain.dedup.lookup("Стартап доставки еды в Москве") is None
+    assert chain.dedup.lookup("美食配送初创公司") is None
+    assert chain.run("Стартап доставки еды в Москве")[0]
+    assert client.calls == 2
+    assert chain.dedup.lookup("Компания делает роботов для складов!")[0] == 1.0
+
+
+def test_inputs_without_words_are_not_indexed():
+    client = _CountingClient()
+    chain = DeterministicChain(client, ShortTermMemory(), dedup=NearDuplicateIndex(threshold=0.7))
+    assert chain.run("!!! ???")[0] and chain.run("...")[0]
+    assert client.calls == 2 and len(chain.dedup) == 0
+    assert MinHasher().signature("--") is None
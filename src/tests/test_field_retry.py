@@ -0,0 +1,68 @@
+import json
+from src.chain import DeterministicChain
+from src.field_retry import build_fix_prompts, failing_fields, merge_fix
+from src.memory import ShortTermMemory
+from src.utils import validate_output
+from src.tests.test_json_output import VALID_EXAMPLE
+
+
+def _broken():
+    obj = json.loads(json.dumps(VALID_EXAMPLE))
+    del obj["recommendation"]["rationale"]
+    obj["team"] = "two founders"
+    return obj
+
+
+class RecordingMock:
+    def __init__(self, seq):
+        self.seq = seq
+        self.calls = []
+    def generate(self, system, user, temperature=0.1):
+        out = self.seq[min(len(self.calls), len(self.seq)-1)]
+        self.calls.append((system, user))
+        return out
+
+
+def test_failing_fields_groups_by_top_level_key():
+    ok, err = validate_output(_broken())
+    assert ok is False
+    fields = failing_fields(err)
+    assert set(fields) == {"recommendation", "team"}
+    assert any("recommendation.rationale" in line for line in fields["recommendation"])
+
+
+def test_fix_prompt_only_carries_failing_fields():
+    ok, err = validate_output(_broken())
+    system, user, keys = build_fix_prompts(_broken(), err)
+    assert set(keys) == {"recommendation", "team"}
+    assert "market" not in user and "Acme" not in user
+    assert '"invest":"Investment recommendation (yes/no/hold)"' in user
+
+
+def test_merge_fix_replaces_only_requested_keys():
+    merged = merge_fix({"a": 1, "b": 2}, {"b": 3, "c": 4}, ["b"])
+    assert merged == {"a": 1, "b": 3}
+
+
+def test_chain_field_retry_merges_corrected_fields():
+    patch = {
+        "recommendation": {"invest": "hold", "rationale": "unit economics unclear"},
+        "team": {"founders_count": 2, "strengths": [], "gaps": []},
+    }
+    mock = RecordingMock([json.dumps(_broken()), json.dumps(patch)])
+    chain = DeterministicChain(mock, ShortTermMemory())
+    ok, result = chain.run("Analyze Acme Market, a marketplace for SMB suppliers. " * 20)
+    assert ok is True
+    assert result.recommendation.rationale == "unit economics unclear"
+    assert result.market.top_markets == ["India", "SE Asia"]
+    (full_sys, full_user), (fix_sys, fix_user) = mock.calls
+    assert "FAILED_FIELDS" in fix_user
+    assert len(fix_sys) + len(fix_user) < (len(full_sys) + len(full_user)) / 2
+
+
+def test_chain_field_retry_disabled_uses_full_prompt():
+    mock = RecordingMock([json.dumps(_broken()), json.dumps(VALID_EXAMPLE)])
+    chain = DeterministicChain(mock, ShortTermMemory(), field_retry=False)
+    ok, result = chain.run("Analyze")
+    assert ok is True
+    assert mock.calls[1][1].startswith("Validation failed.")
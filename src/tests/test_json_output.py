@@ -1,5 +1,6 @@
+import json
 import pytest
-from src.utils import validate_output
+from src.utils import validate_output, validate_json, dump_json
 from pydantic import ValidationError
 
 VALID_EXAMPLE = {
@@ -73,4 +74,19 @@ def test_invalid_example_fails():
 def test_partial_example_parses():
     ok, model_or_err = validate_output(PARTIAL_EXAMPLE)
     assert ok is True
-    assert model_or_err.team.founders_count == "unknown"
\ No newline at end of file
+    assert model_or_err.team.founders_count == "unknown"
+
+
+def test_validate_json_matches_validate_output():
+    ok, model = validate_json(json.dumps(VALID_EXAMPLE).encode("utf-8"))
+    assert ok is True
+    ok_dict, model_dict = validate_output(VALID_EXAMPLE)
+    assert model == model_dict
+    assert json.loads(dump_json(model, indent=2)) == VALID_EXAMPLE
+
+
+def test_validate_json_reports_invalid_json_and_schema_errors():
+    ok, err = validate_json("not-json")
+    assert ok is False and isinstance(err, ValidationError)
+    ok, err = validate_json(json.dumps(INVALID_EXAMPLE))
+    assert ok is False and "summary" in str(err)
@@ -0,0 +1,73 @@
+import threading
+import time
+import pytest
+from src.memory import ShortTermMemory, InMemoryBackend, SqliteMemoryBackend
+
+
+@pytest.fixture(params=["memory", "sqlite"])
+def make_memory(request, tmp_path):
+    def make(max_len=4, max_sessions=100, ttl=None):
+        if request.param == "memory":
+            backend = InMemoryBackend(max_sessions=max_sessions, ttl=ttl)
+        else:
+            backend = SqliteMemoryBackend(str(tmp_path / "memory.sqlite"), max_sessions=max_sessions,
+                                          ttl=ttl, sweep_every=1)
+        return ShortTermMemory(max_len=max_len, backend=backend)
+    return make
+
+
+def test_keeps_last_entries_per_session(make_memory):
+    memory = make_memory(max_len=2)
+    for i in range(5):
+        memory.add("s", f"entry {i}")
+    assert memory.get_recent("s") == ["entry 3", "entry 4"]
+
+
+def test_unknown_session_is_not_created(make_memory):
+    memory = make_memory()
+    assert memory.get_recent("nope") == []
+    assert len(memory.backend) == 0
+
+
+def test_lru_session_limit(make_memory):
+    memory = make_memory(max_sessions=3)
+    for i in range(3):
+        memory.add(f"s{i}", "x")
+        time.sleep(0.01)
+    memory.get_recent("s0")  # s1 becomes least recently used
+    time.sleep(0.01)
+    memory.add("s3", "x")
+    assert len(memory.backend) == 3
+    assert memory.get_recent("s1") == []
+    assert memory.get_recent("s0") == ["x"]
+
+
+def test_ttl_expiry(make_memory):
+    memory = make_memory(ttl=0.05)
+    memory.add("s", "x")
+    time.sleep(0.08)
+    assert memory.get_recent("s") == []
+
+
+def test_concurrent_adds():
+    memory = ShortTermMemory(max_len=1000, max_sessions=50)
+
+    def worker(n):
+        for i in range(200):
+            memory.add(f"s{i % 60}", f"{n}-{i}")
+            memory.get_recent(f"s{(i + n) % 60}")
+
+    threads = [threading.Thread(target=worker, args=(n,)) for n in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert len(memory.backend) <= 50
+
+
+def test_sqlite_shared_between_instances(tmp_path):
+    path = str(tmp_path / "shared.sqlite")
+    a = ShortTermMemory(backend=SqliteMemoryBackend(path))
+    b = ShortTermMemory(backend=SqliteMemoryBackend(path))
+    a.add("s", "from a")
+    assert b.get_recent("s") == ["from a"]
@@ -0,0 +1,85 @@
+import asyncio
+import urllib.request
+from src.chain import DeterministicChain
+from src.memory import ShortTermMemory
+from src.metrics import MetricsRegistry, MetricsHooks, SpanHooks, CompositeHooks, start_metrics_server
+from src.models import MockClient
+from src.tests.test_chain import VALID_JSON_STR
+
+
+class _SeqClient:
+    def __init__(self, outputs):
+        self.outputs = list(outputs)
+
+    def generate(self, system, user, temperature=0.1):
+        out = self.outputs.pop(0)
+        if isinstance(out, Exception):
+            raise out
+        return out
+
+
+def test_histogram_renders_cumulative_buckets():
+    reg = MetricsRegistry()
+    h = reg.histogram("lat_seconds", "Latency.", ("stage",), buckets=(0.1, 1.0))
+    h.observe(0.05, stage="a")
+    h.observe(0.5, stage="a")
+    h.observe(5.0, stage="a")
+    text = reg.render_prometheus()
+    assert "# TYPE lat_seconds histogram" in text
+    assert 'lat_seconds_bucket{stage="a",le="0.1"} 1' in text
+    assert 'lat_seconds_bucket{stage="a",le="1"} 2' in text
+    assert 'lat_seconds_bucket{stage="a",le="+Inf"} 3' in text
+    assert 'lat_seconds_count{stage="a"} 3' in text
+
+
+def test_registry_is_get_or_create():
+    reg = MetricsRegistry()
+    assert reg.counter("c_total", "C.") is reg.counter("c_total", "C.")
+
+
+def test_metrics_hooks_record_stages_attempts_and_outcome():
+    reg = MetricsRegistry()
+    hooks = MetricsHooks(reg)
+    chain = DeterministicChain(_SeqClient(["not json at all", VALID_JSON_STR]), ShortTermMemory(), hooks=hooks)
+    ok, _ = chain.run("x", session_id="s1")
+    assert ok
+    assert hooks.requests.value(outcome="success") == 1
+    assert hooks.attempts.value(result="invalid_json") == 1
+    assert hooks.attempts.value(result="ok") == 1
+    for stage in ("prompt_build", "generate", "validate_json", "parse"):
+        assert hooks.stage_seconds.count(stage=stage) >= 1
+    assert hooks.in_flight.value() == 0
+
+
+def test_metrics_hooks_record_llm_failure_async():
+    reg = MetricsRegistry()
+    hooks = MetricsHooks(reg)
+    chain = DeterministicChain(_SeqClient([RuntimeError("down")]), ShortTermMemory(), max_retries=0, hooks=hooks)
+    ok, result = asyncio.run(chain.arun("x"))
+    assert not ok and result["error"] == "llm_call_failed"
+    assert hooks.requests.value(outcome="llm_call_failed") == 1
+    assert hooks.attempts.value(result="llm_call_failed") == 1
+
+
+def test_span_hooks_carry_request_and_session_ids():
+    spans = []
+    chain = DeterministicChain(MockClient(VALID_JSON_STR), ShortTermMemory(),
+                               hooks=CompositeHooks(SpanHooks(spans.append), MetricsHooks(MetricsRegistry())))
+    chain.run("x", session_id="s9")
+    assert {s["name"] for s in spans} >= {"prompt_build", "generate", "chain.request"}
+    assert len({s["request_id"] for s in spans}) == 1
+    assert all(s["session_id"] == "s9" for s in spans)
+    assert spans[-1]["outcome"] == "success"
+
+
+def test_metrics_server_serves_prometheus_text():
+    reg = MetricsRegistry()
+    reg.counter("up_total", "Up.").inc()
+    server = start_metrics_server(0, reg, host="127.0.0.1")
+    try:
+        with urllib.request.urlopen(f"http://127.0.0.1:{server.server_address[1]}/metrics") as resp:
+            body = resp.read().decode("utf-8")
+        assert "up_total 1" in body
+    finally:
+        server.shutdown()
+        server.server_close()
@@ -0,0 +1,53 @@
+import json
+
+from src.chain import DeterministicChain
+from src.memory import ShortTermMemory
+from src.models import MockClient
+from src.schemas import StartupAssessment
+from src.prompts.output_format import OUTPUT_FORMAT_PROMPT, schema_outline
+from src.prompts.system import SYSTEM_PROMPT, SYSTEM_FINGERPRINT, fingerprint
+from src.tests.test_chain import VALID_JSON_STR
+
+
+def _keys(outline, model):
+    assert set(outline) == set(model.model_fields)
+    for name, field in model.model_fields.items():
+        if isinstance(field.annotation, type) and hasattr(field.annotation, "model_fields"):
+            _keys(outline[name], field.annotation)
+
+
+def test_output_format_is_generated_from_schema():
+    outline = json.loads(schema_outline(StartupAssessment))
+    _keys(outline, StartupAssessment)
+    assert OUTPUT_FORMAT_PROMPT.endswith(schema_outline())
+    assert "\n  " not in OUTPUT_FORMAT_PROMPT  # compact, not pretty-printed
+    assert "'unknown'" in outline["team"]["founders_count"]
+
+
+def test_system_prompt_is_identical_across_requests():
+    seen = []
+
+    class Recording(MockClient):
+        def generate(self, system, user, temperature=0.1):
+            seen.append(system)
+            return super().generate(system, user, temperature)
+
+    chain = DeterministicChain(Recording(VALID_JSON_STR), ShortTermMemory())
+    chain.run("Acme builds drones.", session_id="a")
+    chain.run("Beta sells software.", session_id="b")
+    assert seen == [SYSTEM_PROMPT, SYSTEM_PROMPT]
+    assert chain.system_fingerprint == SYSTEM_FINGERPRINT == fingerprint(SYSTEM_PROMPT)
+
+
+def test_prompt_report_counts_each_section():
+    memory = ShortTermMemory()
+    memory.add("s", "USER: earlier pitch")
+    chain = DeterministicChain(MockClient(VALID_JSON_STR), memory)
+    report = chain.prompt_report("Acme builds drones.", session_id="s")
+    assert set(report["system"]) == {"role", "behavior", "style", "output_format"}
+    assert report["user"]["memory"] > 0 and report["user"]["user_input"] > 0
+    assert report["total"] == report["system_total"] + report["user_total"]
+    est = chain.estimator
+    whole = est.count(SYSTEM_PROMPT) + est.count(chain._build_user_prompt("Acme builds drones.", "s"))
+    assert report["system_total"] == est.count(SYSTEM_PROMPT)
+    assert abs(report["total"] - whole) <= 3  # estimates of the parts vs. the joined prompt
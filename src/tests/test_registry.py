@@ -0,0 +1,101 @@
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import pytest
+from src.memory import ShortTermMemory
+from src.models import MockClient
+from src.registry import ChainRegistry
+from src.tests.test_chain import VALID_JSON_STR
+
+
+class _StubHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # keep-alive
+    connections = 0
+    requests = 0
+    lock = threading.Lock()
+
+    def setup(self):
+        super().setup()
+        with _StubHandler.lock:
+            _StubHandler.connections += 1
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        with _StubHandler.lock:
+            _StubHandler.requests += 1
+        body = json.dumps({
+            "id": "chatcmpl-stub", "object": "chat.completion", "created": 0, "model": "stub",
+            "choices": [{"index": 0, "finish_reason": "stop",
+                         "message": {"role": "assistant", "content": VALID_JSON_STR}}],
+        }).encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def stub_server():
+    _StubHandler.connections = _StubHandler.requests = 0
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _StubHandler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_address[1]}/v1"
+    server.shutdown()
+    server.server_close()
+
+
+def test_registry_builds_each_client_and_chain_once():
+    built = []
+    def factory(model):
+        built.append(model)
+        return MockClient(VALID_JSON_STR)
+    registry = ChainRegistry(ShortTermMemory(), {"mock": factory})
+    chains = []
+    threads = [threading.Thread(target=lambda: chains.append(registry.get_chain("mock", "m", 0.1)))
+               for _ in range(16)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert built == ["m"]
+    assert len({id(c) for c in chains}) == 1
+    hot = registry.get_chain("mock", "m", 0.7)
+    assert hot is not chains[0] and hot.llm is chains[0].llm and hot.temperature == 0.7
+    with pytest.raises(ValueError):
+        registry.get_chain("nope", "m", 0.1)
+
+
+def test_openai_client_reuses_connections(stub_server):
+    pytest.importorskip("openai")
+    from openai import OpenAI
+    from src.providers import OpenAIClient
+
+    registry = ChainRegistry(ShortTermMemory(), {
+        "openai": lambda model: OpenAIClient(api_key="test", model=model, base_url=stub_server),
+    })
+    for i in range(10):
+        ok, result = registry.get_chain("openai", "stub", 0.1).run(f"startup {i}")
+        assert ok is True
+    assert _StubHandler.requests == 10
+    assert _StubHandler.connections == 1
+
+    # Baseline: a fresh SDK client per request opens a new connection every time.
+    before = _StubHandler.connections
+    for i in range(5):
+        client = OpenAIClient(model="stub", sdk_client=OpenAI(api_key="test", base_url=stub_server))
+        client.generate("sys", f"user {i}")
+    assert _StubHandler.connections - before == 5
+
+
+def test_provider_kwargs_override_shared_chain_kwargs():
+    shared = object()
+    registry = ChainRegistry(ShortTermMemory(), {"mock": lambda m: MockClient(VALID_JSON_STR),
+                                                 "real": lambda m: MockClient(VALID_JSON_STR)},
+                             provider_kwargs={"mock": {"results": None}}, results=shared)
+    assert registry.get_chain("real", "m", 0.1).results is shared
+    assert registry.get_chain("mock", "m", 0.1).results is None
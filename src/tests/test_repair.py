@@ -0,0 +1,89 @@
+import json
+import pytest
+from src.chain import DeterministicChain
+from src.memory import ShortTermMemory
+from src.repair import repair_output, repair_json_syntax
+from src.utils import validate_output
+from src.tests.test_chain import VALID_JSON_STR
+from src.tests.test_json_output import VALID_EXAMPLE
+
+
+def _variant(**overrides):
+    obj = json.loads(json.dumps(VALID_EXAMPLE))
+    for path, value in overrides.items():
+        target = obj
+        *parents, leaf = path.split("__")
+        for p in parents:
+            target = target[p]
+        target[leaf] = value
+    return obj
+
+
+@pytest.mark.parametrize("raw, expected_repair", [
+    ("```json\n" + json.dumps(VALID_EXAMPLE) + "\n```", "stripped_code_fence"),
+    ("Here is the assessment:\n" + json.dumps(VALID_EXAMPLE), "stripped_leading_text"),
+    (json.dumps(VALID_EXAMPLE)[:-1] + ",}", "removed_trailing_comma"),
+    (json.dumps(VALID_EXAMPLE)[:-2], "closed_truncated_json"),
+    (json.dumps(_variant(recommendation__invest="Yes")), "normalized_choice:recommendation.invest"),
+    (json.dumps(_variant(team__founders_count="2")), "coerced_int:team.founders_count"),
+    (json.dumps(_variant(risks="execution risk")), "wrapped_in_list:risks"),
+])
+def test_repair_output_fixes_common_defects(raw, expected_repair):
+    parsed, repairs = repair_output(raw)
+    assert expected_repair in repairs
+    ok, model = validate_output(parsed)
+    assert ok is True
+
+
+def test_repair_values():
+    parsed, _ = repair_output(json.dumps(_variant(recommendation__invest="Yes", team__founders_count="2")))
+    assert parsed["recommendation"]["invest"] == "yes"
+    assert parsed["team"]["founders_count"] == 2
+
+
+def test_truncated_inside_key_and_string():
+    text, repairs = repair_json_syntax('{"a": "unfinished')
+    assert json.loads(text) == {"a": "unfinished"}
+    text, _ = repair_json_syntax('{"a": [1, 2], "b')
+    assert json.loads(text) == {"a": [1, 2], "b": None}
+
+
+def test_unrepairable_output_returns_none():
+    parsed, _ = repair_output("I cannot analyze this startup.")
+    assert parsed is None
+
+
+class SequenceMock:
+    def __init__(self, seq):
+        self.seq = seq
+        self.i = 0
+    def generate(self, system, user, temperature=0.1):
+        out = self.seq[min(self.i, len(self.seq)-1)]
+        self.i += 1
+        return out
+
+
+def test_chain_repairs_without_reprompting():
+    mock = SequenceMock(["```json\n" + VALID_JSON_STR + "\n```", VALID_JSON_STR])
+    chain = DeterministicChain(mock, ShortTermMemory())
+    ok, result = chain.run("Analyze")
+    assert ok is True and mock.i == 1
+    assert chain.repair_counts["stripped_code_fence"] == 1
+
+
+def test_chain_repair_disabled_reprompts():
+    mock = SequenceMock(["```json\n" + VALID_JSON_STR + "\n```", VALID_JSON_STR])
+    chain = DeterministicChain(mock, ShortTermMemory(), repair=False)
+    ok, result = chain.run("Analyze")
+    assert ok is True and mock.i == 2
+
+
+def test_chain_repairs_non_canonical_values_that_validate():
+    mock = SequenceMock([json.dumps(_variant(recommendation__invest="Yes", team__founders_count="2"))])
+    chain = DeterministicChain(mock, ShortTermMemory())
+    ok, result = chain.run("Analyze")
+    assert ok is True and mock.i == 1
+    assert result.recommendation.invest == "yes"
+    assert result.team.founders_count == 2
+    assert chain.repair_counts["normalized_choice"] == 1
+    assert chain.repair_counts["coerced_int"] == 1
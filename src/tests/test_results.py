@@ -0,0 +1,65 @@
+import io
+import json
+from src.chain import DeterministicChain
+from src.memory import ShortTermMemory
+from src.models import MockClient
+from src.results import ResultsStore
+from src.tests.test_chain import VALID_JSON_STR
+from src.utils import validate_json
+
+
+def _assessment(name, category, invest):
+    data = json.loads(VALID_JSON_STR)
+    data["name"] = name
+    data["product"]["category"] = category
+    data["recommendation"]["invest"] = invest
+    return validate_json(json.dumps(data))[1]
+
+
+def test_buffered_inserts_and_indexed_queries(tmp_path):
+    store = ResultsStore(str(tmp_path / "results.sqlite"), batch_size=10, flush_interval=60)
+    for i in range(25):
+        store.add(_assessment(f"Startup {i}", "Fintech" if i % 2 else "health", "yes" if i % 3 == 0 else "no"),
+                  session_id=f"s{i % 5}")
+    assert len(store._buffer) == 5  # two batches inserted, the rest still buffered
+    rows = list(store.query(category="fintech", invest="yes"))
+    assert [r["assessment"]["name"] for r in rows] == ["Startup 3", "Startup 9", "Startup 15", "Startup 21"]
+    assert len(store) == 25
+    newest = next(store.query(session_id="s4", newest_first=True, limit=1))
+    assert newest["assessment"]["name"] == "Startup 24"
+    plan = store._conn.execute(
+        "EXPLAIN QUERY PLAN SELECT id FROM results WHERE invest = ? ORDER BY created_at", ("yes",)).fetchall()
+    assert "results_invest" in str(plan)
+    store.close()
+
+
+def test_export_jsonl_streams_rows(tmp_path):
+    store = ResultsStore(str(tmp_path / "results.sqlite"))
+    ids = [store.add(_assessment(f"S{i}", "saas", "hold"), model_name="demo") for i in range(3)]
+    out = io.StringIO()
+    assert store.export_jsonl(out, invest="hold") == 3
+    lines = [json.loads(line) for line in out.getvalue().splitlines()]
+    assert [line["id"] for line in lines] == ids
+    assert lines[0]["model"] == "demo" and lines[0]["assessment"]["name"] == "S0"
+    assert store.get(ids[1]) is not None
+    store.close()
+
+
+def test_chain_writes_validated_results(tmp_path):
+    store = ResultsStore(str(tmp_path / "results.sqlite"))
+    chain = DeterministicChain(MockClient(VALID_JSON_STR), ShortTermMemory(), results=store)
+    ok, model = chain.run("Some startup", session_id="abc")
+    assert ok
+    rows = list(store.query(session_id="abc"))
+    assert len(rows) == 1 and rows[0]["assessment"]["name"] == model.name
+    store.close()
+
+
+def test_caller_request_id_names_the_stored_row(tmp_path):
+    store = ResultsStore(str(tmp_path / "results.sqlite"))
+    chain = DeterministicChain(MockClient(VALID_JSON_STR), ShortTermMemory(), results=store)
+    assert chain.run("First startup", session_id="shared", request_id="req-1")[0]
+    assert chain.run("Second startup", session_id="shared", request_id="req-2")[0]
+    assert json.loads(store.get("req-1"))["name"] == json.loads(VALID_JSON_STR)["name"]
+    assert store.get("req-2") is not None and store.get("req-3") is None
+    store.close()
@@ -0,0 +1,49 @@
+import json
+from src.revalidate import chunk_ranges, revalidate
+from src.tests.test_chain import VALID_JSON_STR
+
+
+def _write_archive(path, n):
+    bad_invest = json.loads(VALID_JSON_STR)
+    del bad_invest["recommendation"]["invest"]
+    with open(path, "w") as f:
+        for i in range(n):
+            if i % 10 == 3:
+                raw = json.dumps(bad_invest)
+            elif i % 10 == 7:
+                raw = "```json\n" + VALID_JSON_STR + "\n```"
+            else:
+                raw = VALID_JSON_STR
+            f.write(json.dumps({"id": f"r{i}", "raw": raw}) + "\n")
+
+
+def test_chunk_ranges_cover_file_on_line_boundaries(tmp_path):
+    path = tmp_path / "archive.jsonl"
+    _write_archive(path, 50)
+    data = path.read_bytes()
+    ranges = list(chunk_ranges(str(path), chunk_bytes=1000))
+    assert ranges[0][0] == 0 and ranges[-1][1] == len(data) and len(ranges) > 1
+    assert all(a[1] == b[0] for a, b in zip(ranges, ranges[1:]))
+    assert all(data[end - 1:end] == b"\n" for _, end in ranges)
+
+
+def test_revalidate_reports_failures_in_order_across_workers(tmp_path):
+    path, out = tmp_path / "archive.jsonl", tmp_path / "out.jsonl"
+    _write_archive(path, 40)
+    report = revalidate(str(path), str(out), field="raw", workers=2, chunk_bytes=2000)
+    rows = [json.loads(line) for line in out.read_text().splitlines()]
+    assert [r["line"] for r in rows] == list(range(40))
+    assert [r["id"] for r in rows] == [f"r{i}" for i in range(40)]
+    assert report["records"] == 40 and report["failed"] == 8
+    assert ["recommendation.invest", 4] in [list(x) for x in report["top_failing_fields"]]
+    assert rows[3]["errors"] == [{"path": "recommendation.invest", "type": "missing"}]
+    assert rows[7]["errors"][0]["type"] == "json_invalid"
+
+
+def test_repair_and_migrate(tmp_path):
+    path, out = tmp_path / "archive.jsonl", tmp_path / "out.jsonl"
+    _write_archive(path, 10)
+    report = revalidate(str(path), str(out), field="raw", repair=True, migrate=True, workers=1)
+    assert report["failed"] == 1
+    rows = [json.loads(line) for line in out.read_text().splitlines()]
+    assert rows[7]["ok"] and rows[7]["assessment"]["name"] == json.loads(VALID_JSON_STR)["name"]
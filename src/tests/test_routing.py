@@ -0,0 +1,115 @@
+import asyncio
+import random
+import time
+import pytest
+from src.chain import DeterministicChain
+from src.memory import ShortTermMemory
+from src.routing import AdaptiveBackoff, CircuitBreaker, NoBackendAvailable, RoutingClient
+from src.simulated import SimulatedClient, SimulatedProviderError
+
+
+def _warm(router, n=25):
+    for _ in range(n):
+        router.generate("s", "u")
+
+
+def test_circuit_breaker_opens_and_half_opens():
+    now = [0.0]
+    breaker = CircuitBreaker(failure_threshold=3, reset_timeout=10.0, clock=lambda: now[0])
+    for _ in range(3):
+        breaker.record_failure()
+    assert breaker.state == "open" and not breaker.allow()
+    now[0] = 10.0
+    assert breaker.allow()  # half-open trial
+    assert not breaker.allow()  # only one trial at a time
+    breaker.record_success()
+    assert breaker.state == "closed" and breaker.allow()
+
+
+def test_slow_primary_is_hedged_to_secondary():
+    latency = [0.01]
+    primary = SimulatedClient(latency_fn=lambda: latency[0], model="primary")
+    secondary = SimulatedClient(latency_fn=lambda: 0.01, model="secondary")
+    router = RoutingClient([primary, secondary])
+    _warm(router)  # learn primary p95 ~10ms
+    latency[0] = 0.5
+    start = time.perf_counter()
+    router.generate("s", "u")
+    assert time.perf_counter() - start < 0.25
+    stats = router.stats()
+    assert stats["secondary"]["hedges"] == 1 and stats["secondary"]["hedge_wins"] == 1
+
+
+def test_error_streak_trips_breaker_and_routes_around():
+    primary = SimulatedClient(latency_ms=1, error_rate=1.0, seed=1, model="primary")
+    secondary = SimulatedClient(latency_ms=1, seed=2, model="secondary")
+    router = RoutingClient([primary, secondary], failure_threshold=3)
+    for _ in range(10):
+        router.generate("s", "u")
+    stats = router.stats()
+    assert stats["primary"]["circuit"] == "open"
+    assert stats["primary"]["calls"] == 3
+    assert stats["secondary"]["calls"] == 10
+
+
+def test_all_circuits_open_fails_fast():
+    router = RoutingClient([SimulatedClient(latency_ms=0, error_rate=1.0, seed=1)], failure_threshold=1)
+    with pytest.raises(SimulatedProviderError):
+        router.generate("s", "u")
+    with pytest.raises(NoBackendAvailable):
+        router.generate("s", "u")
+
+
+def test_async_hedge_cancels_loser():
+    latency = [0.01]
+    primary = SimulatedClient(latency_fn=lambda: latency[0], model="primary")
+    secondary = SimulatedClient(latency_fn=lambda: 0.01, model="secondary")
+    router = RoutingClient([primary, secondary])
+
+    async def main():
+        for _ in range(25):
+            await router.agenerate("s", "u")
+        latency[0] = 1.0
+        start = time.perf_counter()
+        await router.agenerate("s", "u")
+        return time.perf_counter() - start
+
+    assert asyncio.run(main()) < 0.25
+    assert router.stats()["secondary"]["hedge_wins"] == 1
+    assert router.stats()["primary"]["errors"] == 0
+
+
+def test_stream_fails_over_before_first_chunk():
+    primary = SimulatedClient(latency_ms=0, error_rate=1.0, seed=1, model="primary")
+    secondary = SimulatedClient(latency_ms=0, model="secondary")
+    router = RoutingClient([primary, secondary])
+    chain = DeterministicChain(router, ShortTermMemory(), stream=True)
+    ok, _ = chain.run("x")
+    assert ok
+    assert router.stats()["primary"]["errors"] == 1
+
+
+def test_adaptive_backoff_scales_with_latency_and_jitters():
+    backoff = AdaptiveBackoff(latency_fn=lambda: 2.0, base=0.05, cap=10.0, rng=random.Random(0))
+    provider = [backoff.delay(2, "llm_call_failed") for _ in range(200)]
+    output = [backoff.delay(2, "invalid_json") for _ in range(200)]
+    assert max(provider) <= 2.0 and max(provider) > 1.0  # base 1.0 (0.5 x 2s), doubled
+    assert max(output) <= 0.1
+    assert len(set(provider)) > 100
+
+
+def test_chain_uses_backoff_policy():
+    class _Fixed:
+        def __init__(self):
+            self.calls = []
+
+        def delay(self, attempt, error_kind):
+            self.calls.append((attempt, error_kind))
+            return 0.0
+
+    policy = _Fixed()
+    client = SimulatedClient(latency_ms=0, error_rate=1.0, seed=1)
+    chain = DeterministicChain(client, ShortTermMemory(), backoff=policy)
+    ok, result = chain.run("x")
+    assert not ok and result["error"] == "llm_call_failed"
+    assert policy.calls == [(1, "llm_call_failed"), (2, "llm_call_failed")]
@@ -0,0 +1,103 @@
+import asyncio
+import json
+import re
+import threading
+import time
+from collections import Counter
+from src.chain import DeterministicChain
+from src.memory import ShortTermMemory
+from src.schemas import StartupAssessment
+from src.sections import SECTIONS, FINAL_SECTION, parse_section, section_model
+from src.tests.test_chain import VALID_JSON_STR
+
+FULL = json.loads(VALID_JSON_STR)
+
+
+class _SectionClient:
+    """Answers each section request from VALID_JSON_STR; `bad` maps a section's first key to bad replies."""
+    def __init__(self, bad=None, delay=0.0):
+        self.bad = dict(bad or {})
+        self.delay = delay
+        self.calls = Counter()
+        self.prompts = {}
+        self._lock = threading.Lock()
+
+    def _answer(self, user):
+        keys = json.loads(re.search(r"the keys (\[.*\])\.$", user).group(1))
+        with self._lock:
+            self.calls[keys[0]] += 1
+            self.prompts.setdefault(keys[0], []).append(user)
+            pending = self.bad.get(keys[0])
+            if pending:
+                return pending.pop(0)
+        return json.dumps({k: FULL[k] for k in keys})
+
+    def generate(self, system, user, temperature=0.1):
+        time.sleep(self.delay)
+        return self._answer(user)
+
+    async def agenerate(self, system, user, temperature=0.1):
+        await asyncio.sleep(self.delay)
+        return self._answer(user)
+
+
+def _chain(client, **kwargs):
+    return DeterministicChain(client, ShortTermMemory(), sectioned=True, **kwargs)
+
+
+def test_sections_cover_schema_and_parse_against_sub_models():
+    keys = [k for _, ks in SECTIONS + (FINAL_SECTION,) for k in ks]
+    assert sorted(keys) == sorted(StartupAssessment.model_fields)
+    assert parse_section('{"team": {"founders_count": "2", "strengths": [], "gaps": []}}', ("team",)) \
+        == (None, {"team": {"founders_count": 2, "strengths": [], "gaps": []}})
+    kind, _ = parse_section('{"team": {"strengths": []}}', ("team",))
+    assert kind == "validation_failed"
+    assert set(section_model(("market",)).model_fields) == {"market"}
+
+
+def test_sectioned_run_merges_sections_and_conditions_recommendation():
+    client = _SectionClient()
+    ok, model = _chain(client).run("A startup", session_id="s1")
+    assert ok and model == StartupAssessment.model_validate(FULL)
+    assert sum(client.calls.values()) == len(SECTIONS) + 1
+    assert "OTHER_SECTIONS" in client.prompts["recommendation"][0]
+    assert "OTHER_SECTIONS" not in client.prompts["market"][0]
+
+
+def test_failing_section_is_retried_alone():
+    client = _SectionClient(bad={"team": ['{"team": {"strengths": "x"}}']})
+    ok, _ = _chain(client, max_retries=1).run("A startup")
+    assert ok
+    assert client.calls["team"] == 2
+    assert all(n == 1 for k, n in client.calls.items() if k != "team")
+    assert "PREVIOUS_ATTEMPT_ERRORS" in client.prompts["team"][1]
+
+
+def test_whole_model_failure_regenerates_owning_section():
+    empty_summary = json.dumps({"name": "X", "summary": " ", "assumptions": []})
+    client = _SectionClient(bad={"name": [empty_summary]})
+    ok, model = _chain(client).run("A startup")
+    assert ok and model.summary == FULL["summary"]
+    assert client.calls["name"] == 2 and client.calls["market"] == 1
+
+
+def test_exhausted_section_reports_failure():
+    client = _SectionClient(bad={"risks": ["nope"] * 3})
+    ok, err = _chain(client, max_retries=1).run("A startup")
+    assert not ok and err["section"] == "risks" and err["error"] == "invalid_json"
+    assert client.calls["recommendation"] == 0
+
+
+def test_async_sections_run_concurrently():
+    client = _SectionClient(delay=0.1)
+    start = time.perf_counter()
+    ok, _ = asyncio.run(_chain(client).arun("A startup"))
+    elapsed = time.perf_counter() - start
+    assert ok and elapsed < 0.5  # two rounds of requests, not seven sequential ones
+
+
+def test_sync_sections_run_concurrently():
+    client = _SectionClient(delay=0.1)
+    start = time.perf_counter()
+    ok, _ = _chain(client).run("A startup")
+    assert ok and time.perf_counter() - start < 0.5
@@ -0,0 +1,123 @@
+import asyncio
+import http.client
+import json
+import threading
+import pytest
+from src.chain import DeterministicChain
+from src.memory import ShortTermMemory
+from src.metrics import MetricsRegistry
+from src.models import AsyncMockClient, MockClient
+from src.service import AnalysisService
+from src.tests.test_chain import VALID_JSON_STR
+
+
+@pytest.fixture
+def serve():
+    loops = []
+
+    def start(chain, **kwargs):
+        service = AnalysisService(chain, metrics=MetricsRegistry(), **kwargs)
+        loop = asyncio.new_event_loop()
+        server = loop.run_until_complete(service.serve("127.0.0.1", 0))
+        threading.Thread(target=loop.run_forever, daemon=True).start()
+        loops.append((loop, server))
+        return service, server.sockets[0].getsockname()[1]
+
+    yield start
+
+    async def shutdown(server):
+        server.close()
+        tasks = [t for t in asyncio.all_tasks() if t is not asyncio.current_task()]
+        for t in tasks:
+            t.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    for loop, server in loops:
+        asyncio.run_coroutine_threadsafe(shutdown(server), loop).result(5)
+        loop.call_soon_threadsafe(loop.stop)
+
+
+def _post(port, path, payload, content_type="application/json"):
+    conn = http.client.HTTPConnection("127.0.0.1", port, timeout=10)
+    body = payload if isinstance(payload, bytes) else json.dumps(payload).encode("utf-8")
+    conn.request("POST", path, body=body, headers={"Content-Type": content_type})
+    resp = conn.getresponse()
+    return resp, resp.read()
+
+
+def test_analyze_returns_result_and_session(serve):
+    _, port = serve(DeterministicChain(MockClient(VALID_JSON_STR), ShortTermMemory()))
+    resp, body = _post(port, "/v1/analyze", {"input": "A startup", "session_id": "abc"})
+    data = json.loads(body)
+    assert resp.status == 200 and data["ok"] and data["session_id"] == "abc"
+    assert data["result"]["name"] == json.loads(VALID_JSON_STR)["name"]
+
+    resp, body = _post(port, "/v1/analyze", {"input": "A startup"})
+    assert resp.getheader("X-Session-Id") == json.loads(body)["session_id"]
+
+
+def test_keep_alive_and_errors(serve):
+    _, port = serve(DeterministicChain(MockClient(VALID_JSON_STR), ShortTermMemory()))
+    conn = http.client.HTTPConnection("127.0.0.1", port, timeout=10)
+    conn.request("POST", "/v1/analyze", body=b"not json")
+    resp = conn.getresponse()
+    assert resp.status == 400
+    resp.read()
+    conn.request("POST", "/v1/analyze", body=json.dumps({"input": ""}))
+    resp = conn.getresponse()
+    assert resp.status == 422
+    resp.read()
+    conn.request("GET", "/healthz")
+    assert json.loads(conn.getresponse().read())["ok"]
+
+
+def test_batch_streams_ndjson_in_completion_order(serve):
+    _, port = serve(DeterministicChain(MockClient(VALID_JSON_STR), ShortTermMemory()))
+    items = [{"id": f"r{i}", "input": f"startup {i}"} for i in range(5)] + [{"id": "bad"}]
+    ndjson = "\n".join(json.dumps(i) for i in items).encode("utf-8")
+    resp, body = _post(port, "/v1/analyze/batch", ndjson, content_type="application/x-ndjson")
+    assert resp.status == 200 and resp.getheader("Transfer-Encoding") == "chunked"
+    lines = [json.loads(line) for line in body.splitlines()]
+    assert len(lines) == 6
+    by_id = {line["id"]: line for line in lines}
+    assert all(by_id[f"r{i}"]["ok"] for i in range(5))
+    assert by_id["bad"]["error"]["error"] == "invalid_record"
+
+
+def test_backpressure_rejects_when_full(serve):
+    chain = DeterministicChain(AsyncMockClient(VALID_JSON_STR, delay=0.5), ShortTermMemory())
+    service, port = serve(chain, max_in_flight=1)
+    results = {}
+    t = threading.Thread(target=lambda: results.update(first=_post(port, "/v1/analyze", {"input": "slow"})[0].status))
+    t.start()
+    for _ in range(50):
+        if service.in_flight:
+            break
+        threading.Event().wait(0.01)
+    resp, _ = _post(port, "/v1/analyze", {"input": "second"})
+    t.join()
+    assert resp.status == 429 and resp.getheader("Retry-After") == "1"
+    assert results["first"] == 200
+
+
+def test_running_batch_leaves_room_for_single_requests(serve):
+    chain = DeterministicChain(AsyncMockClient(VALID_JSON_STR, delay=0.2), ShortTermMemory())
+    service, port = serve(chain, max_in_flight=4, reserved_interactive=2, max_batches=1)
+    items = {"items": [{"id": i, "input": f"startup {i}"} for i in range(10)]}
+    results = {}
+    t = threading.Thread(target=lambda: results.update(batch=_post(port, "/v1/analyze/batch", items)))
+    t.start()
+    for _ in range(50):
+        if service.in_flight >= 2:
+            break
+        threading.Event().wait(0.01)
+    threading.Event().wait(0.02)
+    assert service.in_flight == 2  # batch items are capped below max_in_flight
+    resp, _ = _post(port, "/v1/analyze", {"input": "interactive"})
+    assert resp.status == 200
+    resp, _ = _post(port, "/v1/analyze/batch", items)
+    assert resp.status == 429 and resp.getheader("Retry-After") == "1"
+    t.join()
+    resp, body = results["batch"]
+    assert resp.status == 200 and len(body.splitlines()) == 10
+    assert service.active_batches == 0
@@ -0,0 +1,38 @@
+import asyncio
+import time
+import pytest
+from src.chain import DeterministicChain
+from src.memory import ShortTermMemory
+from src.simulated import SimulatedClient, SimulatedProviderError
+
+
+def test_outcome_mix_follows_rates():
+    client = SimulatedClient(latency_ms=0, error_rate=0.2, invalid_json_rate=0.2,
+                             schema_violation_rate=0.2, seed=1)
+    for _ in range(2000):
+        try:
+            client.generate("s", "u")
+        except SimulatedProviderError:
+            pass
+    stats = client.stats()
+    assert sum(stats.values()) == 2000
+    for outcome in ("error", "invalid_json", "schema_violation"):
+        assert 300 < stats[outcome] < 500
+
+
+def test_latency_distribution_is_applied():
+    client = SimulatedClient(latency_fn=lambda: 0.05)
+    start = time.perf_counter()
+    client.generate("s", "u")
+    assert time.perf_counter() - start >= 0.05
+
+
+def test_chain_recovers_from_injected_faults():
+    client = SimulatedClient(latency_ms=1, invalid_json_rate=0.3, schema_violation_rate=0.3, seed=3)
+    chain = DeterministicChain(client, ShortTermMemory(), stream=True)
+
+    async def many():
+        return await asyncio.gather(*(chain.arun(f"startup {i}") for i in range(30)))
+
+    results = asyncio.run(many())
+    assert sum(ok for ok, _ in results) >= 25
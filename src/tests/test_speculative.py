@@ -0,0 +1,136 @@
+import asyncio
+import json
+import threading
+import time
+from src.chain import DeterministicChain
+from src.memory import ShortTermMemory
+from src.metrics import ChainHooks
+from src.speculative import SpeculationPolicy
+from src.tests.test_chain import VALID_JSON_STR
+
+MISSING_SUMMARY = json.dumps({k: v for k, v in json.loads(VALID_JSON_STR).items() if k != "summary"})
+
+
+class _ScriptedClient:
+    """Replies in call order from `script` of (delay, text) and then VALID_JSON_STR."""
+    def __init__(self, script=()):
+        self.script = list(script)
+        self.calls = 0
+        self.cancelled = 0
+        self._lock = threading.Lock()
+
+    def _next(self):
+        with self._lock:
+            self.calls += 1
+            return self.script.pop(0) if self.script else (0.0, VALID_JSON_STR)
+
+    def generate(self, system, user, temperature=0.1):
+        delay, text = self._next()
+        time.sleep(delay)
+        return text
+
+    async def agenerate(self, system, user, temperature=0.1):
+        delay, text = self._next()
+        try:
+            await asyncio.sleep(delay)
+        except asyncio.CancelledError:
+            self.cancelled += 1
+            raise
+        return text
+
+
+class _AttemptHooks(ChainHooks):
+    def __init__(self):
+        self.attempts = []
+
+    def on_attempt_end(self, ctx, error_kind):
+        self.attempts.append(error_kind)
+
+
+class _NoBackoff:
+    def delay(self, attempt, error_kind):
+        return 0.0
+
+
+def test_policy_tunes_candidate_count_to_validity_rate():
+    policy = SpeculationPolicy(target_quantile=0.99, max_n=5, initial_rate=0.8)
+    assert policy.n() == 3  # 0.2^3 = 0.008 <= 0.01
+    for _ in range(200):
+        policy.record(True)
+    assert policy.validity_rate > 0.99 and policy.n() == 1
+    for _ in range(200):
+        policy.record(False)
+    assert policy.n() == 5
+    assert SpeculationPolicy(fixed_n=2).n() == 2
+    assert policy.stats()["candidates"] == 400
+
+
+def test_first_valid_candidate_wins_in_one_attempt():
+    client = _ScriptedClient([(0.0, "not json"), (0.05, VALID_JSON_STR), (0.0, MISSING_SUMMARY)])
+    hooks = _AttemptHooks()
+    policy = SpeculationPolicy(fixed_n=3)
+    ok, model = DeterministicChain(client, ShortTermMemory(), speculative=policy, hooks=hooks).run("x")
+    assert ok and model.summary
+    assert client.calls == 3 and hooks.attempts == [None]
+    assert policy.candidates == 3 and policy.valid == 1
+
+
+def test_all_invalid_candidates_fall_back_to_field_retry():
+    client = _ScriptedClient([(0.0, "not json"), (0.01, MISSING_SUMMARY)])
+    hooks = _AttemptHooks()
+    chain = DeterministicChain(client, ShortTermMemory(), speculative=SpeculationPolicy(fixed_n=2), hooks=hooks,
+                               backoff=_NoBackoff())
+    ok, _ = chain.run("x")
+    assert ok and hooks.attempts == ["validation_failed", None]
+    assert client.calls == 3  # two candidates, then one field-level fix
+
+
+def test_provider_n_parameter_is_used_when_available():
+    class _NClient(_ScriptedClient):
+        def generate_n(self, system, user, n, temperature=0.1):
+            self.n_requests = n
+            return ["nope"] * (n - 1) + [VALID_JSON_STR]
+
+    client = _NClient()
+    ok, _ = DeterministicChain(client, ShortTermMemory(), speculative=SpeculationPolicy(fixed_n=4)).run("x")
+    assert ok and client.n_requests == 4 and client.calls == 0
+
+
+def test_async_speculation_cancels_slower_candidates():
+    client = _ScriptedClient([(0.02, VALID_JSON_STR), (2.0, VALID_JSON_STR), (2.0, VALID_JSON_STR)])
+    chain = DeterministicChain(client, ShortTermMemory(), speculative=SpeculationPolicy(fixed_n=3))
+
+    async def main():
+        start = time.perf_counter()
+        result = await chain.arun("x")
+        await asyncio.sleep(0)
+        return result, time.perf_counter() - start
+
+    (ok, _), elapsed = asyncio.run(main())
+    assert ok and elapsed < 1.0
+    assert client.cancelled == 2
+
+
+def test_candidates_use_spread_temperatures():
+    class _TempClient(_ScriptedClient):
+        def generate(self, system, user, temperature=0.1):
+            with self._lock:
+                self.temperatures = getattr(self, "temperatures", []) + [temperature]
+            return super().generate(system, user, temperature)
+
+    client = _TempClient([(0.0, "not json"), (0.0, "not json"), (0.05, VALID_JSON_STR)])
+    policy = SpeculationPolicy(fixed_n=3, spread_temperature=0.7)
+    assert DeterministicChain(client, ShortTermMemory(), speculative=policy, temperature=0.1).run("x")[0]
+    assert sorted(client.temperatures) == [0.1, 0.4, 0.7]
+    assert SpeculationPolicy(spread_temperature=None).temperatures(0.1, 3) == [0.1, 0.1, 0.1]
+
+
+def test_correlated_failures_raise_candidate_count():
+    independent, correlated = SpeculationPolicy(initial_rate=0.8), SpeculationPolicy(initial_rate=0.8)
+    assert independent.n() == correlated.n() == 3
+    for i in range(100):
+        # Same per-candidate validity; correlated attempts fail whole (20%) instead of ~0.8%.
+        correlated.record_attempt(3, any_valid=i % 5 != 0)
+        independent.record_attempt(3, any_valid=i % 100 != 0)
+    assert independent.efficiency == 1.0 and independent.n() == 3
+    assert correlated.efficiency < 0.5 and correlated.n() == 5
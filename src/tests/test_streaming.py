@@ -0,0 +1,104 @@
+import json
+import pytest
+from src.chain import DeterministicChain
+from src.memory import ShortTermMemory
+from src.models import MockClient
+from src.streaming import StreamingJSONValidator, StreamAbort
+from src.tests.test_chain import VALID_JSON_STR
+
+
+def _feed_all(text, chunk=7, **kwargs):
+    v = StreamingJSONValidator(**kwargs)
+    for i in range(0, len(text), chunk):
+        v.feed(text[i:i + chunk])
+    return v, v.close()
+
+
+def test_valid_stream_reports_fields_in_order():
+    seen = []
+    v, text = _feed_all(VALID_JSON_STR, on_field=lambda k, val: seen.append((k, val)))
+    assert text == VALID_JSON_STR
+    assert seen[0] == ("name", "Acme Market")
+    assert seen[1][0] == "summary"
+    assert dict(seen) == json.loads(VALID_JSON_STR)
+
+
+@pytest.mark.parametrize("bad, kind", [
+    ("Sure! Here is the JSON: {", "invalid_json"),
+    ("```json\n{", "invalid_json"),
+    ('{"name": "x",, ', "invalid_json"),
+    ('{"name": "x", "market": "big"', "validation_failed"),
+    ('{"name": 5', "validation_failed"),
+    ('{"name": "x", "summary": "  ",', "validation_failed"),
+])
+def test_bad_prefix_aborts_early(bad, kind):
+    v = StreamingJSONValidator()
+    with pytest.raises(StreamAbort) as exc:
+        v.feed(bad + " " * 100 + "never reached")
+    assert exc.value.kind == kind
+    assert exc.value.position <= len(bad)
+
+
+def test_trailing_text_and_truncation_abort():
+    with pytest.raises(StreamAbort):
+        _feed_all(VALID_JSON_STR + "\n```")
+    with pytest.raises(StreamAbort):
+        _feed_all(VALID_JSON_STR[:-1])
+
+
+class StreamSequenceMock:
+    def __init__(self, seq):
+        self.seq = seq
+        self.calls = 0
+        self.chunks_sent = 0
+    def generate_stream(self, system, user, temperature=0.1):
+        out = self.seq[min(self.calls, len(self.seq)-1)]
+        self.calls += 1
+        for i in range(0, len(out), 4):
+            self.chunks_sent += 1
+            yield out[i:i + 4]
+
+
+def test_chain_stream_aborts_and_retries():
+    bad = "Here is my analysis of the startup, followed by the JSON you asked for. " * 20
+    mock = StreamSequenceMock([bad, VALID_JSON_STR])
+    chain = DeterministicChain(mock, ShortTermMemory(), stream=True, repair=False)
+    fields = []
+    ok, result = chain.run("Analyze", on_field=lambda k, v: fields.append(k))
+    assert ok is True and result.name == "Acme Market"
+    # Only the first chunk of the bad completion was consumed.
+    assert mock.chunks_sent == 1 + (len(VALID_JSON_STR) + 3) // 4
+    assert fields[:2] == ["name", "summary"]
+
+
+def test_chain_stream_leaves_code_fence_for_repair():
+    fenced = "```json\n" + VALID_JSON_STR + "\n```\nLet me know if you need more."
+    mock = StreamSequenceMock([fenced])
+    chain = DeterministicChain(mock, ShortTermMemory(), stream=True)
+    ok, result = chain.run("Analyze")
+    assert ok is True and mock.calls == 1
+    assert chain.repair_counts["stripped_code_fence"] == 1
+
+
+def test_chain_stream_with_mock_client():
+    chain = DeterministicChain(MockClient(VALID_JSON_STR), ShortTermMemory(), stream=True)
+    ok, result = chain.run("Analyze")
+    assert ok is True
+
+
+def test_chain_arun_streams_async_client():
+    import asyncio
+    from src.models import AsyncMockClient
+    fields = []
+    chain = DeterministicChain(AsyncMockClient(VALID_JSON_STR), ShortTermMemory(), stream=True)
+    ok, result = asyncio.run(chain.arun("Analyze", on_field=lambda k, v: fields.append(k)))
+    assert ok is True and fields[0] == "name"
+
+
+def test_repairable_mode_lets_fixable_defects_through():
+    text = '```json\n{"name": "x", "risks": ["a",], "summary": "s",}\n```'
+    v, out = _feed_all(text, repairable=True)
+    assert v.done and out == text
+    assert v.fields["summary"] == "s"
+    with pytest.raises(StreamAbort):
+        StreamingJSONValidator(repairable=True).feed('{"name": "x", "market": "big"')
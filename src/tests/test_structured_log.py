@@ -0,0 +1,105 @@
+import io
+import json
+import logging
+import random
+from src.chain import DeterministicChain
+from src.memory import ShortTermMemory
+from src.models import MockClient
+from src.structured_log import (REQUEST_LOGGER, STAGE_LOGGERS, JsonFormatter, RequestLogHooks, _DeferredQueueHandler,
+                                configure_logging, stop_logging)
+from src.tests.test_chain import VALID_JSON_STR
+
+
+class _ListHandler(logging.Handler):
+    def __init__(self):
+        super().__init__()
+        self.records = []
+
+    def emit(self, record):
+        self.records.append(record)
+
+
+def _capture_logger(name):
+    log = logging.getLogger(name)
+    log.propagate = False
+    log.setLevel(logging.INFO)
+    handler = _ListHandler()
+    log.handlers = [handler]
+    return log, handler
+
+
+def test_json_formatter_merges_dict_events():
+    record = logging.LogRecord("x", logging.INFO, __file__, 1, {"event": "e", "n": 1}, None, None)
+    out = json.loads(JsonFormatter().format(record))
+    assert out["event"] == "e" and out["n"] == 1 and out["level"] == "INFO"
+
+
+def test_request_hooks_emit_one_event_per_request():
+    log, handler = _capture_logger("test.requests.unsampled")
+    chain = DeterministicChain(MockClient(VALID_JSON_STR), ShortTermMemory(),
+                               hooks=RequestLogHooks(sample_rate=0.0, log=log))
+    chain.run("x", session_id="s1")
+    chain.run("y", session_id="s2")
+    events = [r.msg for r in handler.records]
+    assert [e["session_id"] for e in events] == ["s1", "s2"]
+    assert all(e["outcome"] == "success" and e["attempts"] == 1 for e in events)
+    assert "debug" not in events[0]
+
+
+def test_sampled_requests_carry_stage_detail():
+    log, handler = _capture_logger("test.requests.sampled")
+    chain = DeterministicChain(MockClient("not json"), ShortTermMemory(), max_retries=1,
+                               hooks=RequestLogHooks(sample_rate=1.0, log=log, rng=random.Random(0)))
+    chain.run("x")
+    (record,) = handler.records
+    event = record.msg
+    assert record.levelno == logging.WARNING and event["outcome"] == "invalid_json"
+    assert {s[0] for s in event["debug"]["stages"]} >= {"prompt_build", "generate", "parse"}
+    assert event["debug"]["errors"] == [(1, "invalid_json"), (2, "invalid_json")]
+
+
+def test_structured_mode_writes_json_lines_and_silences_stages():
+    root = logging.getLogger()
+    saved_handlers, saved_level = list(root.handlers), root.level
+    stream = io.StringIO()
+    try:
+        configure_logging("structured", stream=stream)
+        chain = DeterministicChain(MockClient(VALID_JSON_STR), ShortTermMemory(), hooks=RequestLogHooks(0.0))
+        chain.run("x", session_id="s1")
+        stop_logging()
+    finally:
+        stop_logging()
+        root.handlers = saved_handlers
+        root.setLevel(saved_level)
+        for name in STAGE_LOGGERS:
+            logging.getLogger(name).setLevel(logging.NOTSET)
+    lines = [json.loads(line) for line in stream.getvalue().splitlines()]
+    assert len(lines) == 1
+    assert lines[0]["event"] == "chain.request" and lines[0]["session_id"] == "s1"
+
+
+def test_third_party_records_are_rendered_before_queueing():
+    root = logging.getLogger()
+    saved_handlers, saved_level = list(root.handlers), root.level
+    stream = io.StringIO()
+    try:
+        configure_logging("structured", stream=stream)
+        state = {"step": 1}
+        logging.getLogger("thirdparty").warning("state=%s", state)
+        state["step"] = 2  # mutated before the listener thread gets to the record
+        stop_logging()
+    finally:
+        stop_logging()
+        root.handlers = saved_handlers
+        root.setLevel(saved_level)
+        for name in STAGE_LOGGERS:
+            logging.getLogger(name).setLevel(logging.NOTSET)
+    lines = [json.loads(line) for line in stream.getvalue().splitlines()]
+    assert [line["msg"] for line in lines] == ["state={'step': 1}"]
+
+    handler = _DeferredQueueHandler(None)
+    record = logging.LogRecord("thirdparty", logging.INFO, __file__, 1, "state=%s", (state,), None)
+    prepared = handler.prepare(record)
+    assert prepared.msg == "state={'step': 2}" and prepared.args is None and record.args is not None
+    event = logging.LogRecord(REQUEST_LOGGER, logging.INFO, __file__, 1, {"event": "chain.request"}, None, None)
+    assert handler.prepare(event) is event
@@ -0,0 +1,79 @@
+import pytest
+from src.chain import DeterministicChain, MIN_INPUT_TOKENS, USER_INSTRUCTIONS
+from src.memory import ShortTermMemory
+from src.models import MockClient
+from src.tokens import HeuristicEstimator, compact_text, truncate_to_tokens
+from src.tests.test_chain import VALID_JSON_STR
+
+EST = HeuristicEstimator()
+PITCH = "We build a marketplace for SMB suppliers. " * 200
+
+
+def test_compact_text_keeps_leading_sentences():
+    text = "First sentence here. Second one is longer than the first. Third."
+    out = compact_text(text, 10, EST)
+    assert out.startswith("First sentence here.") and out.endswith("…")
+    assert EST.count(out) <= 10
+    assert compact_text(text, 1000, EST) == text
+
+
+def test_truncate_to_tokens_fits():
+    out = truncate_to_tokens("word " * 500, 20, EST)
+    assert EST.count(out) <= 20 and out.endswith("…")
+
+
+def test_stored_memory_entries_are_compacted():
+    memory = ShortTermMemory()
+    chain = DeterministicChain(MockClient(VALID_JSON_STR), memory)
+    ok, _ = chain.run(PITCH, session_id="s")
+    assert ok is True
+    user_entry = memory.get_recent("s")[0]
+    assert user_entry.startswith("USER: We build") and EST.count(user_entry) < 200
+
+
+def test_prompt_stays_within_budget_as_session_grows():
+    memory = ShortTermMemory(max_len=50)
+    for i in range(50):
+        memory.add("s", f"USER: {PITCH[:400]} round {i}")
+    budget = 1200
+    chain = DeterministicChain(MockClient(VALID_JSON_STR), memory, token_budget=budget)
+    system = chain._build_system_prompt()
+    user = chain._build_user_prompt("Short new pitch.", session_id="s")
+    assert EST.count(system) + EST.count(user) <= budget
+    assert "RECENT_CONVERSATION" in user and "round 49" in user
+
+
+def test_oversized_input_is_compacted_to_budget():
+    chain = DeterministicChain(MockClient(VALID_JSON_STR), ShortTermMemory(), token_budget=1500)
+    user = chain._build_user_prompt(PITCH)
+    assert EST.count(chain._build_system_prompt()) + EST.count(user) <= 1500
+
+
+def test_budget_too_small_for_system_prompt_is_rejected():
+    with pytest.raises(ValueError, match="token_budget"):
+        DeterministicChain(MockClient(VALID_JSON_STR), ShortTermMemory(), token_budget=500)
+
+
+def test_input_is_never_compacted_below_minimum():
+    chain = DeterministicChain(MockClient(VALID_JSON_STR), ShortTermMemory(), token_budget=1500)
+    chain.token_budget = 10  # e.g. lowered after construction
+    user = chain._build_user_prompt(PITCH)
+    kept = user.split("USER_INPUT:\n", 1)[1].split("\n\n" + USER_INSTRUCTIONS)[0]
+    assert EST.count(kept) > MIN_INPUT_TOKENS // 2 and kept.startswith("We build")
+
+
+@pytest.mark.parametrize("text", ["我们为中小企业供应商打造交易平台。" * 100, "aGVsbG8gd29ybGQ" * 100])
+def test_unspaced_text_is_cut_at_characters(text):
+    for fn in (truncate_to_tokens, compact_text):
+        out = fn(text, 20, EST)
+        assert out.startswith(text[:10]) and out.endswith("…") and EST.count(out) <= 20
+
+
+def test_unspaced_input_survives_budget_and_memory():
+    pitch = "我们为中小企业供应商打造交易平台" * 300
+    memory = ShortTermMemory()
+    chain = DeterministicChain(MockClient(VALID_JSON_STR), memory, token_budget=1500)
+    user = chain._build_user_prompt(pitch)
+    assert f"USER_INPUT:\n{pitch[:20]}" in user
+    ok, _ = chain.run(pitch, session_id="s")
+    assert ok is True and memory.get_recent("s")[0].startswith("USER: " + pitch[:10])
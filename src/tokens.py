@@ -0,0 +1,106 @@
+# src/tokens.py
+"""
+Local token estimation and text compaction for prompt budgeting.
+
+The default estimator is a character heuristic that needs no dependencies;
+TiktokenEstimator is used when `tiktoken` is installed and requested.
+"""
+import re
+from typing import Optional
+import logging
+
+logger = logging.getLogger(__name__)
+
+CHARS_PER_TOKEN = 4
+TRUNCATION_MARKER = " …"
+
+_SENTENCE_RE = re.compile(r"(?<=[.!?;])\s+")
+
+
+class TokenEstimator:
+    """
+    Abstract token counter. Implement `count` with a local tokenizer.
+    """
+    def count(self, text: str) -> int:
+        raise NotImplementedError("Implement in subclass")
+
+
+class HeuristicEstimator(TokenEstimator):
+    """~4 characters per token; cheap and close enough for English prose and JSON."""
+    def __init__(self, chars_per_token: int = CHARS_PER_TOKEN):
+        self.chars_per_token = chars_per_token
+
+    def count(self, text: str) -> int:
+        if not text:
+            return 0
+        return (len(text) + self.chars_per_token - 1) // self.chars_per_token
+
+
+class TiktokenEstimator(TokenEstimator):
+    """Exact counts for OpenAI models; requires the optional `tiktoken` package."""
+    def __init__(self, encoding: str = "o200k_base"):
+        import tiktoken  # optional dependency
+        self._enc = tiktoken.get_encoding(encoding)
+
+    def count(self, text: str) -> int:
+        return len(self._enc.encode(text or "", disallowed_special=()))
+
+
+def default_estimator(prefer_tiktoken: bool = False) -> TokenEstimator:
+    if prefer_tiktoken:
+        try:
+            return TiktokenEstimator()
+        except Exception:
+            logger.debug("tiktoken not available; using heuristic token estimator")
+    return HeuristicEstimator()
+
+
+def _longest_fitting(parts, join, max_tokens: int, estimator: TokenEstimator) -> int:
+    # Binary search on the number of leading parts keeps this O(log n) estimator calls.
+    lo, hi = 0, len(parts)
+    while lo < hi:
+        mid = (lo + hi + 1) // 2
+        if estimator.count(join(parts[:mid]) + TRUNCATION_MARKER) <= max_tokens:
+            lo = mid
+        else:
+            hi = mid - 1
+    return lo
+
+
+def truncate_to_tokens(text: str, max_tokens: int, estimator: Optional[TokenEstimator] = None) -> str:
+    """
+    Cut text at a word boundary so it fits max_tokens (marker included). Text
+    whose first word alone is too long (unspaced scripts such as Chinese or
+    Japanese, URLs, base64) is cut at a character instead.
+    """
+    estimator = estimator or HeuristicEstimator()
+    if estimator.count(text) <= max_tokens:
+        return text
+    if max_tokens <= estimator.count(TRUNCATION_MARKER):
+        return ""
+    words = text.split()
+    kept = _longest_fitting(words, " ".join, max_tokens, estimator)
+    if kept:
+        return " ".join(words[:kept]) + TRUNCATION_MARKER
+    text = text.strip()
+    kept = _longest_fitting(text, "".join, max_tokens, estimator)
+    return text[:kept] + TRUNCATION_MARKER if kept else ""
+
+
+def compact_text(text: str, max_tokens: int, estimator: Optional[TokenEstimator] = None) -> str:
+    """
+    Extractive compaction: keep leading whole sentences that fit max_tokens,
+    falling back to word truncation when the first sentence alone is too long.
+    """
+    estimator = estimator or HeuristicEstimator()
+    if estimator.count(text) <= max_tokens:
+        return text
+    kept = []
+    for sentence in _SENTENCE_RE.split(text.strip()):
+        candidate = " ".join(kept + [sentence]) + TRUNCATION_MARKER
+        if estimator.count(candidate) > max_tokens:
+            break
+        kept.append(sentence)
+    if kept:
+        return " ".join(kept) + TRUNCATION_MARKER
+    return truncate_to_tokens(text, max_tokens, estimator)
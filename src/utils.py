@@ -1,6 +1,6 @@
-from typing import Dict, Any, Tuple
+from typing import Dict, Any, Optional, Tuple, Union
 from pydantic import BaseModel, ValidationError
-from .schemas import StartupAssessment
+from .schemas import StartupAssessment, CANONICAL
 
 def validate_output(obj: dict) -> Tuple[bool, Any]:
     """
@@ -19,4 +19,26 @@ def validate_output(obj: dict) -> Tuple[bool, Any]:
         assessment = StartupAssessment.model_validate(obj)
         return True, assessment
     except ValidationError as e:
-        return False, e
\ No newline at end of file
+        return False, e
+
+def validate_json(raw: Union[str, bytes], canonical: bool = False) -> Tuple[bool, Any]:
+    """
+    Validate a raw JSON string/bytes straight into a StartupAssessment.
+
+    Uses the model's precompiled pydantic-core validator on the JSON text, so no
+    intermediate dict is built. Invalid JSON is reported as a ValidationError
+    (error type "json_invalid"). With `canonical`, values the schema would
+    otherwise default or keep loosely typed (invest "Yes", founders_count "2")
+    are rejected instead.
+
+    Returns:
+        Tuple[bool, Any]: same shape as validate_output.
+    """
+    try:
+        return True, StartupAssessment.model_validate_json(raw, context=CANONICAL if canonical else None)
+    except ValidationError as e:
+        return False, e
+
+def dump_json(model: BaseModel, indent: Optional[int] = None) -> str:
+    """Serialize a validated model to JSON without going through a dict."""
+    return model.model_dump_json(indent=indent)